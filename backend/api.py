@@ -1,27 +1,58 @@
-import json
 import locale
-import socket
+import os
+import sqlite3
 import sys
 import threading
-import requests
+import time
+from dataclasses import replace
 from urllib.parse import quote as url_quote
-from typing import Optional
+from typing import Callable, Optional
 
-from core.launcher import Launcher
+from core.launcher import Launcher, get_bin_dir
 from core.config_gen import ConfigGenerator, get_user_config_dir, get_log_dir
 from core.sub_loader import SubscriptionLoader
+from core.prewarm import TunnelWarmer
+from core.region_groups import normalize_settings, with_region_groups
+from core.profiles import apply_selections, normalize_selections, wait_for_controller
+from core.probe import probe_tcp, probe_rdp_via_socks
+from core.resolver import resolver
+from core.servers import RdpServer, build_servers, load_overrides
+from core.server_index import DEFAULT_LIMIT, ServerIndex
+from core.state import AppState, StateHolder
+from core.records import GroupRecord, ProxyRecord, RecordIndex
+from core.store import StateStore, DB_FILE, MEMORY_DB
+from core.traffic import ConnectionAggregator, DEFAULT_TOP_N
+from core.telemetry import TelemetryCollector
+from core.startup import trace
+from core.snapshot import UiSnapshot, SNAPSHOT_FILE
+from core.controller_cache import ControllerCache
+from core.geodata import GeodataManager, DEFAULT_MAX_AGE_DAYS
+from core.instrument import (
+    METRICS_PORT_ENV,
+    http_get,
+    http_put,
+    instrument_api,
+    metrics,
+)
 
 from core.updater import Updater
 
 RDP_GROUP_KEYWORDS = ["server-", "auto-"]
 CLASH_API_PORTS = [9090, 9097, 7891, 7890]
 DEFAULT_CLASH_API = "http://127.0.0.1:17891"
+PROBE_MODE_TCP = "tcp"
+PROBE_MODE_RDP = "rdp"
+PREWARM_PREFERENCE = "prewarm_enabled"
+ACTIVE_PROFILE_PREFERENCE = "active_profile"
+PROVIDER_MODE_PREFERENCE = "proxy_providers"
+REGION_GROUPS_PREFERENCE = "region_groups"
+PROBE_FIELDS = ("status", "latency", "dns_ms", "socks_ms", "tcp_ms", "rdp_ms")
 
 
 def detect_external_clash() -> Optional[tuple[str, int]]:
     for port in CLASH_API_PORTS:
         try:
-            resp = requests.get(f"http://127.0.0.1:{port}/version", timeout=1)
+            resp = http_get(f"http://127.0.0.1:{port}/version", timeout=1)
             if resp.status_code == 200:
                 return ("127.0.0.1", port)
         except Exception:
@@ -31,7 +62,7 @@ def detect_external_clash() -> Optional[tuple[str, int]]:
 
 def get_clash_proxy_port(api_host: str, api_port: int) -> int:
     try:
-        resp = requests.get(f"http://{api_host}:{api_port}/configs", timeout=2)
+        resp = http_get(f"http://{api_host}:{api_port}/configs", timeout=2)
         if resp.status_code == 200:
             config = resp.json()
             return config.get("mixed-port") or config.get("socks-port") or 7897
@@ -40,35 +71,111 @@ def get_clash_proxy_port(api_host: str, api_port: int) -> int:
     return 7897
 
 
-def trigger_geodata_update(api_base: str) -> bool:
-    try:
-        resp = requests.post(f"{api_base}/configs/geo", timeout=30)
-        return resp.status_code in (200, 204)
-    except Exception:
-        return False
+# Server ids are list positions, so a subscription reload during a probe run
+# can give an id to a different server; results are matched by what was
+# probed instead.
+def _probe_key(server: RdpServer) -> tuple[str, str, int]:
+    return (server.name, server.host, server.port)
+
+
+def _apply_probe(server: RdpServer, results: dict) -> RdpServer:
+    result = results.get(_probe_key(server))
+    if result is None:
+        return server
+    return replace(server, **{name: result[name] for name in PROBE_FIELDS})
+
 
+def _group_names(groups: list) -> set[str]:
+    return {g.get("name") for g in groups if isinstance(g, dict)}
 
+
+@instrument_api
 class Api:
     def __init__(self):
         self._launcher = Launcher()
         self._config_gen = ConfigGenerator()
         self._sub_loader = SubscriptionLoader()
         self._updater = Updater()
-        self._servers: list[dict] = []
-        self._proxy_groups: list[dict] = []
-        self._subscription_url: str = ""
+        self._state = StateHolder(on_change=self._index_servers)
         self._user_config_dir = get_user_config_dir()
         self._log_dir = get_log_dir()
         self._config_file = self._user_config_dir / "config.json"
+        self._store: Optional[StateStore] = None
+        self._snapshot = UiSnapshot(self._user_config_dir / SNAPSHOT_FILE)
+        self._traffic = ConnectionAggregator(self._fetch_connections)
+        self._telemetry = TelemetryCollector(lambda: self._clash_api_base)
+        self._controller = ControllerCache(lambda: self._clash_api_base)
+        self._geodata = GeodataManager(
+            self._user_config_dir, get_bin_dir(), self._geodata_max_age
+        )
+        self._prewarm = TunnelWarmer(
+            lambda: self._proxy_port, self._prewarm_targets, self._prewarm_in_use
+        )
+        self._server_index = ServerIndex(RecordIndex())
+        self._launcher.set_before_multidesk(self._before_multidesk)
 
         self._external_clash: Optional[tuple[str, int]] = None
         self._clash_api_base: str = DEFAULT_CLASH_API
         self._proxy_port: int = 17897
         self._reuse_mode: bool = False
+        self._ready = threading.Event()
+        self._init_lock = threading.Lock()
+        self._init_thread: Optional[threading.Thread] = None
+
+        if os.environ.get(METRICS_PORT_ENV):
+            metrics.enabled = True
+            metrics.serve(int(os.environ[METRICS_PORT_ENV]))
+
+    def initialize(self):
+        with self._init_lock:
+            if self._init_thread is None:
+                self._init_thread = threading.Thread(
+                    target=self._initialize, daemon=True
+                )
+                self._init_thread.start()
 
-        self._detect_and_configure_clash()
-        self._load_saved_config()
-        self._ensure_default_configs()
+    def _initialize(self):
+        try:
+            self._store = self._open_store()
+            self._detect_and_configure_clash()
+            self._load_saved_config()
+            self._config_gen.set_provider_mode(self._provider_mode_enabled())
+            self._ensure_default_configs()
+            self._prefetch_hosts()
+        except Exception as e:
+            print(f"Initialization error: {e}")
+        finally:
+            self._ready.set()
+            trace.mark("backend_ready")
+
+    # A database that cannot be opened falls back to an in-memory one, so the
+    # app keeps working for this session without persisting anything.
+    def _open_store(self) -> StateStore:
+        try:
+            return StateStore(self._user_config_dir / DB_FILE)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Store open error: {e}")
+            return StateStore(MEMORY_DB)
+
+    # Warms the resolver cache so the first probe run measures connects only.
+    def _prefetch_hosts(self):
+        hosts = {server.host for server in self._state.current.servers}
+        if hosts:
+            threading.Thread(
+                target=resolver.prefetch, args=(hosts,), daemon=True
+            ).start()
+
+    # Called by the window's shown event: work that can prompt the user or
+    # hold up startup runs from here instead of during construction.
+    def window_shown(self):
+        self._updater.start_recovery()
+
+    def _wait_ready(self):
+        self.initialize()
+        self._ready.wait()
+
+    def get_startup_trace(self) -> dict:
+        return trace.snapshot()
 
     def _detect_and_configure_clash(self):
         external = detect_external_clash()
@@ -80,23 +187,261 @@ class Api:
             self._config_gen.set_proxy_port(self._proxy_port)
             self._config_gen.update_multidesk_proxy_port(self._proxy_port)
             self._launcher.set_reuse_mode(True)
-            threading.Thread(
-                target=trigger_geodata_update,
-                args=(self._clash_api_base,),
-                daemon=True,
-            ).start()
+            self._geodata.ensure_fresh(self._clash_api_base)
         else:
             self._clash_api_base = DEFAULT_CLASH_API
             self._proxy_port = 17897
             self._reuse_mode = False
             self._launcher.set_reuse_mode(False)
+            self._geodata.ensure_fresh()
 
-    def get_run_mode(self) -> dict:
+    def _geodata_max_age(self) -> float:
+        if self._store is None:
+            return DEFAULT_MAX_AGE_DAYS
+        try:
+            return self._store.get_preference(
+                "geodata_max_age_days", DEFAULT_MAX_AGE_DAYS
+            )
+        except sqlite3.Error:
+            return DEFAULT_MAX_AGE_DAYS
+
+    def get_geodata_status(self) -> dict:
+        self._wait_ready()
+        return self._geodata.status()
+
+    def update_geodata(self, force: bool = True) -> dict:
+        self._wait_ready()
+        return self._geodata.update(force)
+
+    def set_geodata_max_age(self, days: float) -> bool:
+        self._wait_ready()
+        try:
+            self._store.set_preference("geodata_max_age_days", max(0.0, float(days)))
+            return True
+        except (sqlite3.Error, TypeError, ValueError):
+            return False
+
+    def _prewarm_enabled(self) -> bool:
+        if self._store is None:
+            return False
+        try:
+            return bool(self._store.get_preference(PREWARM_PREFERENCE, False))
+        except sqlite3.Error:
+            return False
+
+    # Selections are restored before tunnels are warmed so the warm-up goes
+    # through the nodes MultiDesk will actually use.
+    def _before_multidesk(self):
+        self._restore_profile()
+        if self._prewarm_enabled():
+            self._prewarm.start()
+
+    # One target per RDP group: the server behind the node it currently
+    # selects, or any server in the group if the node has none of its own.
+    def _prewarm_targets(
+        self, groups: Optional[set[str]] = None
+    ) -> list[tuple[str, str, str, int]]:
+        servers = self._state.current.servers
+        targets = []
+        for group in self._fetch_external_proxy_groups():
+            name, now = group["name"], group["now"]
+            if not now or (groups is not None and name not in groups):
+                continue
+            candidates = [s for s in servers if name in s.groups]
+            server = next((s for s in candidates if s.proxy == now), None)
+            server = server or (candidates[0] if candidates else None)
+            if server is not None:
+                targets.append((name, now, server.host, server.port))
+        return targets
+
+    # Groups that live engine connections pass through; chains list every
+    # group on the path as well as the node.
+    def _prewarm_in_use(self) -> set[str]:
+        payload = self._fetch_connections() or {}
+        return {
+            name
+            for conn in payload.get("connections") or []
+            for name in conn.get("chains") or []
+        }
+
+    def get_prewarm_status(self) -> dict:
+        self._wait_ready()
+        return {"enabled": self._prewarm_enabled(), **self._prewarm.stats()}
+
+    def set_prewarm_enabled(self, enabled: bool) -> bool:
+        self._wait_ready()
+        try:
+            self._store.set_preference(PREWARM_PREFERENCE, bool(enabled))
+        except sqlite3.Error:
+            return False
+        if not enabled:
+            self._prewarm.stop()
+        elif self._launcher.get_status()["multidesk"]:
+            self._prewarm.start()
+        return True
+
+    def _provider_mode_enabled(self) -> bool:
+        try:
+            return bool(self._store.get_preference(PROVIDER_MODE_PREFERENCE, False))
+        except sqlite3.Error:
+            return False
+
+    def get_provider_mode(self) -> dict:
+        self._wait_ready()
+        return {
+            "enabled": self._config_gen.get_provider_mode(),
+            **self._config_gen.get_write_report(),
+        }
+
+    # Takes effect the next time the subscription is loaded.
+    def set_provider_mode(self, enabled: bool) -> bool:
+        self._wait_ready()
+        try:
+            self._store.set_preference(PROVIDER_MODE_PREFERENCE, bool(enabled))
+        except sqlite3.Error:
+            return False
+        self._config_gen.set_provider_mode(bool(enabled))
+        return True
+
+    # When only node details changed, the running engine re-reads just the
+    # rewritten provider files; a changed config still needs an engine restart.
+    def _refresh_proxy_providers(self):
+        report = self._config_gen.get_write_report()
+        if report["config_changed"] or not report["providers_changed"]:
+            return
+        if self._reuse_mode or not self._launcher.get_status()["clash"]:
+            return
+        for name in report["providers_changed"]:
+            try:
+                resp = http_put(
+                    f"{self._clash_api_base}/providers/proxies/{url_quote(name)}",
+                    timeout=5,
+                )
+                if resp.status_code != 204:
+                    print(f"Proxy provider refresh error ({name}): {resp.status_code}")
+            except Exception as e:
+                print(f"Proxy provider refresh error ({name}): {e}")
+
+    def _region_group_settings(self) -> Optional[dict]:
+        try:
+            data = self._store.get_preference(REGION_GROUPS_PREFERENCE)
+        except sqlite3.Error:
+            return None
+        if not isinstance(data, dict) or not data.get("enabled"):
+            return None
+        return normalize_settings(data)
+
+    def get_region_groups(self) -> dict:
+        self._wait_ready()
+        try:
+            data = self._store.get_preference(REGION_GROUPS_PREFERENCE) or {}
+        except sqlite3.Error:
+            data = {}
         return {
+            "enabled": bool(data.get("enabled")),
+            "settings": normalize_settings(data),
+        }
+
+    # Takes effect the next time the subscription is loaded.
+    def set_region_groups(self, enabled: bool, settings: Optional[dict] = None) -> dict:
+        self._wait_ready()
+        current = self.get_region_groups()
+        merged = {**current["settings"], **(settings or {})}
+        data = {**normalize_settings(merged), "enabled": bool(enabled)}
+        try:
+            self._store.set_preference(REGION_GROUPS_PREFERENCE, data)
+        except sqlite3.Error as e:
+            return {"success": False, "error": str(e)}
+        return {"success": True, **self.get_region_groups()}
+
+    def _active_profile(self) -> Optional[str]:
+        try:
+            return self._store.get_preference(ACTIVE_PROFILE_PREFERENCE)
+        except sqlite3.Error:
+            return None
+
+    def _restore_profile(self):
+        name = self._active_profile()
+        if not name or not wait_for_controller(self._clash_api_base):
+            return
+        result = self._apply_profile(name)
+        if not result["success"]:
+            print(f"Profile restore error ({name}): {result['failed']}")
+
+    def _apply_profile(self, name: str) -> dict:
+        selections = self._store.get_profile(name)
+        if selections is None:
+            return {
+                "success": False,
+                "applied": [],
+                "failed": {},
+                "rolled_back": [],
+                "error": "no such profile",
+            }
+        try:
+            return apply_selections(self._clash_api_base, selections)
+        finally:
+            self._controller.invalidate()
+
+    def get_profiles(self) -> dict:
+        self._wait_ready()
+        try:
+            profiles = self._store.list_profiles()
+        except sqlite3.Error:
+            profiles = []
+        return {"active": self._active_profile(), "profiles": profiles}
+
+    # Without explicit selections the profile captures what every RDP group
+    # currently selects.
+    def save_profile(self, name: str, selections: Optional[dict] = None) -> dict:
+        self._wait_ready()
+        name = name.strip()
+        if selections is None:
+            selections = {
+                g["name"]: g["now"] for g in self._fetch_external_proxy_groups()
+            }
+        selections = normalize_selections(selections)
+        if not name or not selections:
+            return {"success": False, "error": "empty profile"}
+        try:
+            self._store.save_profile(name, selections)
+        except sqlite3.Error as e:
+            return {"success": False, "error": str(e)}
+        return {"success": True, "name": name, "selections": selections}
+
+    def delete_profile(self, name: str) -> bool:
+        self._wait_ready()
+        try:
+            if self._active_profile() == name:
+                self._store.set_preference(ACTIVE_PROFILE_PREFERENCE, None)
+            return self._store.delete_profile(name)
+        except sqlite3.Error:
+            return False
+
+    def apply_profile(self, name: str) -> dict:
+        self._wait_ready()
+        result = self._apply_profile(name)
+        if result["success"]:
+            try:
+                self._store.set_preference(ACTIVE_PROFILE_PREFERENCE, name)
+            except sqlite3.Error as e:
+                print(f"Store save error: {e}")
+            if self._prewarm_enabled():
+                self._prewarm.refresh_all()
+        return result
+
+    def get_run_mode(self) -> dict:
+        self._wait_ready()
+        run_mode = {
             "reuse_mode": self._reuse_mode,
             "clash_api": self._clash_api_base,
             "proxy_port": self._proxy_port,
         }
+        self._snapshot.update("run_mode", run_mode)
+        return run_mode
+
+    def get_snapshot(self) -> dict:
+        return self._snapshot.get()
 
     def _ensure_default_configs(self):
         multidesk_path = self._user_config_dir / "MultiDesk.multidesk"
@@ -108,48 +453,106 @@ class Api:
             self._config_gen.generate_clash_config([])
 
     def _load_saved_config(self):
-        if self._config_file.exists():
-            try:
-                data = json.loads(self._config_file.read_text(encoding="utf-8"))
-                self._subscription_url = data.get("subscription_url", "")
-                self._servers = data.get("servers", [])
-                self._proxy_groups = data.get("proxy_groups", [])
-            except Exception:
-                pass
+        try:
+            self._store.migrate_from_json(self._config_file)
+        except (sqlite3.Error, TypeError, ValueError, OSError) as e:
+            print(f"Config migration error: {e}")
+        try:
+            state = AppState(
+                subscription_url=self._store.get_subscription_url(),
+                servers=RecordIndex(self._store.load_servers()),
+                proxy_groups=RecordIndex(self._store.load_groups()),
+            )
+            self._state.update(lambda _: state)
+        except sqlite3.Error as e:
+            print(f"Store load error: {e}")
 
-    def _save_config(self):
+    def _save_config(self, state: AppState):
         try:
-            data = {
-                "subscription_url": self._subscription_url,
-                "servers": self._servers,
-                "proxy_groups": self._proxy_groups,
-            }
-            self._config_file.write_text(
-                json.dumps(data, ensure_ascii=False), encoding="utf-8"
+            self._store.save_subscription(
+                state.subscription_url, state.servers, state.proxy_groups
             )
-        except Exception:
-            pass
+        except sqlite3.Error as e:
+            print(f"Store save error: {e}")
 
-    def start_engine(self) -> bool:
+    def start_engine(self, multidesk: bool = True) -> bool:
+        self._wait_ready()
         self._detect_and_configure_clash()
-        return self._launcher.start()
+        started = self._launcher.start(multidesk)
+        self._controller.invalidate()
+        self._telemetry.start()
+        self._telemetry.reconnect()
+        return started
 
     def stop_engine(self) -> bool:
-        return self._launcher.stop()
+        self._prewarm.stop()
+        stopped = self._launcher.stop()
+        self._controller.invalidate()
+        return stopped
 
     def get_status(self) -> dict:
-        return self._launcher.get_status()
+        status = self._launcher.get_status()
+        self._snapshot.update("status", status)
+        return status
 
     def get_servers(self) -> list[dict]:
-        return self._servers
+        self._wait_ready()
+        servers = [s.to_dict() for s in self._state.current.servers]
+        self._snapshot.update_servers(servers)
+        return servers
+
+    # Rebuilt whenever a state with a new server list is published, so queries
+    # never pay for it; the text index is reused when only probe results differ.
+    def _index_servers(self, state: AppState):
+        index = self._server_index
+        if index.servers is not state.servers:
+            self._server_index = ServerIndex(state.servers, index)
+
+    def query_servers(
+        self,
+        query: str = "",
+        status=None,
+        region=None,
+        group=None,
+        latency=None,
+        sort: str = "default",
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        facets: bool = False,
+    ) -> dict:
+        self._wait_ready()
+        index = self._server_index
+        start = time.perf_counter()
+        try:
+            result = index.query(
+                query, status, region, group, latency, sort, cursor, limit
+            )
+        except (TypeError, ValueError) as e:
+            return {"items": [], "total": 0, "next_cursor": None, "error": str(e)}
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if facets:
+            result["facets"] = index.facets()
+        return result
 
     def get_subscription_url(self) -> str:
-        return self._subscription_url
+        self._wait_ready()
+        return self._state.current.subscription_url
+
+    def get_latency_history(self, server_id: str, limit: int = 100) -> list[dict]:
+        self._wait_ready()
+        server = self._state.current.servers.get(server_id)
+        if server is None:
+            return []
+        try:
+            return self._store.latency_history(server, limit)
+        except sqlite3.Error:
+            return []
 
     def save_config(self, config: dict) -> bool:
         return True
 
     def load_subscription(self, url: str) -> dict:
+        self._wait_ready()
         result = self._sub_loader.load(url)
 
         if not result.success:
@@ -160,77 +563,105 @@ class Api:
                 "proxy_groups": [],
             }
 
-        self._subscription_url = url
-        self._servers = self._transform_proxies_to_servers(result.proxies)
-        self._proxy_groups = result.proxy_groups
-        self._save_config()
+        proxies = [
+            ProxyRecord.from_dict(p, i)
+            for i, p in enumerate(result.proxies)
+            if isinstance(p, dict)
+        ]
+        raw_groups = result.proxy_groups
+        generated: set[str] = set()
+        region_settings = self._region_group_settings()
+        if region_settings is not None:
+            raw_groups = with_region_groups(
+                result.proxies, result.proxy_groups, region_settings
+            )
+            generated = _group_names(raw_groups) - _group_names(result.proxy_groups)
+        proxy_groups = RecordIndex(
+            GroupRecord.from_dict(g) for g in raw_groups if isinstance(g, dict)
+        )
+        servers = RecordIndex(
+            build_servers(
+                proxies,
+                proxy_groups,
+                load_overrides(self._user_config_dir),
+            )
+        )
+        state = self._state.update(
+            lambda current: AppState(url, servers, proxy_groups, current.version),
+            persist=self._save_config,
+        )
+        # Generated region groups reuse the subscription's nodes; listing them
+        # in MultiDesk as well would show every server twice.
+        self._config_gen.sync_multidesk_servers(
+            [
+                replace(s, groups=tuple(g for g in s.groups if g not in generated))
+                for s in state.servers
+            ]
+        )
+        self._prefetch_hosts()
 
         if result.raw_config:
-            self._config_gen.generate_clash_config_from_subscription(result.raw_config)
+            self._config_gen.generate_clash_config_from_subscription(
+                {**result.raw_config, "proxy-groups": raw_groups}
+            )
         else:
-            self._config_gen.generate_clash_config(result.proxies)
+            self._config_gen.generate_clash_config(result.proxies, raw_groups)
+        self._refresh_proxy_providers()
+        self._controller.invalidate()
 
         return {
             "success": True,
             "error": None,
-            "server_count": len(self._servers),
-            "proxy_groups": self._transform_proxy_groups(result.proxy_groups),
+            "server_count": len(state.servers),
+            "proxy_groups": self._transform_proxy_groups(state.proxy_groups),
         }
 
     def get_proxy_groups(self) -> list[dict]:
+        self._wait_ready()
         if self._reuse_mode:
-            return self._fetch_external_proxy_groups()
-        return self._transform_proxy_groups(self._proxy_groups)
+            groups = self._fetch_external_proxy_groups()
+        else:
+            groups = self._transform_proxy_groups(self._state.current.proxy_groups)
+        self._snapshot.update_groups(groups)
+        return groups
 
     def _fetch_external_proxy_groups(self) -> list[dict]:
-        try:
-            resp = requests.get(f"{self._clash_api_base}/proxies", timeout=5)
-            if resp.status_code == 200:
-                data = resp.json()
-                proxies = data.get("proxies", {})
-                groups = []
-                for name, info in proxies.items():
-                    if info.get("type") == "Selector":
-                        if any(kw in name.lower() for kw in RDP_GROUP_KEYWORDS):
-                            groups.append(
-                                {
-                                    "name": name,
-                                    "type": "select",
-                                    "proxies": info.get("all", []),
-                                    "now": info.get("now"),
-                                }
-                            )
-                return groups
-        except Exception:
-            pass
-        return []
-
-    def _get_active_proxy(self, group_name: str) -> str | None:
-        try:
-            resp = requests.get(
-                f"{self._clash_api_base}/proxies/{url_quote(group_name)}", timeout=2
-            )
-            if resp.status_code == 200:
-                return resp.json().get("now")
-        except Exception:
-            pass
-        return None
-
-    def _transform_proxy_groups(self, groups: list) -> list[dict]:
-        transformed = []
-        for group in groups:
-            if isinstance(group, dict):
-                name = group.get("name", "")
+        data = self._controller.get_json("/proxies", timeout=5)
+        if data is None:
+            return []
+        groups = []
+        for name, info in data.get("proxies", {}).items():
+            if info.get("type") == "Selector":
                 if any(kw in name.lower() for kw in RDP_GROUP_KEYWORDS):
-                    now = self._get_active_proxy(name)
-                    transformed.append(
+                    groups.append(
                         {
                             "name": name,
-                            "type": group.get("type", "select"),
-                            "proxies": group.get("proxies", []),
-                            "now": now,
+                            "type": "select",
+                            "proxies": info.get("all", []),
+                            "now": info.get("now"),
                         }
                     )
+        return groups
+
+    def _get_active_proxy(self, group_name: str) -> str | None:
+        data = self._controller.get_json(f"/proxies/{url_quote(group_name)}", timeout=2)
+        if data is None:
+            return None
+        return data.get("now")
+
+    def _transform_proxy_groups(self, groups: RecordIndex[GroupRecord]) -> list[dict]:
+        transformed = []
+        for group in groups:
+            if any(kw in group.name.lower() for kw in RDP_GROUP_KEYWORDS):
+                now = self._get_active_proxy(group.name)
+                transformed.append(
+                    {
+                        "name": group.name,
+                        "type": group.type,
+                        "proxies": list(group.proxies),
+                        "now": now,
+                    }
+                )
         return transformed
 
     def check_for_update(self) -> dict:
@@ -257,77 +688,76 @@ class Api:
                 return ""
         return ""
 
-    def test_servers_connectivity(self) -> list[dict]:
-        def test_single(server: dict) -> dict:
-            host = server.get("host", "")
-            port = server.get("port", 3389)
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(3)
-                start = __import__("time").time()
-                sock.connect((host, port))
-                latency = int((__import__("time").time() - start) * 1000)
-                sock.close()
-                return {"id": server["id"], "status": "online", "latency": latency}
-            except Exception:
-                return {"id": server["id"], "status": "offline", "latency": None}
+    def test_servers_connectivity(self, mode: str = PROBE_MODE_TCP) -> list[dict]:
+        self._wait_ready()
+        self._probe_servers(mode)
+        return self.get_servers()
+
+    def _probe_servers(
+        self, mode: str, on_result: Optional[Callable[[dict], None]] = None
+    ) -> list[dict]:
+        proxy_port = self._proxy_port
+
+        def test_single(server: RdpServer):
+            if mode == PROBE_MODE_RDP:
+                probe = probe_rdp_via_socks(
+                    server.host, server.port, "127.0.0.1", proxy_port
+                )
+            else:
+                probe = probe_tcp(server.host, server.port)
+            result = {"id": server.id, **probe.to_dict()}
+            results.append(result)
+            by_key[_probe_key(server)] = result
+            if on_result is not None:
+                on_result(result)
 
         results = []
+        by_key = {}
         threads = []
+        probed = self._state.current.servers
 
-        for server in self._servers:
-            t = threading.Thread(target=lambda s=server: results.append(test_single(s)))
+        for server in probed:
+            t = threading.Thread(target=test_single, args=(server,))
             threads.append(t)
             t.start()
 
         for t in threads:
             t.join(timeout=5)
 
-        for result in results:
-            for server in self._servers:
-                if server["id"] == result["id"]:
-                    server["status"] = result["status"]
-                    server["latency"] = result["latency"]
-                    break
-
-        return self._servers
-
-    def _transform_proxies_to_servers(self, proxies: list) -> list[dict]:
-        servers = []
-        for i, proxy in enumerate(proxies):
-            servers.append(
-                {
-                    "id": str(i + 1),
-                    "name": proxy.get("name", f"Server-{i + 1}"),
-                    "host": proxy.get("server", ""),
-                    "port": 3389,
-                    "status": "unknown",
-                }
-            )
-        return servers
+        applied = dict(by_key)
+        self._state.update(
+            lambda current: replace(
+                current,
+                servers=RecordIndex(
+                    _apply_probe(server, applied) for server in current.servers
+                ),
+            ),
+            persist=lambda state: self._save_probe_results(state, applied),
+        )
+        return results
+
+    def _save_probe_results(self, state: AppState, results: dict):
+        probed = {s.id for s in state.servers if _probe_key(s) in results}
+        try:
+            self._store.record_probe_results(state.servers, probed)
+        except sqlite3.Error as e:
+            print(f"Store save error: {e}")
 
     def test_group_delays(self, group_name: str) -> dict:
+        self._wait_ready()
         result = {}
         proxies = []
 
         if self._reuse_mode:
-            try:
-                resp = requests.get(
-                    f"{self._clash_api_base}/proxies/{url_quote(group_name)}", timeout=5
-                )
-                if resp.status_code == 200:
-                    data = resp.json()
-                    proxies = data.get("all", [])
-            except Exception:
-                pass
+            data = self._controller.get_json(
+                f"/proxies/{url_quote(group_name)}", timeout=5
+            )
+            if data is not None:
+                proxies = list(data.get("all", []))
         else:
-            group = None
-            for g in self._proxy_groups:
-                if isinstance(g, dict) and g.get("name") == group_name:
-                    group = g
-                    break
+            group = self._state.current.proxy_groups.by_name(group_name)
             if group:
-                proxies = group.get("proxies", [])
+                proxies = list(group.proxies)
 
         if not proxies:
             return result
@@ -337,7 +767,7 @@ class Api:
         def test_single(proxy_name: str):
             try:
                 url = f"{api_base}/proxies/{url_quote(proxy_name)}/delay"
-                resp = requests.get(
+                resp = http_get(
                     url,
                     params={
                         "url": "http://www.gstatic.com/generate_204",
@@ -365,25 +795,82 @@ class Api:
 
         return result
 
-    def get_connections(self) -> dict:
+    def _fetch_connections(self) -> Optional[dict]:
         try:
-            resp = requests.get(f"{self._clash_api_base}/connections", timeout=5)
+            resp = http_get(f"{self._clash_api_base}/connections", timeout=5)
             if resp.status_code == 200:
                 return resp.json()
         except Exception:
             pass
-        return {"connections": [], "downloadTotal": 0, "uploadTotal": 0}
+        return None
+
+    def get_connections(self) -> dict:
+        self._wait_ready()
+        payload = self._fetch_connections()
+        if payload is None:
+            return {"connections": [], "downloadTotal": 0, "uploadTotal": 0}
+        return payload
+
+    def get_telemetry(
+        self, resolution: str = "1s", since: Optional[float] = None
+    ) -> dict:
+        self._wait_ready()
+        return self._telemetry.get(resolution, since)
+
+    def get_connection_stats(self, top_n: int = DEFAULT_TOP_N) -> dict:
+        self._wait_ready()
+        self._traffic.ensure_running()
+        stats = self._traffic.stats(top_n)
+        if not stats["sampled"]:
+            payload = self._fetch_connections()
+            if payload is not None:
+                self._traffic.ingest(payload, time.monotonic())
+                stats = self._traffic.stats(top_n)
+        return stats
 
     def switch_proxy(self, group_name: str, proxy_name: str) -> bool:
+        self._wait_ready()
         try:
-            resp = requests.put(
+            resp = http_put(
                 f"{self._clash_api_base}/proxies/{url_quote(group_name)}",
                 json={"name": proxy_name},
                 timeout=5,
             )
-            return resp.status_code == 204
+            switched = resp.status_code == 204
         except Exception:
             return False
+        finally:
+            self._controller.invalidate("/proxies", f"/proxies/{url_quote(group_name)}")
+        if switched:
+            self._forget_active_profile()
+        if switched and self._prewarm_enabled():
+            self._prewarm.refresh(group_name)
+        return switched
+
+    # A manual switch means the engine no longer matches the active profile,
+    # so it must not be re-applied over the user's choice on the next start.
+    def _forget_active_profile(self):
+        try:
+            if self._active_profile():
+                self._store.set_preference(ACTIVE_PROFILE_PREFERENCE, None)
+        except sqlite3.Error:
+            pass
+
+    def get_cache_stats(self) -> dict:
+        return self._controller.stats()
+
+    def get_diagnostics(self) -> dict:
+        return {
+            **metrics.snapshot(),
+            "rules": self._config_gen.get_rule_stats(),
+            "dns": resolver.stats(),
+        }
+
+    def set_diagnostics_enabled(self, enabled: bool) -> bool:
+        metrics.enabled = bool(enabled)
+        if not enabled:
+            metrics.reset()
+        return metrics.enabled
 
     def get_system_language(self) -> str:
         try:
@@ -0,0 +1,134 @@
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.records import GroupRecord, ProxyRecord, RecordIndex  # noqa: E402
+from core.servers import build_servers  # noqa: E402
+
+PROXY_COUNT = 10_000
+GROUP_COUNT = 20
+LOOKUPS = 2_000
+PROTOCOLS = ["ss", "vmess", "trojan", "vless"]
+
+
+# "".join() copies strings the way a YAML/JSON parser would, so nothing
+# starts out interned.
+def make_subscription(count: int) -> tuple[list[dict], list[dict]]:
+    proxies = [
+        {
+            "name": f"node-{i:05d}",
+            "type": "".join(PROTOCOLS[i % len(PROTOCOLS)]),
+            "server": f"edge{i}.example.net",
+            "port": 443,
+        }
+        for i in range(count)
+    ]
+    groups = [
+        {
+            "name": f"server-region-{g}",
+            "type": "".join("select"),
+            "proxies": [p["name"] for p in proxies[g::GROUP_COUNT]],
+        }
+        for g in range(GROUP_COUNT)
+    ]
+    return proxies, groups
+
+
+def build_dicts(proxies: list[dict], groups: list[dict]) -> tuple[list, list]:
+    membership: dict[str, list] = {}
+    for g in groups:
+        for member in g["proxies"]:
+            membership.setdefault(member, []).append("".join(g["name"]))
+    servers = [
+        {
+            "id": str(i + 1),
+            "name": p["name"],
+            "host": p["server"],
+            "port": 3389,
+            "proxy": p["name"],
+            "groups": membership.get(p["name"], []),
+            "source": "".join("proxy"),
+            "status": "".join("unknown"),
+            "latency": None,
+            "socks_ms": None,
+            "tcp_ms": None,
+            "rdp_ms": None,
+        }
+        for i, p in enumerate(proxies)
+    ]
+    return servers, [dict(g, proxies=list(g["proxies"])) for g in groups]
+
+
+def build_records(proxies: list[dict], groups: list[dict]) -> tuple:
+    group_index = RecordIndex(GroupRecord.from_dict(g) for g in groups)
+    records = [ProxyRecord.from_dict(p, i) for i, p in enumerate(proxies)]
+    return RecordIndex(build_servers(records, group_index)), group_index
+
+
+def measure_memory(build, *args) -> tuple[int, object]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    value = build(*args)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, value
+
+
+def lookup_dicts(servers: list, groups: list, ids: list, names: list):
+    for server_id in ids:
+        for server in servers:
+            if server["id"] == server_id:
+                break
+    for name in names:
+        for group in groups:
+            if group.get("name") == name:
+                break
+
+
+def lookup_records(servers: RecordIndex, groups: RecordIndex, ids: list, names: list):
+    for server_id in ids:
+        servers.get(server_id)
+    for name in names:
+        groups.by_name(name)
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(count: int = PROXY_COUNT) -> dict:
+    proxies, groups = make_subscription(count)
+    dict_bytes, (dict_servers, dict_groups) = measure_memory(
+        build_dicts, proxies, groups
+    )
+    record_bytes, (rec_servers, rec_groups) = measure_memory(
+        build_records, proxies, groups
+    )
+
+    step = max(1, count // LOOKUPS)
+    ids = [str(i + 1) for i in range(0, count, step)]
+    names = [g["name"] for g in groups] * (LOOKUPS // GROUP_COUNT)
+
+    return {
+        "proxies": count,
+        "dict_bytes": dict_bytes,
+        "record_bytes": record_bytes,
+        "memory_saved_pct": round(100 * (1 - record_bytes / dict_bytes), 1),
+        "dict_lookup_ms": round(
+            timed(lookup_dicts, dict_servers, dict_groups, ids, names), 2
+        ),
+        "record_lookup_ms": round(
+            timed(lookup_records, rec_servers, rec_groups, ids, names), 2
+        ),
+    }
+
+
+if __name__ == "__main__":
+    for key, value in run().items():
+        print(f"{key:>18}: {value}")
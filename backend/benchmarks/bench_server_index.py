@@ -0,0 +1,86 @@
+import random
+import statistics
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.records import RecordIndex  # noqa: E402
+from core.server_index import ServerIndex  # noqa: E402
+from core.servers import RdpServer  # noqa: E402
+
+SERVER_COUNT = 10_000
+REPEAT = 200
+REGIONS = ("HK", "JP", "SG", "US", "DE", "UK")
+STATUSES = ("online", "offline", "unknown")
+
+QUERIES = {
+    "all": {},
+    "substring": {"query": "edge12"},
+    "prefix": {"query": "jp"},
+    "filtered": {"status": "online", "region": "JP", "latency": ["0-50", "50-100"]},
+    "latency_sort": {"sort": "latency"},
+    "search_latency_sort": {"query": "sg", "sort": "latency", "status": "online"},
+    "group": {"group": "server-3", "sort": "name"},
+}
+
+
+def make_servers(count: int, seed: int = 0) -> RecordIndex:
+    rng = random.Random(seed)
+    servers = []
+    for i in range(count):
+        region = REGIONS[i % len(REGIONS)]
+        status = rng.choice(STATUSES)
+        servers.append(
+            RdpServer(
+                id=str(i + 1),
+                name=f"{region} {i:05d}",
+                host=f"edge{i}.{region.lower()}.example.net",
+                groups=(f"server-{i % 20}",),
+                status=status,
+                latency=rng.randint(5, 800) if status == "online" else None,
+            )
+        )
+    return RecordIndex(servers)
+
+
+def timed_median(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 4)
+
+
+def run(count: int = SERVER_COUNT, repeat: int = REPEAT) -> dict:
+    servers = make_servers(count)
+    start = time.perf_counter()
+    index = ServerIndex(servers)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    probed = RecordIndex(replace(s, latency=(s.latency or 0) + 1) for s in servers)
+    start = time.perf_counter()
+    ServerIndex(probed, index)
+    rebuild_ms = (time.perf_counter() - start) * 1000
+
+    results = {
+        "servers": count,
+        "build_ms": round(build_ms, 2),
+        "probe_rebuild_ms": round(rebuild_ms, 2),
+    }
+    for name, params in QUERIES.items():
+        index.query(**params)
+        results[f"{name}_ms"] = timed_median(lambda: index.query(**params), repeat)
+    first = index.query(sort="latency")
+    results["next_page_ms"] = timed_median(
+        lambda: index.query(sort="latency", cursor=first["next_cursor"]), repeat
+    )
+    return results
+
+
+if __name__ == "__main__":
+    for key, value in run().items():
+        print(f"{key:>24}: {value}")
@@ -0,0 +1,255 @@
+import json
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+
+@dataclass
+class ControllerOptions:
+    group_count: int = 4
+    group_size: int = 50
+    connection_count: int = 20
+    latency_ms: float = 0
+    delay_ms: int = 80
+    socks_port: int = 7897
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+# Serves the subset of the Clash/Mihomo controller API that Api talks to.
+class FakeController:
+    def __init__(self, options: Optional[ControllerOptions] = None):
+        self.options = options or ControllerOptions()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._proxies = self._build_proxies()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def group_names(self) -> list[str]:
+        return [f"server-{g}" for g in range(self.options.group_count)]
+
+    def proxy_groups(self) -> list[dict]:
+        return [
+            {"name": name, "type": "select", "proxies": self._proxies[name]["all"]}
+            for name in self.group_names()
+        ]
+
+    def _build_proxies(self) -> dict:
+        proxies: dict[str, dict] = {}
+        for g in range(self.options.group_count):
+            members = [f"node-{g}-{i}" for i in range(self.options.group_size)]
+            for member in members:
+                proxies[member] = {"name": member, "type": "Vmess", "history": []}
+            proxies[f"server-{g}"] = {
+                "name": f"server-{g}",
+                "type": "Selector",
+                "all": members,
+                "now": members[0],
+            }
+        return proxies
+
+    def _connections(self) -> dict:
+        tick = int(time.monotonic() * 1000)
+        connections = [
+            {
+                "id": f"conn-{i}",
+                "metadata": {
+                    "network": "tcp",
+                    "type": "SOCKS5",
+                    "sourceIP": "127.0.0.1",
+                    "sourcePort": str(50000 + i),
+                    "destinationIP": f"10.0.{i // 250}.{i % 250}",
+                    "destinationPort": "3389",
+                    "host": f"rdp{i}.example.net",
+                },
+                "upload": tick * (i + 1),
+                "download": tick * (i + 1) * 4,
+                "start": "2024-01-01T00:00:00Z",
+                "chains": [f"node-{i % self.options.group_count}-0", "server-0"],
+                "rule": "DOMAIN-SUFFIX",
+                "rulePayload": "example.net",
+            }
+            for i in range(self.options.connection_count)
+        ]
+        return {
+            "connections": connections,
+            "uploadTotal": sum(c["upload"] for c in connections),
+            "downloadTotal": sum(c["download"] for c in connections),
+        }
+
+    def _handler(self):
+        controller = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, body=None):
+                payload = b"" if body is None else json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _route(self, method: str):
+                with controller._lock:
+                    controller.requests += 1
+                if controller.options.latency_ms:
+                    time.sleep(controller.options.latency_ms / 1000)
+                path = urlsplit(self.path).path
+                parts = [unquote(p) for p in path.strip("/").split("/")]
+                proxies = controller._proxies
+
+                if path == "/version":
+                    return self._reply(200, {"version": "fake", "meta": True})
+                if path == "/configs":
+                    if method == "GET":
+                        return self._reply(
+                            200, {"mixed-port": controller.options.socks_port}
+                        )
+                    return self._reply(204)
+                if path == "/configs/geo":
+                    return self._reply(204)
+                if path == "/connections":
+                    return self._reply(200, controller._connections())
+                if path == "/proxies":
+                    return self._reply(200, {"proxies": proxies})
+                if parts[0] == "proxies" and len(parts) >= 2:
+                    proxy = proxies.get(parts[1])
+                    if proxy is None:
+                        return self._reply(404, {"message": "not found"})
+                    if len(parts) == 3 and parts[2] == "delay":
+                        time.sleep(controller.options.delay_ms / 1000)
+                        return self._reply(200, {"delay": controller.options.delay_ms})
+                    if method == "PUT":
+                        length = int(self.headers.get("Content-Length") or 0)
+                        name = json.loads(self.rfile.read(length) or b"{}").get("name")
+                        if name not in proxy.get("all", []):
+                            return self._reply(400, {"message": "bad proxy"})
+                        proxy["now"] = name
+                        return self._reply(204)
+                    return self._reply(200, proxy)
+                if parts[0] == "providers":
+                    return self._reply(204 if method == "PUT" else 200, None)
+                return self._reply(404, {"message": "not found"})
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_PUT(self):
+                self._route("PUT")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def do_PATCH(self):
+                self._route("PATCH")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeController":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeController":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+X224_CONNECTION_CONFIRM = bytes.fromhex(
+    "03 00 00 13 0e d0 00 00 12 34 00 02 00 08 00 01 00 00 00"
+)
+
+
+class _Listener:
+    def __init__(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(256)
+        self._running = True
+
+    @property
+    def port(self) -> int:
+        return self._sock.getsockname()[1]
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        raise NotImplementedError
+
+    def stop(self):
+        self._running = False
+        self._sock.close()
+
+
+# Answers an X.224 connection request with a confirm selecting TLS.
+class StandInRdpServer(_Listener):
+    def _serve(self, conn: socket.socket):
+        with conn:
+            try:
+                if conn.recv(64)[:1] == b"\x03":
+                    conn.sendall(X224_CONNECTION_CONFIRM)
+            except OSError:
+                pass
+
+
+# No-auth SOCKS5 CONNECT proxy that relays every request to one target.
+class StandInSocksProxy(_Listener):
+    def __init__(self, target: tuple[str, int]):
+        super().__init__()
+        self._target = target
+
+    def _serve(self, conn: socket.socket):
+        with conn:
+            try:
+                conn.recv(3)
+                conn.sendall(b"\x05\x00")
+                head = conn.recv(4)
+                if head[3] == 0x03:
+                    conn.recv(conn.recv(1)[0] + 2)
+                else:
+                    conn.recv((4 if head[3] == 0x01 else 16) + 2)
+                upstream = socket.create_connection(self._target, timeout=3)
+            except OSError:
+                return
+            with upstream:
+                conn.sendall(b"\x05\x00\x00\x01" + b"\x00" * 4 + struct.pack("!H", 0))
+                try:
+                    upstream.sendall(conn.recv(64))
+                    conn.sendall(upstream.recv(64))
+                except OSError:
+                    pass
@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+REGRESSION_THRESHOLD = 0.2
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Api and ConfigGenerator write into the user config dir; keep that out of
+# the real profile before anything under core/ is imported.
+_home = tempfile.mkdtemp(prefix="nextdesk-bench-")
+os.environ["HOME"] = _home
+os.environ["APPDATA"] = _home
+
+from benchmarks import bench_records  # noqa: E402
+from benchmarks import bench_server_index  # noqa: E402
+from benchmarks.fake_controller import (  # noqa: E402
+    ControllerOptions,
+    FakeController,
+    StandInRdpServer,
+    StandInSocksProxy,
+)
+from benchmarks.synth import FORMATS, SIZES, make_clash_config  # noqa: E402
+from benchmarks.synth import make_subscription  # noqa: E402
+
+
+def measure(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "runs": repeat,
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def bench_parse(sizes, repeat: int) -> dict:
+    from core.sub_loader import SubscriptionLoader
+
+    loader = SubscriptionLoader()
+    results = {}
+    for fmt in FORMATS:
+        for size in sizes:
+            content = make_subscription(fmt, size)
+            results[f"parse.{fmt}.{size}"] = measure(
+                lambda: loader._parse(content), repeat
+            )
+    return results
+
+
+def bench_config_gen(sizes, repeat: int) -> dict:
+    from core.config_gen import ConfigGenerator
+
+    generator = ConfigGenerator()
+    results = {}
+    for size in sizes:
+        config = make_clash_config(size)
+        results[f"config_gen.subscription.{size}"] = measure(
+            lambda: generator.generate_clash_config_from_subscription(config), repeat
+        )
+        results[f"config_gen.proxies.{size}"] = measure(
+            lambda: generator.generate_clash_config(config["proxies"]), repeat
+        )
+    return results
+
+
+def make_api(controller: FakeController):
+    from dataclasses import replace
+
+    from api import Api
+    from core.records import GroupRecord, RecordIndex
+    from core.store import DB_FILE, StateStore
+
+    # The real initialization looks for a running engine, downloads geodata
+    # and resolves server hosts; the benchmarks only need the store.
+    api = Api()
+    api._store = StateStore(api._user_config_dir / DB_FILE)
+    api._ready.set()
+    api.initialize = lambda: None
+    api._clash_api_base = controller.url
+    api._reuse_mode = False
+    proxy_groups = RecordIndex(
+        GroupRecord.from_dict(g) for g in controller.proxy_groups()
+    )
+    api._state.update(lambda state: replace(state, proxy_groups=proxy_groups))
+    return api
+
+
+def bench_controller(options: ControllerOptions, repeat: int) -> dict:
+    from dataclasses import replace
+
+    from core.records import RecordIndex
+    from core.servers import RdpServer
+
+    results = {}
+    with FakeController(options) as controller:
+        api = make_api(controller)
+        group = controller.group_names()[0]
+        label = f"{options.group_count}x{options.group_size}"
+
+        results[f"get_proxy_groups.local.{label}"] = measure(
+            api.get_proxy_groups, repeat
+        )
+        api._reuse_mode = True
+        results[f"get_proxy_groups.reuse.{label}"] = measure(
+            api.get_proxy_groups, repeat
+        )
+        results[f"test_group_delays.reuse.{options.group_size}"] = measure(
+            lambda: api.test_group_delays(group), repeat
+        )
+        api._reuse_mode = False
+        results[f"test_group_delays.local.{options.group_size}"] = measure(
+            lambda: api.test_group_delays(group), repeat
+        )
+        results[f"connections.ingest.{options.connection_count}"] = measure(
+            lambda: api._traffic.ingest(api._fetch_connections(), time.monotonic()),
+            repeat,
+        )
+
+        rdp = StandInRdpServer().start()
+        socks = StandInSocksProxy(("127.0.0.1", rdp.port)).start()
+        try:
+            servers = RecordIndex(
+                RdpServer(
+                    id=str(i + 1),
+                    name=f"rdp-{i}",
+                    host="127.0.0.1",
+                    port=rdp.port,
+                )
+                for i in range(options.group_size)
+            )
+            api._state.update(lambda state: replace(state, servers=servers))
+            api._proxy_port = socks.port
+            for mode in ("tcp", "rdp"):
+                results[f"test_servers_connectivity.{mode}.{options.group_size}"] = (
+                    measure(lambda: api.test_servers_connectivity(mode), repeat)
+                )
+        finally:
+            socks.stop()
+            rdp.stop()
+        results["controller.requests"] = controller.requests
+    return results
+
+
+def compare(current: dict, previous: dict) -> list[str]:
+    regressions = []
+    for name, value in current.items():
+        before = previous.get(name)
+        if not isinstance(value, dict) or not isinstance(before, dict):
+            continue
+        old, new = before.get("median_ms"), value.get("median_ms")
+        if old and new and new > old * (1 + REGRESSION_THRESHOLD):
+            regressions.append(f"{name}: {old:.2f} ms -> {new:.2f} ms")
+    return regressions
+
+
+def main() -> int:
+    from core.updater import CURRENT_VERSION
+
+    parser = argparse.ArgumentParser(description="NextDesk offline benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--group-size", type=int, default=50)
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--delay-ms", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    # Timings only compare on the same machine, so results are not committed
+    # and a run is only checked against a result file named here.
+    parser.add_argument("--baseline", "--compare", dest="baseline", type=Path)
+    args = parser.parse_args()
+
+    options = ControllerOptions(
+        group_count=args.groups,
+        group_size=args.group_size,
+        connection_count=args.connections,
+        latency_ms=args.latency_ms,
+        delay_ms=args.delay_ms,
+    )
+    results = {}
+    results.update(bench_parse(args.sizes, args.repeat))
+    results.update(bench_config_gen(args.sizes, args.repeat))
+    results.update(bench_controller(options, args.repeat))
+    results["records"] = bench_records.run(max(args.sizes))
+    results["server_index"] = bench_server_index.run()
+
+    timestamp = int(time.time())
+    report = {
+        "version": CURRENT_VERSION,
+        "timestamp": timestamp,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": vars(args) | {"output": None, "baseline": None},
+        "results": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"{CURRENT_VERSION}-{timestamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    previous = None
+    if args.baseline:
+        previous = json.loads(args.baseline.read_text(encoding="utf-8"))
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        if isinstance(value, dict) and "median_ms" in value:
+            print(f"{name:<{width}}  {value['median_ms']:>10.3f} ms")
+    print(f"Results written to {output}")
+
+    if previous:
+        regressions = compare(results, previous.get("results", {}))
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import base64
+import json
+import random
+from urllib.parse import quote
+
+import yaml
+
+FORMATS = ("yaml", "json", "uri", "base64")
+SIZES = (50, 500, 5000)
+PROTOCOLS = ("ss", "vmess", "trojan", "vless")
+REGIONS = ("hk", "jp", "sg", "us", "de", "uk")
+
+
+def make_proxies(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    proxies = []
+    for i in range(count):
+        protocol = PROTOCOLS[i % len(PROTOCOLS)]
+        region = REGIONS[i % len(REGIONS)]
+        proxy = {
+            "name": f"{region.upper()} {protocol} {i:05d}",
+            "type": protocol,
+            "server": f"{region}{i}.edge.example.net",
+            "port": rng.choice((443, 8443, 2053)),
+        }
+        if protocol == "ss":
+            proxy.update(cipher="aes-128-gcm", password=f"pw{i}")
+        elif protocol == "vmess":
+            proxy.update(uuid=f"00000000-0000-0000-0000-{i:012d}", alterId=0)
+            proxy.update(cipher="auto", network="tcp", tls=True)
+        elif protocol == "trojan":
+            proxy.update(password=f"pw{i}", sni=proxy["server"])
+        else:
+            proxy.update(uuid=f"00000000-0000-0000-0000-{i:012d}", network="tcp")
+            proxy.update(tls=True)
+        if i % 3 == 0:
+            proxy["rdp"] = {"host": f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"}
+        proxies.append(proxy)
+    return proxies
+
+
+def make_clash_config(count: int, seed: int = 0) -> dict:
+    proxies = make_proxies(count, seed)
+    names = [p["name"] for p in proxies]
+    groups = [
+        {
+            "name": f"server-{region}",
+            "type": "select",
+            "proxies": [n for n in names if n.lower().startswith(region)],
+        }
+        for region in REGIONS
+    ]
+    groups.append({"name": "auto-all", "type": "url-test", "proxies": names})
+    groups.append({"name": "Streaming", "type": "select", "proxies": names[:20]})
+    rules = []
+    for i in range(count):
+        target = groups[i % len(REGIONS)]["name"]
+        rules.append(f"DOMAIN-SUFFIX,host{i}.corp.example,{target}")
+        rules.append(f"IP-CIDR,10.{i // 256 % 256}.{i % 256}.0/24,{target},no-resolve")
+        rules.append(f"DOMAIN-KEYWORD,stream{i},Streaming")
+    rules.append("MATCH,DIRECT")
+    return {
+        "mixed-port": 7890,
+        "mode": "rule",
+        "proxies": proxies,
+        "proxy-groups": groups,
+        "rules": rules,
+    }
+
+
+def _to_uri(proxy: dict) -> str:
+    name = quote(proxy["name"])
+    host = f"{proxy['server']}:{proxy['port']}"
+    if proxy["type"] == "ss":
+        userinfo = base64.b64encode(
+            f"{proxy['cipher']}:{proxy['password']}".encode()
+        ).decode()
+        return f"ss://{userinfo}@{host}#{name}"
+    if proxy["type"] == "vmess":
+        body = {
+            "ps": proxy["name"],
+            "add": proxy["server"],
+            "port": proxy["port"],
+            "id": proxy["uuid"],
+            "aid": 0,
+            "net": "tcp",
+            "tls": "tls",
+        }
+        return "vmess://" + base64.b64encode(json.dumps(body).encode()).decode()
+    if proxy["type"] == "trojan":
+        return f"trojan://{proxy['password']}@{host}?sni={proxy['sni']}#{name}"
+    return f"vless://{proxy['uuid']}@{host}?type=tcp&security=tls#{name}"
+
+
+def make_subscription(fmt: str, count: int, seed: int = 0) -> str:
+    if fmt == "yaml":
+        return yaml.safe_dump(make_clash_config(count, seed), allow_unicode=True)
+    if fmt == "json":
+        return json.dumps(make_clash_config(count, seed), ensure_ascii=False)
+    uris = "\n".join(_to_uri(p) for p in make_proxies(count, seed))
+    if fmt == "base64":
+        return base64.b64encode(uris.encode("utf-8")).decode("ascii")
+    return uris
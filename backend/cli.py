@@ -0,0 +1,132 @@
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+from typing import Optional
+from urllib.parse import urlencode
+
+from core.config_gen import get_user_config_dir
+
+DAEMON_FILE = "daemon.json"
+
+
+def _connection() -> tuple[str, str]:
+    try:
+        info = json.loads((get_user_config_dir() / DAEMON_FILE).read_text())
+    except (OSError, ValueError):
+        sys.exit("NextDesk daemon is not running (start it with --headless)")
+    return f"http://127.0.0.1:{info['port']}", info["token"]
+
+
+def _request(path: str, body: Optional[dict] = None, query: Optional[dict] = None):
+    base, token = _connection()
+    url = f"{base}{path}" + (f"?{urlencode(query)}" if query else "")
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method="POST" if data else "GET")
+    req.add_header("Authorization", f"Bearer {token}")
+    if data:
+        req.add_header("Content-Type", "application/json")
+    try:
+        return urllib.request.urlopen(req, timeout=None)
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", e.reason)
+        except ValueError:
+            message = e.reason
+        sys.exit(f"error: {message}")
+    except urllib.error.URLError as e:
+        sys.exit(f"error: cannot reach daemon ({e.reason})")
+
+
+def call(method: str, **kwargs):
+    with _request(f"/api/{method}", body=kwargs) as resp:
+        return json.loads(resp.read())["result"]
+
+
+def stream(path: str, body: Optional[dict] = None, **query):
+    with _request(path, body=body, query=query) as resp:
+        for line in resp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _print(value):
+    print(json.dumps(value, ensure_ascii=False, indent=2))
+
+
+def _print_servers(servers: list[dict]):
+    for s in servers:
+        latency = f"{s['latency']}ms" if s.get("latency") is not None else "-"
+        print(f"{s['status']:<8} {latency:>7}  {s['name']}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="nextdesk")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    sub.add_parser("servers")
+    sub.add_parser("groups")
+    load = sub.add_parser("load")
+    load.add_argument("url")
+    sub.add_parser("start")
+    sub.add_parser("stop")
+    switch = sub.add_parser("switch")
+    switch.add_argument("group")
+    switch.add_argument("proxy")
+    probe = sub.add_parser("probe")
+    probe.add_argument("--mode", default="tcp", choices=("tcp", "rdp"))
+    watch = sub.add_parser("watch")
+    watch.add_argument("--interval", type=float, default=2.0)
+    raw = sub.add_parser("call")
+    raw.add_argument("method")
+    raw.add_argument("kwargs", nargs="?", default="{}", help="JSON object")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        _print({**call("get_status"), **call("get_run_mode")})
+    elif args.command == "servers":
+        _print_servers(call("get_servers"))
+    elif args.command == "groups":
+        for group in call("get_proxy_groups"):
+            print(f"{group['name']}: {group.get('now') or '-'}")
+    elif args.command == "load":
+        result = call("load_subscription", url=args.url)
+        if not result["success"]:
+            sys.exit(f"error: {result['error']}")
+        print(f"Loaded {result['server_count']} servers")
+    elif args.command == "start":
+        return 0 if call("start_engine") else 1
+    elif args.command == "stop":
+        call("stop_engine")
+    elif args.command == "switch":
+        switched = call("switch_proxy", group_name=args.group, proxy_name=args.proxy)
+        return 0 if switched else 1
+    elif args.command == "probe":
+        for event in stream("/stream/probe", body={}, mode=args.mode):
+            if event["event"] == "result":
+                latency = event.get("latency")
+                latency = f"{latency}ms" if latency is not None else "-"
+                print(
+                    f"[{event['done']}/{event['total']}] {event['status']:<8}"
+                    f" {latency:>7}  {event['name']}"
+                )
+            elif event["event"] == "end":
+                print(f"{event['online']}/{event['total']} online")
+    elif args.command == "watch":
+        try:
+            for event in stream("/stream/status", interval=args.interval):
+                status = event["status"]
+                print(
+                    f"clash={'up' if status['clash'] else 'down'}"
+                    f" multidesk={'up' if status['multidesk'] else 'down'}"
+                )
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "call":
+        _print(call(args.method, **json.loads(args.kwargs)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,6 @@
 import os
+import time
 from pathlib import Path
-import yaml
-
 
 SOCKS_PORT = 17897
 
@@ -29,6 +28,15 @@ class ConfigGenerator:
     def __init__(self):
         self._config_dir = get_user_config_dir()
         self._proxy_port = SOCKS_PORT
+        self._rule_stats: dict = {}
+        self._rule_provider_cache = None
+        self._provider_mode = False
+        self._proxy_provider_writer = None
+        self._write_report: dict = {
+            "config_changed": True,
+            "providers": {},
+            "providers_changed": [],
+        }
 
     def set_proxy_port(self, port: int):
         self._proxy_port = port
@@ -36,6 +44,45 @@ class ConfigGenerator:
     def get_proxy_port(self) -> int:
         return self._proxy_port
 
+    def set_provider_mode(self, enabled: bool):
+        self._provider_mode = enabled
+
+    def get_provider_mode(self) -> bool:
+        return self._provider_mode
+
+    def get_write_report(self) -> dict:
+        return dict(self._write_report)
+
+    # Returns the config keys that carry the proxies and the groups to use
+    # with them: inline as before, or as per-region file providers.
+    def _proxy_section(self, proxies: list, groups: list) -> tuple[dict, list]:
+        if not self._provider_mode:
+            self._write_report["providers"] = {}
+            self._write_report["providers_changed"] = []
+            return {"proxies": proxies}, groups
+        from core.proxy_providers import (
+            ProxyProviderWriter,
+            attach_providers,
+            inline_nodes,
+        )
+
+        if self._proxy_provider_writer is None:
+            self._proxy_provider_writer = ProxyProviderWriter(self._config_dir)
+        proxies = [p for p in proxies if isinstance(p, dict)]
+        pinned = inline_nodes(proxies, groups)
+        inline = [p for p in proxies if p.get("name") in pinned]
+        provider_set = self._proxy_provider_writer.write(
+            [p for p in proxies if p.get("name") not in pinned]
+        )
+        self._write_report["providers"] = {
+            name: len(members) for name, members in provider_set.members.items()
+        }
+        self._write_report["providers_changed"] = provider_set.changed
+        section: dict = {"proxies": inline}
+        if provider_set.providers:
+            section["proxy-providers"] = provider_set.providers
+        return section, attach_providers(groups, provider_set)
+
     def _filter_rdp_groups(self, proxy_groups: list) -> list:
         filtered = []
         for group in proxy_groups:
@@ -44,26 +91,70 @@ class ConfigGenerator:
                 filtered.append(group)
         return filtered
 
-    def _filter_rdp_rules(self, rules: list, filtered_groups: list) -> list:
+    def _filter_rdp_rules(
+        self, rules: list, filtered_groups: list, providers: frozenset = frozenset()
+    ) -> list:
+        from core.rules import compile_rules
+
         group_names = {g.get("name", "") for g in filtered_groups}
-        filtered = []
-        for rule in rules:
-            if rule.startswith("RULE-SET,"):
-                continue
-            parts = rule.split(",")
-            if len(parts) >= 2:
-                target = parts[-1].strip()
-                if target in group_names or target in ["DIRECT", "REJECT"]:
-                    filtered.append(rule)
-        if not any("MATCH" in r for r in filtered):
-            filtered.append("MATCH,DIRECT")
+        filtered, self._rule_stats = compile_rules(rules, group_names, providers)
         return filtered
 
+    def _sync_rule_providers(self, providers: dict, rules: list) -> tuple[dict, dict]:
+        from core.rule_providers import RuleProviderCache
+        from core.rules import rule_set_names
+
+        names = rule_set_names(rules)
+        if not names:
+            return {}, {}
+        if self._rule_provider_cache is None:
+            self._rule_provider_cache = RuleProviderCache(self._config_dir)
+        return self._rule_provider_cache.sync(providers, names)
+
+    def get_rule_stats(self) -> dict:
+        return dict(self._rule_stats)
+
+    # Leaves the file alone when the content is unchanged so callers can tell
+    # whether the engine needs a full config reload.
+    def _dump_yaml(self, config: dict, config_path: Path):
+        import yaml
+
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        data = yaml.dump(config, Dumper=dumper, allow_unicode=True).encode("utf-8")
+        try:
+            if config_path.read_bytes() == data:
+                self._write_report["config_changed"] = False
+                return
+        except OSError:
+            pass
+        tmp_path = config_path.with_suffix(config_path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, config_path)
+        self._write_report["config_changed"] = True
+
     def generate_clash_config_from_subscription(self, raw_config: dict) -> Path:
         proxy_groups = raw_config.get("proxy-groups", [])
         filtered_groups = self._filter_rdp_groups(proxy_groups)
+        rules = raw_config.get("rules", [])
+        providers = raw_config.get("rule-providers") or {}
+        if not isinstance(providers, dict):
+            providers = {}
         filtered_rules = self._filter_rdp_rules(
-            raw_config.get("rules", []), filtered_groups
+            rules, filtered_groups, frozenset(providers)
+        )
+        start = time.perf_counter()
+        rule_providers, provider_report = self._sync_rule_providers(
+            providers, filtered_rules
+        )
+        providers_ms = round((time.perf_counter() - start) * 1000, 2)
+        if provider_report and len(rule_providers) < len(provider_report):
+            filtered_rules = self._filter_rdp_rules(
+                rules, filtered_groups, frozenset(rule_providers)
+            )
+        self._rule_stats["providers"] = provider_report
+        self._rule_stats["providers_ms"] = providers_ms
+        proxy_section, filtered_groups = self._proxy_section(
+            raw_config.get("proxies", []), filtered_groups
         )
 
         config = {
@@ -74,21 +165,39 @@ class ConfigGenerator:
             "mode": raw_config.get("mode", "rule"),
             "geodata-mode": False,
             "geo-auto-update": False,
-            "proxies": raw_config.get("proxies", []),
+            **proxy_section,
             "proxy-groups": filtered_groups,
             "rules": filtered_rules,
         }
 
+        if rule_providers:
+            config["rule-providers"] = rule_providers
+
         if raw_config.get("dns"):
             config["dns"] = raw_config["dns"]
 
         config_path = self._config_dir / "runtime_clash.yaml"
-        with open(config_path, "w", encoding="utf-8") as f:
-            yaml.dump(config, f, allow_unicode=True)
+        start = time.perf_counter()
+        self._dump_yaml(config, config_path)
+        self._rule_stats["dump_ms"] = round((time.perf_counter() - start) * 1000, 2)
         return config_path
 
-    def generate_clash_config(self, proxies: list) -> Path:
+    # extra_groups are generated groups; PROXY offers them ahead of the
+    # single nodes so the engine's own failover is the default choice.
+    def generate_clash_config(self, proxies: list, extra_groups: list = ()) -> Path:
         proxy_names = [p.get("name", f"proxy-{i}") for i, p in enumerate(proxies)]
+        proxy_names = [g["name"] for g in extra_groups] + proxy_names
+        proxy_section, proxy_groups = self._proxy_section(
+            proxies,
+            [
+                {
+                    "name": "PROXY",
+                    "type": "select",
+                    "proxies": proxy_names if proxy_names else ["DIRECT"],
+                },
+                *extra_groups,
+            ],
+        )
 
         config = {
             "port": 17890,
@@ -98,19 +207,12 @@ class ConfigGenerator:
             "mode": "rule",
             "geodata-mode": False,
             "geo-auto-update": False,
-            "proxies": proxies,
-            "proxy-groups": [
-                {
-                    "name": "PROXY",
-                    "type": "select",
-                    "proxies": proxy_names if proxy_names else ["DIRECT"],
-                }
-            ],
+            **proxy_section,
+            "proxy-groups": proxy_groups,
             "rules": ["MATCH,PROXY"],
         }
         config_path = self._config_dir / "runtime_clash.yaml"
-        with open(config_path, "w", encoding="utf-8") as f:
-            yaml.dump(config, f, allow_unicode=True)
+        self._dump_yaml(config, config_path)
         return config_path
 
     def generate_multidesk_xml(self) -> Path:
@@ -121,20 +223,18 @@ class ConfigGenerator:
         return xml_path
 
     def update_multidesk_proxy_port(self, new_port: int) -> bool:
-        import re
+        from core.multidesk import MultiDeskBuilder
 
-        xml_path = self._config_dir / "MultiDesk.multidesk"
-        if not xml_path.exists():
+        try:
+            return MultiDeskBuilder(self._config_dir).set_socks_port(new_port)
+        except Exception:
             return False
+
+    def sync_multidesk_servers(self, servers: list) -> bool:
+        from core.multidesk import MultiDeskBuilder
+
         try:
-            content = xml_path.read_text(encoding="utf-8")
-            updated = re.sub(
-                r"<SocksPort>\d+</SocksPort>",
-                f"<SocksPort>{new_port}</SocksPort>",
-                content,
-            )
-            xml_path.write_text(updated, encoding="utf-8")
-            return True
+            return MultiDeskBuilder(self._config_dir).sync(servers, self._build_xml())
         except Exception:
             return False
 
@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Callable, Optional
+from urllib.parse import unquote
+
+from core.instrument import http_get
+
+DEFAULT_TTL = 1.0
+ENDPOINT_TTLS = {
+    "/proxies": 1.0,
+    "/proxies/{name}": 1.0,
+    "/configs": 5.0,
+    "/version": 30.0,
+}
+
+
+def _endpoint(path: str) -> str:
+    if path.startswith("/proxies/") and path.count("/") == 2:
+        return "/proxies/{name}"
+    return path
+
+
+class _Flight:
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[dict] = None
+
+
+class ControllerCache:
+    def __init__(self, api_base: Callable[[], str]):
+        self._api_base = api_base
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], tuple[float, dict]] = {}
+        self._flights: dict[tuple[str, str], _Flight] = {}
+        self._generation = 0
+        self._stats: dict[str, dict[str, int]] = {}
+        self._invalidations = 0
+
+    def _count(self, path: str, outcome: str):
+        stat = self._stats.setdefault(
+            _endpoint(path), {"hits": 0, "misses": 0, "coalesced": 0}
+        )
+        stat[outcome] += 1
+
+    def _fresh(self, key: tuple[str, str], now: float) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] > ENDPOINT_TTLS.get(_endpoint(key[1]), DEFAULT_TTL):
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    # Results are shared between callers and must be treated as read-only.
+    def get_json(self, path: str, timeout: float = 5) -> Optional[dict]:
+        base = self._api_base()
+        key = (base, path)
+        now = time.monotonic()
+        owner = False
+        with self._lock:
+            data = self._fresh(key, now)
+            if data is None and _endpoint(path) == "/proxies/{name}":
+                proxies = self._fresh((base, "/proxies"), now)
+                if proxies is not None:
+                    data = proxies.get("proxies", {}).get(unquote(path[9:]))
+            if data is not None:
+                self._count(path, "hits")
+                return data
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._count(path, "coalesced")
+            else:
+                self._count(path, "misses")
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                owner = True
+        if not owner:
+            flight.event.wait(timeout)
+            return flight.result
+
+        try:
+            resp = http_get(f"{base}{path}", timeout=timeout)
+            if resp.status_code == 200:
+                flight.result = resp.json()
+        except Exception:
+            pass
+        with self._lock:
+            # invalidate() may already have dropped this flight for a newer one.
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if flight.result is not None and generation == self._generation:
+                self._entries[key] = (time.monotonic(), flight.result)
+        flight.event.set()
+        return flight.result
+
+    # In-flight requests started before the change are dropped as well, so
+    # later callers fetch again instead of joining a pre-change response.
+    def invalidate(self, *paths: str):
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            if not paths:
+                self._entries.clear()
+                self._flights.clear()
+                return
+            for key in list(self._entries):
+                if key[1] in paths:
+                    del self._entries[key]
+            for key in list(self._flights):
+                if key[1] in paths:
+                    del self._flights[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            endpoints = {name: dict(stat) for name, stat in self._stats.items()}
+            hits = sum(stat["hits"] for stat in endpoints.values())
+            misses = sum(stat["misses"] for stat in endpoints.values())
+            coalesced = sum(stat["coalesced"] for stat in endpoints.values())
+            total = hits + misses + coalesced
+            return {
+                "hits": hits,
+                "misses": misses,
+                "coalesced": coalesced,
+                "hit_rate": round((hits + coalesced) / total, 3) if total else 0,
+                "invalidations": self._invalidations,
+                "entries": len(self._entries),
+                "endpoints": endpoints,
+            }
@@ -0,0 +1,397 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Callable, Iterable, Optional
+from urllib.parse import urljoin
+
+from core.instrument import http_get
+
+MANIFEST_NAME = "manifest.json"
+INSTALLED_MANIFEST = "update_manifest.json"
+UPDATE_DIR = ".update"
+JOURNAL_FILE = "journal.json"
+RESULT_FILE = "result.json"
+# Blobs sit next to the manifest under flat names, since GitHub release
+# assets cannot be placed in subfolders.
+BLOB_PREFIX = "blob-"
+HELPER_WAIT = 30
+CHUNK_SIZE = 64 * 1024
+INSTALL_DIR_ENV = "NEXTDESK_INSTALL_DIR"
+
+
+class DeltaError(Exception):
+    pass
+
+
+# Delta updates replace files next to the executable, which only exist as
+# separate files in the installed (one-folder) build.
+def get_install_dir() -> Optional[Path]:
+    if os.environ.get(INSTALL_DIR_ENV):
+        return Path(os.environ[INSTALL_DIR_ENV])
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).parent
+    return None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Hashes the bytes as they are written, so the digest describes exactly what
+# ended up in the file rather than a source that may change afterwards.
+def _write_hashed(chunks: Iterable[bytes], path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
+# Manifest paths are POSIX-style; a backslash would be a separator on Windows
+# and slip past the ".." check, so it is rejected outright.
+def _safe_path(root: Path, relative: str) -> Path:
+    parts = PurePosixPath(relative).parts
+    if (
+        not parts
+        or relative.startswith("/")
+        or ".." in parts
+        or ":" in relative
+        or "\\" in relative
+    ):
+        raise DeltaError(f"invalid path in manifest: {relative}")
+    path = root.joinpath(*parts)
+    if not path.resolve().is_relative_to(root.resolve()):
+        raise DeltaError(f"invalid path in manifest: {relative}")
+    return path
+
+
+@dataclass
+class Manifest:
+    version: str
+    files: dict[str, dict]
+    url: str
+    blob_base: str = BLOB_PREFIX
+    installer: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict, url: str) -> "Manifest":
+        files = data.get("files")
+        if not isinstance(data.get("version"), str) or not isinstance(files, dict):
+            raise DeltaError("malformed manifest")
+        for path, entry in files.items():
+            sha = entry.get("sha256") if isinstance(entry, dict) else None
+            if not isinstance(sha, str) or len(sha) != 64:
+                raise DeltaError(f"missing hash for {path}")
+        return cls(
+            version=data["version"],
+            files=files,
+            url=url,
+            blob_base=data.get("blob_base", BLOB_PREFIX),
+            installer=data.get("installer"),
+        )
+
+    def blob_url(self, sha256: str) -> str:
+        return urljoin(self.url, self.blob_base + sha256)
+
+
+def fetch_manifest(url: str) -> Manifest:
+    resp = http_get(url, timeout=15)
+    resp.raise_for_status()
+    return Manifest.from_dict(resp.json(), url)
+
+
+@dataclass
+class DeltaPlan:
+    manifest: Manifest
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    download_bytes: int = 0
+    total_bytes: int = 0
+
+
+# Files the previous update installed but the new manifest no longer lists
+# are removed; anything else in the install folder is left alone.
+def plan_update(install_dir: Path, manifest: Manifest) -> DeltaPlan:
+    plan = DeltaPlan(manifest)
+    for relative, entry in manifest.files.items():
+        path = _safe_path(install_dir, relative)
+        size = entry.get("size")
+        plan.total_bytes += size or 0
+        if path.is_file():
+            if (size is None or path.stat().st_size == size) and file_sha256(
+                path
+            ) == entry["sha256"]:
+                continue
+        plan.changed.append(relative)
+        plan.download_bytes += size or 0
+    try:
+        installed = json.loads((install_dir / INSTALLED_MANIFEST).read_text("utf-8"))
+        previous = installed.get("files", {})
+    except (OSError, ValueError):
+        previous = {}
+    for relative in previous:
+        if relative not in manifest.files:
+            _safe_path(install_dir, relative)
+            plan.removed.append(relative)
+    return plan
+
+
+# The unelevated app downloads into work_dir, which any local process can
+# write. apply() never trusts those files: each one is copied into the
+# install folder's own staging area and hashed on the way, and only that copy
+# is installed. Backups and the journal live in the install folder as well.
+class DeltaUpdater:
+    def __init__(self, install_dir: Path, work_dir: Path):
+        self._install_dir = install_dir
+        self._work_dir = work_dir
+        self._update_dir = install_dir / UPDATE_DIR
+        self._staging = work_dir / "staging"
+        self._verified = self._update_dir / "staging"
+        self._backup = self._update_dir / "backup"
+        self._journal = self._update_dir / JOURNAL_FILE
+
+    # The installer puts the app under Program Files while the app itself
+    # runs unelevated, so the swap usually has to happen in a helper.
+    def can_apply(self) -> bool:
+        probe = self._update_dir / ".write_test"
+        try:
+            self._update_dir.mkdir(parents=True, exist_ok=True)
+            probe.write_bytes(b"")
+            probe.unlink()
+            return True
+        except OSError:
+            return False
+
+    def needs_recovery(self) -> bool:
+        return self._journal.exists()
+
+    # Written by the elevated helper into a user-writable folder: mkstemp
+    # never opens an existing file and os.replace swaps a planted link
+    # instead of writing through it.
+    def write_result(self, version: str, error: Optional[str]):
+        import tempfile
+
+        self._work_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._work_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "error": error}, f)
+        os.replace(tmp_path, self._work_dir / RESULT_FILE)
+
+    def pop_result(self) -> Optional[dict]:
+        path = self._work_dir / RESULT_FILE
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        path.unlink(missing_ok=True)
+        return result if isinstance(result, dict) else None
+
+    def clear_staging(self):
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+    def download(self, plan: DeltaPlan, progress: Callable[[int], None]) -> int:
+        self._staging.mkdir(parents=True, exist_ok=True)
+        done = 0
+        for relative in plan.changed:
+            entry = plan.manifest.files[relative]
+            target = self._staging / entry["sha256"]
+            if target.exists() and file_sha256(target) == entry["sha256"]:
+                done += target.stat().st_size
+                progress(done)
+                continue
+            tmp_path = target.with_suffix(".part")
+            digest = hashlib.sha256()
+            try:
+                with http_get(
+                    plan.manifest.blob_url(entry["sha256"]), stream=True, timeout=60
+                ) as resp:
+                    resp.raise_for_status()
+                    with open(tmp_path, "wb") as f:
+                        for chunk in resp.iter_content(CHUNK_SIZE):
+                            digest.update(chunk)
+                            f.write(chunk)
+                            done += len(chunk)
+                            progress(done)
+                if digest.hexdigest() != entry["sha256"]:
+                    raise DeltaError(f"hash mismatch for {relative}")
+                os.replace(tmp_path, target)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        return done
+
+    # Takes a blob from the user's download when its bytes match and
+    # downloads it again otherwise.
+    def _stage_verified(self, plan: DeltaPlan):
+        self._verified.mkdir(parents=True, exist_ok=True)
+        for relative in plan.changed:
+            sha256 = plan.manifest.files[relative]["sha256"]
+            target = self._verified / sha256
+            if target.is_file():
+                continue
+            tmp_path = target.with_suffix(".part")
+            try:
+                digest = None
+                source = self._staging / sha256
+                if source.is_file():
+                    with open(source, "rb") as f:
+                        digest = _write_hashed(
+                            iter(lambda: f.read(CHUNK_SIZE), b""), tmp_path
+                        )
+                if digest != sha256:
+                    with http_get(
+                        plan.manifest.blob_url(sha256), stream=True, timeout=60
+                    ) as resp:
+                        resp.raise_for_status()
+                        digest = _write_hashed(resp.iter_content(CHUNK_SIZE), tmp_path)
+                if digest != sha256:
+                    raise DeltaError(f"hash mismatch for {relative}")
+                os.replace(tmp_path, target)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+    # Old files are renamed aside rather than overwritten: a running
+    # executable or loaded DLL can be renamed on Windows but not replaced.
+    # Each move is journaled first so an interrupted apply is undone on the
+    # next start.
+    def apply(self, plan: DeltaPlan):
+        self._stage_verified(plan)
+        if self._backup.exists():
+            shutil.rmtree(self._backup, ignore_errors=True)
+        self._backup.mkdir(parents=True)
+        moves: list[tuple[str, bool]] = []
+        try:
+            for relative in plan.changed + plan.removed:
+                path = _safe_path(self._install_dir, relative)
+                had_file = path.exists()
+                moves.append((relative, had_file))
+                self._write_journal(moves)
+                if had_file:
+                    backup = _safe_path(self._backup, relative)
+                    backup.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(path, backup)
+                if relative in plan.manifest.files:
+                    blob = self._verified / plan.manifest.files[relative]["sha256"]
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(blob, path.with_name(path.name + ".new"))
+                    os.replace(path.with_name(path.name + ".new"), path)
+        except Exception:
+            self._rollback(moves)
+            raise
+        manifest = {"version": plan.manifest.version, "files": plan.manifest.files}
+        (self._install_dir / INSTALLED_MANIFEST).write_text(
+            json.dumps(manifest), encoding="utf-8"
+        )
+        self._journal.unlink(missing_ok=True)
+        shutil.rmtree(self._verified, ignore_errors=True)
+
+    def _write_journal(self, moves: list[tuple[str, bool]]):
+        self._update_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._journal.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(moves), encoding="utf-8")
+        os.replace(tmp_path, self._journal)
+
+    def _rollback(self, moves: list[tuple[str, bool]]):
+        for relative, had_file in reversed(moves):
+            path = _safe_path(self._install_dir, relative)
+            backup = _safe_path(self._backup, relative)
+            try:
+                if had_file and backup.exists():
+                    os.replace(backup, path)
+                elif not had_file and path.exists():
+                    path.unlink()
+            except OSError as e:
+                print(f"Update rollback error ({relative}): {e}")
+        if self._journal.exists():
+            self._journal.unlink(missing_ok=True)
+
+    # Called at startup: undoes an apply that never finished and removes the
+    # backups of one that did (they were still locked while it ran).
+    def recover(self):
+        if self._journal.exists():
+            try:
+                moves = json.loads(self._journal.read_text(encoding="utf-8"))
+                self._rollback([(m[0], m[1]) for m in moves])
+            except (OSError, ValueError) as e:
+                print(f"Update recovery error: {e}")
+            return
+        if self._backup.exists():
+            shutil.rmtree(self._backup, ignore_errors=True)
+
+
+def _wait_for_exit(pid: int):
+    import psutil
+
+    try:
+        psutil.Process(pid).wait(HELPER_WAIT)
+    except (psutil.Error, psutil.TimeoutExpired):
+        pass
+
+
+# Relaunching straight from the elevated helper would hand the app admin
+# rights; explorer.exe starts it as the signed-in user instead.
+def _relaunch(install_dir: Path):
+    if not getattr(sys, "frozen", False):
+        return
+    import subprocess
+
+    exe = str(install_dir / Path(sys.executable).name)
+    args = ["explorer.exe", exe] if sys.platform == "win32" else [exe]
+    try:
+        subprocess.Popen(args, cwd=str(install_dir))
+    except OSError as e:
+        print(f"Update relaunch error: {e}")
+
+
+# Entry point of the elevated helper started by the updater:
+#   --apply-update <work_dir> --install-dir <dir> --version <v> --wait-pid <pid>
+#   --recover-update <work_dir> --install-dir <dir>
+# Nothing the unelevated side wrote is trusted: the manifest comes straight
+# from the GitHub release, and the plan is worked out again from it.
+def run_helper(argv: list[str]) -> int:
+    import argparse
+
+    from core.updater import release_manifest_url
+
+    parser = argparse.ArgumentParser(prog="NextDesk")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--apply-update", type=Path)
+    mode.add_argument("--recover-update", type=Path)
+    parser.add_argument("--install-dir", type=Path, required=True)
+    parser.add_argument("--version")
+    parser.add_argument("--wait-pid", type=int)
+    args = parser.parse_args(argv)
+
+    work_dir = args.apply_update or args.recover_update
+    updater = DeltaUpdater(args.install_dir, work_dir)
+    if args.recover_update:
+        updater.recover()
+        return 0
+    if args.wait_pid:
+        _wait_for_exit(args.wait_pid)
+    version, error = "", None
+    try:
+        url = release_manifest_url()
+        if url is None:
+            raise DeltaError("release has no update manifest")
+        manifest = fetch_manifest(url)
+        version = manifest.version
+        if args.version and version != args.version:
+            raise DeltaError(f"release is {version}, expected {args.version}")
+        updater.apply(plan_update(args.install_dir, manifest))
+        updater.recover()
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        print(f"Delta apply error: {error}")
+    updater.write_result(version, error)
+    _relaunch(args.install_dir)
+    return 0 if error is None else 1
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from core.instrument import http_get, http_post
+
+GEODATA_STATE_FILE = "geodata.json"
+GEODATA_BASE_URL = (
+    "https://github.com/MetaCubeX/meta-rules-dat/releases/download/latest"
+)
+DEFAULT_MAX_AGE_DAYS = 7
+DOWNLOAD_TIMEOUT = 60
+CHUNK_SIZE = 64 * 1024
+
+# local file name -> (remote file name, bundled copy in bin/)
+GEODATA_FILES = {
+    "GeoSite.dat": ("geosite.dat", "geosite.dat"),
+    "Country.mmdb": ("country.mmdb", None),
+}
+
+
+class GeodataError(Exception):
+    pass
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GeodataManager:
+    def __init__(
+        self,
+        config_dir: Path,
+        bin_dir: Path,
+        max_age_days: Callable[[], float] = lambda: DEFAULT_MAX_AGE_DAYS,
+        base_url: str = GEODATA_BASE_URL,
+    ):
+        self._config_dir = config_dir
+        self._bin_dir = bin_dir
+        self._max_age_days = max_age_days
+        self._base_url = base_url.rstrip("/")
+        self._state_path = config_dir / GEODATA_STATE_FILE
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._running = False
+        self._checked: set[str] = set()
+
+    def _load_state(self) -> dict:
+        try:
+            return json.loads(self._state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: dict):
+        tmp_path = self._state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self._state_path)
+
+    def _max_age(self) -> float:
+        try:
+            return float(self._max_age_days()) * 86400
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_AGE_DAYS * 86400
+
+    def _is_stale(self, entry: Optional[dict], now: float) -> bool:
+        return not entry or now - entry.get("updated_at", 0) > self._max_age()
+
+    # Seeds the engine home with the copy shipped in bin/ so a first start
+    # never waits on the network; its age is the age of the installed build.
+    def _seed_bundled(self, state: dict):
+        for name, (_, bundled) in GEODATA_FILES.items():
+            target = self._config_dir / name
+            source = self._bin_dir / bundled if bundled else None
+            if target.exists() or source is None or not source.exists():
+                continue
+            shutil.copyfile(source, target)
+            state[name] = {
+                "sha256": file_sha256(target),
+                "size": target.stat().st_size,
+                "updated_at": source.stat().st_mtime,
+                "source": "bundled",
+            }
+
+    def _fetch_checksum(self, remote: str) -> str:
+        resp = http_get(f"{self._base_url}/{remote}.sha256sum", timeout=15)
+        resp.raise_for_status()
+        checksum = resp.text.split()[0].strip().lower() if resp.text.strip() else ""
+        if len(checksum) != 64:
+            raise GeodataError(f"invalid checksum for {remote}")
+        return checksum
+
+    def _download(self, remote: str, target: Path, expected: str) -> int:
+        tmp_path = target.with_name(target.name + ".download")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with http_get(
+                f"{self._base_url}/{remote}", stream=True, timeout=DOWNLOAD_TIMEOUT
+            ) as resp:
+                resp.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in resp.iter_content(CHUNK_SIZE):
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            if digest.hexdigest() != expected:
+                raise GeodataError(f"checksum mismatch for {remote}")
+            os.replace(tmp_path, target)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return size
+
+    def _update_file(self, name: str, entry: Optional[dict], now: float) -> dict:
+        remote = GEODATA_FILES[name][0]
+        target = self._config_dir / name
+        expected = self._fetch_checksum(remote)
+        if entry and entry.get("sha256") == expected and target.exists():
+            return {**entry, "updated_at": now, "checked_at": now}
+        size = self._download(remote, target, expected)
+        return {
+            "sha256": expected,
+            "size": size,
+            "updated_at": now,
+            "checked_at": now,
+            "source": self._base_url,
+        }
+
+    def update(self, force: bool = False) -> dict:
+        with self._lock:
+            if self._running:
+                return {"started": False, "files": self.status()["files"]}
+            self._running = True
+        try:
+            state = self._load_state()
+            self._seed_bundled(state)
+            now = time.time()
+            results = {}
+            for name in GEODATA_FILES:
+                entry = state.get(name)
+                if not force and not self._is_stale(entry, now):
+                    results[name] = "fresh"
+                    continue
+                try:
+                    previous = entry.get("sha256") if entry else None
+                    state[name] = self._update_file(name, entry, now)
+                    changed = state[name]["sha256"] != previous
+                    results[name] = "updated" if changed else "unchanged"
+                except Exception as e:
+                    print(f"Geodata update error ({name}): {e}")
+                    results[name] = f"error: {e}"
+            with self._state_lock:
+                latest = self._load_state()
+                latest.update({n: state[n] for n in GEODATA_FILES if n in state})
+                self._save_state(latest)
+            return {"started": True, "files": results}
+        finally:
+            with self._lock:
+                self._running = False
+
+    # External Clash instances manage their own files; we only ask them to
+    # reload geodata when our record of the last request has gone stale.
+    def update_external(self, api_base: str) -> bool:
+        state = self._load_state()
+        entry = state.get("external", {}).get(api_base)
+        if not self._is_stale(entry, time.time()):
+            return False
+        try:
+            resp = http_post(f"{api_base}/configs/geo", timeout=30)
+            if resp.status_code not in (200, 204):
+                return False
+        except Exception:
+            return False
+        with self._state_lock:
+            state = self._load_state()
+            state.setdefault("external", {})[api_base] = {"updated_at": time.time()}
+            self._save_state(state)
+        return True
+
+    def ensure_fresh(self, external_api: Optional[str] = None):
+        key = external_api or "local"
+        with self._lock:
+            if key in self._checked:
+                return
+            self._checked.add(key)
+        if external_api:
+            target, args = self.update_external, (external_api,)
+        else:
+            target, args = self.update, ()
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    def status(self) -> dict:
+        state = self._load_state()
+        now = time.time()
+        return {
+            "running": self._running,
+            "max_age_days": self._max_age() / 86400,
+            "files": {
+                name: {
+                    **(state.get(name) or {}),
+                    "present": (self._config_dir / name).exists(),
+                    "stale": self._is_stale(state.get(name), now),
+                }
+                for name in GEODATA_FILES
+            },
+        }
@@ -0,0 +1,241 @@
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+    import requests
+
+METRICS_ENV = "NEXTDESK_METRICS"
+METRICS_PORT_ENV = "NEXTDESK_METRICS_PORT"
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_PATH_PARAMS = [
+    (re.compile(r"^/proxies/[^/]+"), "/proxies/{name}"),
+    (re.compile(r"^/providers/proxies/[^/]+"), "/providers/proxies/{name}"),
+]
+
+
+class _Stat:
+    __slots__ = ("count", "errors", "buckets", "total_ms", "max_ms", "bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.errors: dict[str, int] = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.bytes = 0
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], _Stat] = {}
+        self._server: Optional["ThreadingHTTPServer"] = None
+
+    def record(
+        self,
+        kind: str,
+        name: str,
+        elapsed_ms: float,
+        error: Optional[str] = None,
+        size: int = 0,
+    ):
+        index = 0
+        while (
+            index < len(LATENCY_BUCKETS_MS) and elapsed_ms > LATENCY_BUCKETS_MS[index]
+        ):
+            index += 1
+        with self._lock:
+            stat = self._stats.get((kind, name))
+            if stat is None:
+                stat = self._stats[(kind, name)] = _Stat()
+            stat.count += 1
+            stat.buckets[index] += 1
+            stat.total_ms += elapsed_ms
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            stat.bytes += size
+            if error:
+                stat.errors[error] = stat.errors.get(error, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = [(key, stat) for key, stat in self._stats.items()]
+            result: dict = {"enabled": self.enabled, "api": {}, "http": {}}
+            for (kind, name), stat in items:
+                result.setdefault(kind, {})[name] = {
+                    "count": stat.count,
+                    "errors": dict(stat.errors),
+                    "avg_ms": round(stat.total_ms / stat.count, 2) if stat.count else 0,
+                    "max_ms": round(stat.max_ms, 2),
+                    "bytes": stat.bytes,
+                    "histogram": dict(
+                        zip([*map(str, LATENCY_BUCKETS_MS), "+Inf"], stat.buckets)
+                    ),
+                }
+        return result
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            items = sorted(self._stats.items())
+            for (kind, name), stat in items:
+                labels = f'kind="{kind}",name="{name}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS_MS, stat.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'nextdesk_call_duration_ms_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'nextdesk_call_duration_ms_bucket{{{labels},le="+Inf"}} {stat.count}'
+                )
+                lines.append(
+                    f"nextdesk_call_duration_ms_sum{{{labels}}} {stat.total_ms:.3f}"
+                )
+                lines.append(
+                    f"nextdesk_call_duration_ms_count{{{labels}}} {stat.count}"
+                )
+                lines.append(
+                    f"nextdesk_call_payload_bytes_total{{{labels}}} {stat.bytes}"
+                )
+                for error, count in stat.errors.items():
+                    lines.append(
+                        f'nextdesk_call_errors_total{{{labels},error="{error}"}} {count}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int) -> bool:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        if self._server is not None:
+            return True
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            print(f"Metrics server error: {e}")
+            return False
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return True
+
+
+metrics = Metrics(enabled=os.environ.get(METRICS_ENV, "0") == "1")
+
+
+def _payload_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except Exception:
+        return 0
+
+
+def _timed(name: str, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            metrics.record(
+                "api", name, (time.perf_counter() - start) * 1000, type(e).__name__
+            )
+            raise
+        metrics.record(
+            "api",
+            name,
+            (time.perf_counter() - start) * 1000,
+            size=_payload_size(result),
+        )
+        return result
+
+    wrapper.__signature__ = inspect.signature(fn)
+    return wrapper
+
+
+def instrument_api(cls):
+    for name, value in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(value):
+            continue
+        setattr(cls, name, _timed(name, value))
+    return cls
+
+
+def _endpoint(method: str, url: str) -> str:
+    parts = urlsplit(url)
+    if parts.hostname not in ("127.0.0.1", "localhost"):
+        return f"{method} {parts.hostname}"
+    path = parts.path or "/"
+    for pattern, replacement in _PATH_PARAMS:
+        path = pattern.sub(replacement, path)
+    return f"{method} {parts.hostname}{path}"
+
+
+def http_request(method: str, url: str, **kwargs) -> "requests.Response":
+    import requests
+
+    if not metrics.enabled:
+        return requests.request(method, url, **kwargs)
+    name = _endpoint(method, url)
+    start = time.perf_counter()
+    try:
+        resp = requests.request(method, url, **kwargs)
+    except Exception as e:
+        metrics.record(
+            "http", name, (time.perf_counter() - start) * 1000, type(e).__name__
+        )
+        raise
+    if kwargs.get("stream"):
+        size = int(resp.headers.get("content-length") or 0)
+    else:
+        size = len(resp.content)
+    error = f"HTTP {resp.status_code}" if resp.status_code >= 400 else None
+    metrics.record("http", name, (time.perf_counter() - start) * 1000, error, size)
+    return resp
+
+
+def http_get(url: str, **kwargs) -> "requests.Response":
+    return http_request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> "requests.Response":
+    return http_request("POST", url, **kwargs)
+
+
+def http_put(url: str, **kwargs) -> "requests.Response":
+    return http_request("PUT", url, **kwargs)
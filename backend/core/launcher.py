@@ -5,6 +5,7 @@ import threading
 import time
 import locale
 from pathlib import Path
+from typing import Callable, Optional
 
 from core.config_gen import get_user_config_dir, get_log_dir
 
@@ -13,13 +14,17 @@ CREATION_FLAGS = (
 )
 
 
+def get_bin_dir() -> Path:
+    if getattr(sys, "frozen", False):
+        base_path = Path(sys._MEIPASS)
+    else:
+        base_path = Path(__file__).parent.parent
+    return base_path / "bin"
+
+
 class Launcher:
     def __init__(self):
-        if getattr(sys, "frozen", False):
-            base_path = Path(sys._MEIPASS)
-        else:
-            base_path = Path(__file__).parent.parent
-        self._bin_dir = base_path / "bin"
+        self._bin_dir = get_bin_dir()
         self._config_dir = get_user_config_dir()
         self._clash_proc = None
         self._multidesk_proc = None
@@ -28,16 +33,28 @@ class Launcher:
         self._clash_log_file = None
         self._log_dir = get_log_dir()
         self._reuse_mode = False
+        self._before_multidesk: Optional[Callable[[], None]] = None
 
     def set_reuse_mode(self, enabled: bool):
         self._reuse_mode = enabled
 
-    def start(self) -> bool:
+    # Runs once the proxy engine is up, before MultiDesk is launched if it is.
+    def set_before_multidesk(self, hook: Optional[Callable[[], None]]):
+        self._before_multidesk = hook
+
+    # multidesk=False starts only the proxy engine, for hosts without a desktop.
+    def start(self, multidesk: bool = True) -> bool:
         try:
             if not self._reuse_mode:
                 self._start_clash()
                 time.sleep(1)
-            self._start_multidesk()
+            if self._before_multidesk is not None:
+                try:
+                    self._before_multidesk()
+                except Exception as e:
+                    print(f"Pre-start hook error: {e}")
+            if multidesk:
+                self._start_multidesk()
             return True
         except Exception as e:
             print(f"Start error: {e}")
@@ -91,7 +108,9 @@ class Launcher:
         config_path = self._config_dir / "runtime_clash.yaml"
         args = [str(network_path)]
         if config_path.exists():
-            args.extend(["-f", str(config_path)])
+            # -d makes relative provider paths (./ruleset/...) resolve against
+            # the user config dir, which the engine treats as its home.
+            args.extend(["-d", str(self._config_dir), "-f", str(config_path)])
         else:
             log_path.write_text(
                 f"ERROR: Config not found at {config_path}", encoding="utf-8"
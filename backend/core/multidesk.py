@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterable, Optional
+
+from core.servers import RdpServer, RDP_DEFAULT_PORT
+
+MULTIDESK_FILE = "MultiDesk.multidesk"
+STATE_FILE = "multidesk_state.json"
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n'
+PLACEHOLDER_PREFIX = "Please add your"
+UNGROUPED_NAME = "NextDesk"
+
+GROUP_DEFAULTS = [
+    ("Name", None),
+    ("Description", None),
+    ("InheritGeneral", "1"),
+    ("InheritProxy", "1"),
+    ("InheritDisplay", "1"),
+    ("GroupCollapsed", "0"),
+]
+
+SERVER_DEFAULTS = [
+    ("Name", None),
+    ("Description", None),
+    ("Server", None),
+    ("MacAddress", None),
+    ("UseVMBus", "0"),
+    ("EnhancedMode", "0"),
+    ("VMId", None),
+    ("InheritGeneral", "1"),
+    ("EnableCredSspSupport", "1"),
+    ("InheritProxy", "1"),
+    ("InheritDisplay", "1"),
+    ("RedirectPrinters", "0"),
+    ("RedirectClipboard", "1"),
+    ("RedirectPorts", "0"),
+    ("RedirectSmartCards", "0"),
+    ("RedirectDrives", "0"),
+    ("DriveCollection", None),
+    ("AudioRedirectionMode", "0"),
+    ("AudioCaptureRedirectionMode", "0"),
+    ("KeyboardHookMode", "1"),
+    ("StartProgramOnConnection", "0"),
+    ("StartProgram", None),
+    ("WorkDir", None),
+    ("PerformanceFlags", "384"),
+    ("BitmapPersistence", "1"),
+    ("AutoReconnect", "0"),
+    ("BandwidthDetection", "1"),
+    ("AuthenticationLevel", "0"),
+]
+
+
+# MultiDesk's "general" settings: an entry that sets its own RDPPort has to
+# stop inheriting them, so it carries a copy of these from its group.
+GENERAL_FIELDS = ("UserName", "Domain", "Password")
+
+
+def _parse(source) -> ET.Element:
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True, insert_pis=True))
+    if isinstance(source, Path):
+        return ET.parse(source, parser).getroot()
+    return ET.fromstring(source.encode("utf-8"), parser)
+
+
+def _element(tag: str, children: list[tuple[str, Optional[str]]]) -> ET.Element:
+    elem = ET.Element(tag)
+    for child_tag, text in children:
+        ET.SubElement(elem, child_tag).text = text
+    return elem
+
+
+def _set_text(parent: ET.Element, tag: str, text: Optional[str]) -> bool:
+    child = parent.find(tag)
+    if child is None:
+        ET.SubElement(parent, tag).text = text
+        return True
+    if child.text != text:
+        child.text = text
+        return True
+    return False
+
+
+def _group_name(group: ET.Element) -> str:
+    return group.findtext("Properties/Name") or ""
+
+
+def _digest(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _general_settings(container: ET.Element, group: ET.Element):
+    props = group.find("Properties")
+    if props is not None and props.findtext("InheritGeneral") == "0":
+        return props
+    return container.find("Properties")
+
+
+# Server and RDPPort always follow the subscription. The general settings
+# are the user's once they edit them: a field is only written when the entry
+# is new (written is None) or still holds what NextDesk last wrote there.
+# Returns whether the entry changed and the digests of what NextDesk owns; the
+# state file keeps digests so it never holds a copy of the password.
+def _apply_server(
+    entry: ET.Element,
+    server: RdpServer,
+    general: Optional[ET.Element],
+    written: Optional[dict],
+) -> tuple[bool, dict]:
+    port = server.port or RDP_DEFAULT_PORT
+    changed = _set_text(entry, "Server", server.host)
+    changed |= _set_text(entry, "RDPPort", str(port))
+    wanted: dict[str, Optional[str]] = {"InheritGeneral": "1"}
+    if port != RDP_DEFAULT_PORT:
+        wanted["InheritGeneral"] = "0"
+        if general is not None:
+            for tag in GENERAL_FIELDS:
+                wanted[tag] = general.findtext(tag) or None
+    new = written is None
+    written = dict(written or {})
+    for tag, value in wanted.items():
+        current = _digest(entry.findtext(tag))
+        if new or written.get(tag, current) == current:
+            changed |= _set_text(entry, tag, value)
+            written[tag] = _digest(value)
+    return changed, written
+
+
+# Only entries recorded in the state file belong to NextDesk: an entry the user
+# added by hand is never updated or removed, even if a server has its name.
+# Groups NextDesk created, and the template's sample groups, are removed once
+# they hold no servers.
+class MultiDeskBuilder:
+    def __init__(self, config_dir: Path):
+        self._xml_path = config_dir / MULTIDESK_FILE
+        self._state_path = config_dir / STATE_FILE
+
+    def _load_state(self) -> tuple[dict[str, list[str]], set[str], dict]:
+        try:
+            data = json.loads(self._state_path.read_text(encoding="utf-8"))
+            return (
+                data.get("groups", {}),
+                set(data.get("created", [])),
+                data.get("written", {}),
+            )
+        except Exception:
+            return {}, set(), {}
+
+    def _save_state(
+        self, managed: dict[str, list[str]], created: set[str], written: dict
+    ):
+        tmp = self._state_path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(
+                {"groups": managed, "created": sorted(created), "written": written}
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self._state_path)
+
+    # A file MultiDesk cannot have written is left alone rather than replaced
+    # with the template, which would lose every entry the user added.
+    def _load_tree(self, template: str) -> Optional[ET.Element]:
+        if not self._xml_path.exists():
+            return _parse(template)
+        try:
+            return _parse(self._xml_path)
+        except ET.ParseError as e:
+            print(f"MultiDesk sync skipped, {self._xml_path.name} is unreadable: {e}")
+            return None
+
+    def _write(self, root: ET.Element):
+        ET.indent(root, space="\t")
+        tmp = self._xml_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(XML_DECLARATION)
+            f.write(ET.tostring(root, encoding="unicode"))
+        os.replace(tmp, self._xml_path)
+
+    def sync(self, servers: Iterable[RdpServer], template: str) -> bool:
+        desired: dict[str, dict[str, RdpServer]] = {}
+        for server in servers:
+            for group in server.groups or [UNGROUPED_NAME]:
+                desired.setdefault(group, {})[server.name] = server
+
+        root = self._load_tree(template)
+        if root is None:
+            return False
+        container = root.find("Servers")
+        if container is None:
+            container = ET.SubElement(root, "Servers")
+
+        previous, created, previous_written = self._load_state()
+        previous_created = set(created)
+        written: dict[str, dict] = {}
+        samples = {_group_name(g) for g in _parse(template).iter("Group")}
+        groups = {_group_name(g): g for g in container.findall("Group")}
+        managed: dict[str, list[str]] = {}
+        changed = False
+
+        if desired:
+            for group in groups.values():
+                for entry in group.findall("Server"):
+                    if (entry.findtext("Name") or "").startswith(PLACEHOLDER_PREFIX):
+                        group.remove(entry)
+                        changed = True
+
+        for group_name, members in desired.items():
+            group = groups.get(group_name)
+            if group is None:
+                group = ET.SubElement(container, "Group")
+                props = _element("Properties", GROUP_DEFAULTS)
+                props.find("Name").text = group_name
+                group.append(props)
+                groups[group_name] = group
+                created.add(group_name)
+                changed = True
+
+            owned = set(previous.get(group_name, []))
+            entries = {e.findtext("Name") or "": e for e in group.findall("Server")}
+            general = _general_settings(container, group)
+            last = previous_written.get(group_name, {})
+            names = []
+            for name, server in members.items():
+                entry = entries.get(name)
+                if entry is None:
+                    entry = _element("Server", SERVER_DEFAULTS)
+                    entry.find("Name").text = name
+                    group.append(entry)
+                    changed = True
+                    fields = None
+                elif name not in owned:
+                    continue
+                else:
+                    fields = last.get(name, {})
+                entry_changed, fields = _apply_server(entry, server, general, fields)
+                changed |= entry_changed
+                written.setdefault(group_name, {})[name] = fields
+                names.append(name)
+            managed[group_name] = sorted(names)
+
+            for name in owned - members.keys():
+                if name in entries:
+                    group.remove(entries[name])
+                    changed = True
+
+        for group_name, names in previous.items():
+            if group_name in desired or group_name not in groups:
+                continue
+            group = groups[group_name]
+            for entry in group.findall("Server"):
+                if (entry.findtext("Name") or "") in names:
+                    group.remove(entry)
+                    changed = True
+
+        for group_name, group in list(groups.items()):
+            if group_name in desired or group.find("Server") is not None:
+                continue
+            if group_name in created or group_name in samples:
+                container.remove(group)
+                del groups[group_name]
+                changed = True
+        created &= groups.keys()
+
+        if changed or not self._xml_path.exists():
+            self._write(root)
+        if (
+            managed != previous
+            or created != previous_created
+            or written != previous_written
+        ):
+            self._save_state(managed, created, written)
+        return changed
+
+    def set_socks_port(self, port: int) -> bool:
+        if not self._xml_path.exists():
+            return False
+        root = _parse(self._xml_path)
+        changed = False
+        for elem in root.iter("SocksPort"):
+            if elem.text != str(port):
+                elem.text = str(port)
+                changed = True
+        if changed:
+            self._write(root)
+        return True
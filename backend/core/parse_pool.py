@@ -0,0 +1,197 @@
+import threading
+import time
+from typing import Optional
+
+MAX_BODY = 20 * 1024 * 1024
+PARSE_TIMEOUT = 20.0
+RSS_LIMIT = 512 * 1024 * 1024
+# Upper bound on nodes in the parsed document, counted with aliases expanded,
+# so a YAML alias bomb is rejected in the worker instead of being walked by
+# the config generator in the app process.
+MAX_NODES = 2_000_000
+POOL_SIZE = 2
+WATCH_INTERVAL = 0.05
+
+
+class ParseError(Exception):
+    pass
+
+
+def _count_nodes(data, limit: int) -> int:
+    count = 0
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        count += 1
+        if count > limit:
+            raise ParseError("Subscription is too large")
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return count
+
+
+# Only what the app needs goes back over the pipe. For a Clash document the
+# proxy, group and rule lists are the raw_config's own lists, so they are
+# left out and taken from raw_config again on the other side instead of
+# being pickled twice; lists found elsewhere (JSON "outbounds") are sent.
+_SHARED = (("proxies", "proxies"), ("proxy_groups", "proxy-groups"), ("rules", "rules"))
+
+
+def _compact(result) -> dict:
+    payload = {"raw_config": result.raw_config, "error": result.error}
+    for name, key in _SHARED:
+        value = getattr(result, name)
+        if not result.raw_config or value is not result.raw_config.get(key):
+            payload[name] = value
+    return payload
+
+
+def expand(payload: dict) -> dict:
+    raw_config = payload.get("raw_config") or {}
+    data = {"raw_config": raw_config, "error": payload.get("error")}
+    for name, key in _SHARED:
+        value = payload[name] if name in payload else raw_config.get(key, [])
+        data[name] = value if isinstance(value, list) else []
+    return data
+
+
+def _worker_main(conn):
+    from core.sub_loader import SubscriptionLoader
+
+    loader = SubscriptionLoader()
+    while True:
+        try:
+            content = conn.recv()
+        except EOFError:
+            return
+        if content is None:
+            return
+        try:
+            result = loader._parse(content)
+            _count_nodes(result.raw_config or result.proxies, MAX_NODES)
+            conn.send(_compact(result))
+        except ParseError as e:
+            conn.send({"error": str(e)})
+        except MemoryError:
+            conn.send({"error": "Subscription is too large"})
+        except Exception as e:
+            conn.send({"error": f"Parse failed: {e}"})
+
+
+class _Worker:
+    __slots__ = ("process", "conn")
+
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child,), name="nextdesk-parser", daemon=True
+        )
+        self.process.start()
+        child.close()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(1)
+        except Exception:
+            pass
+        self.conn.close()
+
+
+class ParsePool:
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        timeout: float = PARSE_TIMEOUT,
+        rss_limit: int = RSS_LIMIT,
+    ):
+        import multiprocessing
+
+        self._size = size
+        self._timeout = timeout
+        self._rss_limit = rss_limit
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._idle: list[_Worker] = []
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+                worker.kill()
+        return _Worker(self._ctx)
+
+    def _release(self, worker: _Worker):
+        with self._lock:
+            if len(self._idle) < self._size and worker.alive():
+                self._idle.append(worker)
+                return
+        worker.kill()
+
+    # Waits for the reply while checking the wall clock and the worker's
+    # resident memory; a worker that breaks either limit is killed.
+    def _wait(self, worker: _Worker) -> dict:
+        import psutil
+
+        deadline = time.monotonic() + self._timeout
+        try:
+            proc = psutil.Process(worker.process.pid)
+        except psutil.Error:
+            proc = None
+        while not worker.conn.poll(WATCH_INTERVAL):
+            if not worker.alive():
+                raise ParseError("Parser exited unexpectedly")
+            if time.monotonic() > deadline:
+                raise ParseError("Parsing timed out")
+            try:
+                if proc is not None and proc.memory_info().rss > self._rss_limit:
+                    raise ParseError("Parser memory limit exceeded")
+            except psutil.Error:
+                pass
+        return worker.conn.recv()
+
+    def parse(self, content: str) -> dict:
+        if len(content) > MAX_BODY:
+            raise ParseError("Subscription is too large")
+        worker = self._acquire()
+        try:
+            worker.conn.send(content)
+            payload = self._wait(worker)
+        except ParseError:
+            worker.kill()
+            raise
+        except (OSError, EOFError) as e:
+            worker.kill()
+            raise ParseError(f"Parser unavailable: {e}")
+        self._release(worker)
+        return expand(payload)
+
+    def close(self):
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+                worker.process.join(1)
+            except Exception:
+                pass
+            worker.kill()
+
+
+_pool: Optional[ParsePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ParsePool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ParsePool()
+        return _pool
@@ -0,0 +1,193 @@
+import socket
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable, Optional
+
+from core.probe import PROBE_TIMEOUT, socks5_connect, socks5_handshake
+
+# How long a warm-up waits for the engine's SOCKS port to accept connections.
+PREWARM_TIMEOUT = 3.0
+# The engine and the node cache DNS answers and transport state only for a
+# while, so each target is warmed again after this long.
+REWARM_INTERVAL = 60.0
+# A group with no live connections and no switch for this long is no longer
+# re-warmed; a switch or a new connection through it makes it active again.
+IDLE_AFTER = 15 * 60.0
+READY_POLL = 0.1
+
+# (group, proxy, host, port)
+Target = tuple[str, str, str, int]
+
+
+@dataclass(frozen=True, slots=True)
+class _Warmup:
+    proxy: str
+    host: str
+    port: int
+    warmed_at: float
+    used_at: float
+    # The first tunnel through a newly selected node pays for resolving it and
+    # for the engine's transport handshake; a second one opened right after
+    # shows what a warmed path costs.
+    cold_ms: Optional[float] = None
+    warm_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+# Opens short SOCKS tunnels through the node each RDP group currently
+# selects, so the engine has resolved the node and completed its transport
+# handshake, and the node has resolved the server, before MultiDesk opens
+# the first session. MultiDesk dials its own connections, so the tunnels are
+# closed right away rather than held.
+class TunnelWarmer:
+    def __init__(
+        self,
+        proxy_port: Callable[[], int],
+        targets: Callable[[Optional[set[str]]], list[Target]],
+        in_use: Callable[[], set[str]] = set,
+    ):
+        self._proxy_port = proxy_port
+        self._targets = targets
+        self._in_use = in_use
+        self._lock = threading.Lock()
+        self._warmups: dict[str, _Warmup] = {}
+        self._keeper: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def _open(self, host: str, port: int) -> float:
+        start = time.perf_counter()
+        sock = socket.create_connection(
+            ("127.0.0.1", self._proxy_port()), timeout=PROBE_TIMEOUT
+        )
+        try:
+            sock.settimeout(PROBE_TIMEOUT)
+            socks5_handshake(sock)
+            socks5_connect(sock, host, port)
+        finally:
+            sock.close()
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    def _wait_for_proxy(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self._stopping.is_set():
+            try:
+                socket.create_connection(
+                    ("127.0.0.1", self._proxy_port()), timeout=READY_POLL
+                ).close()
+                return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(READY_POLL)
+        return False
+
+    # used: the warm-up follows a start or a switch, which counts as use;
+    # keep-alive re-warms leave the last use time alone.
+    def _warm_target(
+        self, group: str, proxy: str, host: str, port: int, used: bool = True
+    ):
+        with self._lock:
+            previous = self._warmups.get(group)
+        if previous is not None and previous.proxy != proxy:
+            previous = None
+        cold_ms = previous.cold_ms if previous is not None else None
+        now = time.monotonic()
+        used_at = now if used or previous is None else previous.used_at
+        try:
+            if cold_ms is None:
+                cold_ms = self._open(host, port)
+            warmup = _Warmup(
+                proxy, host, port, now, used_at, cold_ms, self._open(host, port)
+            )
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            warmup = _Warmup(proxy, host, port, now, used_at, cold_ms, error=error)
+        with self._lock:
+            if not self._stopping.is_set():
+                self._warmups[group] = warmup
+
+    # Returns at once: the warm-up runs in the background so engine start
+    # and MultiDesk launch never wait for it. Clears a previous stop;
+    # refreshes after stop() are ignored until then.
+    def start(self):
+        self._stopping.clear()
+        threading.Thread(target=self.warm, daemon=True).start()
+
+    def warm(
+        self, groups: Optional[Iterable[str]] = None, wait: float = PREWARM_TIMEOUT
+    ) -> bool:
+        if not self._wait_for_proxy(wait):
+            return False
+        targets = self._targets(set(groups) if groups is not None else None)
+        threads = [
+            threading.Thread(target=self._warm_target, args=target, daemon=True)
+            for target in targets
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self._ensure_keeper()
+        return True
+
+    def refresh(self, group: str):
+        threading.Thread(
+            target=self.warm, args=([group],), kwargs={"wait": 0}, daemon=True
+        ).start()
+
+    def refresh_all(self):
+        threading.Thread(target=self.warm, kwargs={"wait": 0}, daemon=True).start()
+
+    def _ensure_keeper(self):
+        with self._lock:
+            if self._stopping.is_set():
+                return
+            if self._keeper is not None and self._keeper.is_alive():
+                return
+            self._keeper = threading.Thread(target=self._keep_alive, daemon=True)
+            self._keeper.start()
+
+    def _keep_alive(self):
+        while not self._stopping.wait(REWARM_INTERVAL / 3):
+            try:
+                in_use = self._in_use()
+            except Exception:
+                in_use = set()
+            now = time.monotonic()
+            with self._lock:
+                for group in in_use & self._warmups.keys():
+                    self._warmups[group] = replace(self._warmups[group], used_at=now)
+                expired = [
+                    (group, w.proxy, w.host, w.port, False)
+                    for group, w in self._warmups.items()
+                    if now - w.warmed_at > REWARM_INTERVAL
+                    and now - w.used_at <= IDLE_AFTER
+                ]
+            for target in expired:
+                self._warm_target(*target)
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            self._warmups = {}
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            warmups = dict(self._warmups)
+        groups = {}
+        for group, w in warmups.items():
+            saving = None
+            if w.cold_ms is not None and w.warm_ms is not None:
+                saving = round(w.cold_ms - w.warm_ms, 1)
+            groups[group] = {
+                "proxy": w.proxy,
+                "cold_ms": w.cold_ms,
+                "warm_ms": w.warm_ms,
+                "saving_ms": saving,
+                "age_s": round(now - w.warmed_at, 1),
+                "idle": now - w.used_at > IDLE_AFTER,
+                "error": w.error,
+            }
+        return {"groups": groups}
@@ -0,0 +1,182 @@
+import ipaddress
+import socket
+import struct
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from core.resolver import Resolver, connect_fastest, resolver as default_resolver
+
+PROBE_TIMEOUT = 3
+
+SOCKS_VERSION = 0x05
+SOCKS_NO_AUTH = 0x00
+SOCKS_CMD_CONNECT = 0x01
+SOCKS_ATYP_IPV4 = 0x01
+SOCKS_ATYP_DOMAIN = 0x03
+SOCKS_ATYP_IPV6 = 0x04
+
+# TPKT header + X.224 Connection Request + RDP_NEG_REQ (TLS | CredSSP)
+X224_CONNECTION_REQUEST = bytes.fromhex(
+    "03 00 00 13 0e e0 00 00 00 00 00 01 00 08 00 03 00 00 00"
+)
+X224_TPDU_CONNECTION_CONFIRM = 0xD0
+RDP_NEG_RSP = 0x02
+RDP_NEG_FAILURE = 0x03
+
+
+class ProbeError(Exception):
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+@dataclass
+class ProbeResult:
+    status: str
+    latency: Optional[int] = None
+    dns_ms: Optional[int] = None
+    socks_ms: Optional[int] = None
+    tcp_ms: Optional[int] = None
+    rdp_ms: Optional[int] = None
+    protocol: Optional[int] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def _recv_exact(sock: socket.socket, size: int, stage: str) -> bytes:
+    buf = b""
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ProbeError(stage, "connection closed")
+        buf += chunk
+    return buf
+
+
+def _socks_address(host: str) -> bytes:
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        encoded = host.encode("idna")
+        return bytes([SOCKS_ATYP_DOMAIN, len(encoded)]) + encoded
+    if ip.version == 4:
+        return bytes([SOCKS_ATYP_IPV4]) + ip.packed
+    return bytes([SOCKS_ATYP_IPV6]) + ip.packed
+
+
+def socks5_handshake(sock: socket.socket):
+    sock.sendall(bytes([SOCKS_VERSION, 1, SOCKS_NO_AUTH]))
+    reply = _recv_exact(sock, 2, "socks")
+    if reply[0] != SOCKS_VERSION or reply[1] != SOCKS_NO_AUTH:
+        raise ProbeError("socks", "proxy rejected no-auth method")
+
+
+def socks5_connect(sock: socket.socket, host: str, port: int):
+    sock.sendall(
+        bytes([SOCKS_VERSION, SOCKS_CMD_CONNECT, 0x00])
+        + _socks_address(host)
+        + struct.pack("!H", port)
+    )
+    head = _recv_exact(sock, 4, "tcp")
+    if head[0] != SOCKS_VERSION:
+        raise ProbeError("tcp", "invalid proxy reply")
+    if head[1] != 0x00:
+        raise ProbeError("tcp", f"proxy connect failed: code {head[1]}")
+    atyp = head[3]
+    if atyp == SOCKS_ATYP_IPV4:
+        _recv_exact(sock, 4 + 2, "tcp")
+    elif atyp == SOCKS_ATYP_IPV6:
+        _recv_exact(sock, 16 + 2, "tcp")
+    elif atyp == SOCKS_ATYP_DOMAIN:
+        length = _recv_exact(sock, 1, "tcp")[0]
+        _recv_exact(sock, length + 2, "tcp")
+    else:
+        raise ProbeError("tcp", "invalid proxy bind address")
+
+
+def x224_negotiate(sock: socket.socket) -> Optional[int]:
+    sock.sendall(X224_CONNECTION_REQUEST)
+    tpkt = _recv_exact(sock, 4, "rdp")
+    if tpkt[0] != 0x03:
+        raise ProbeError("rdp", "not an RDP server")
+    length = struct.unpack("!H", tpkt[2:4])[0]
+    if length < 11:
+        raise ProbeError("rdp", "short X.224 reply")
+    body = _recv_exact(sock, length - 4, "rdp")
+    if body[1] & 0xF0 != X224_TPDU_CONNECTION_CONFIRM:
+        raise ProbeError("rdp", "no X.224 connection confirm")
+    neg = body[7:]
+    if len(neg) >= 8 and neg[0] == RDP_NEG_RSP:
+        return struct.unpack("<I", neg[4:8])[0]
+    if len(neg) >= 8 and neg[0] == RDP_NEG_FAILURE:
+        return None
+    return 0
+
+
+# Latency covers the connect only; resolver time is reported as dns_ms.
+def probe_tcp(
+    host: str,
+    port: int,
+    timeout: float = PROBE_TIMEOUT,
+    resolver: Resolver = default_resolver,
+) -> ProbeResult:
+    result = ProbeResult(status="offline")
+    stage = "dns"
+    try:
+        addresses, dns_ms = resolver.resolve(host)
+        result.dns_ms = int(dns_ms)
+        stage = "tcp"
+        start = time.perf_counter()
+        sock = connect_fastest(addresses, port, timeout)
+        result.latency = result.tcp_ms = _elapsed_ms(start)
+        sock.close()
+        result.status = "online"
+    except Exception as e:
+        result.error = f"{stage}: {str(e) or type(e).__name__}"
+    return result
+
+
+def probe_rdp_via_socks(
+    host: str,
+    port: int,
+    proxy_host: str,
+    proxy_port: int,
+    timeout: float = PROBE_TIMEOUT,
+) -> ProbeResult:
+    result = ProbeResult(status="offline")
+    sock = None
+    stage = "socks"
+    try:
+        start = time.perf_counter()
+        sock = socket.create_connection((proxy_host, proxy_port), timeout=timeout)
+        sock.settimeout(timeout)
+        socks5_handshake(sock)
+        result.socks_ms = _elapsed_ms(start)
+
+        stage = "tcp"
+        mark = time.perf_counter()
+        socks5_connect(sock, host, port)
+        result.tcp_ms = _elapsed_ms(mark)
+
+        stage = "rdp"
+        mark = time.perf_counter()
+        result.protocol = x224_negotiate(sock)
+        result.rdp_ms = _elapsed_ms(mark)
+
+        result.latency = _elapsed_ms(start)
+        result.status = "online"
+    except ProbeError as e:
+        result.error = f"{e.stage}: {e}"
+    except Exception as e:
+        result.error = f"{stage}: {str(e) or type(e).__name__}"
+    finally:
+        if sock is not None:
+            sock.close()
+    return result
@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Optional
+from urllib.parse import quote as url_quote
+
+from core.instrument import http_get, http_put
+
+SWITCH_TIMEOUT = 5
+READY_TIMEOUT = 5.0
+READY_POLL = 0.2
+
+
+def normalize_selections(data) -> dict[str, str]:
+    if not isinstance(data, dict):
+        return {}
+    return {str(group): str(proxy) for group, proxy in data.items() if group and proxy}
+
+
+def wait_for_controller(api_base: str, timeout: float = READY_TIMEOUT) -> bool:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if http_get(f"{api_base}/version", timeout=1).status_code == 200:
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(READY_POLL)
+
+
+def _fetch_selectors(api_base: str) -> Optional[dict[str, dict]]:
+    try:
+        resp = http_get(f"{api_base}/proxies", timeout=SWITCH_TIMEOUT)
+        if resp.status_code != 200:
+            return None
+        return resp.json().get("proxies", {})
+    except Exception:
+        return None
+
+
+def _switch_all(api_base: str, selections: dict[str, str]) -> dict[str, Optional[str]]:
+    errors: dict[str, Optional[str]] = {}
+
+    def switch(group: str, proxy: str):
+        try:
+            resp = http_put(
+                f"{api_base}/proxies/{url_quote(group)}",
+                json={"name": proxy},
+                timeout=SWITCH_TIMEOUT,
+            )
+            errors[group] = (
+                None if resp.status_code == 204 else f"HTTP {resp.status_code}"
+            )
+        except Exception as e:
+            errors[group] = str(e) or type(e).__name__
+
+    threads = [
+        threading.Thread(target=switch, args=item, daemon=True)
+        for item in selections.items()
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(SWITCH_TIMEOUT + 1)
+    return {group: errors.get(group, "timed out") for group in selections}
+
+
+# Applies every selection at once. Targets are checked against the engine's
+# groups first, results are verified by reading the selections back, and if
+# anything failed the groups that did change are put back as they were.
+def apply_selections(api_base: str, selections: dict[str, str]) -> dict:
+    start = time.perf_counter()
+    result = {"success": False, "applied": [], "failed": {}, "rolled_back": []}
+    proxies = _fetch_selectors(api_base)
+    if proxies is None:
+        result["failed"] = {group: "controller unavailable" for group in selections}
+        return result
+
+    previous = {}
+    for group, proxy in selections.items():
+        info = proxies.get(group)
+        if info is None or "now" not in info:
+            result["failed"][group] = "no such group"
+        elif proxy not in info.get("all", []):
+            result["failed"][group] = f"{proxy} is not in this group"
+        else:
+            previous[group] = info["now"]
+    if result["failed"]:
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    pending = {g: p for g, p in selections.items() if previous[g] != p}
+    errors = _switch_all(api_base, pending)
+    current = _fetch_selectors(api_base) or {}
+    for group, proxy in selections.items():
+        now = current.get(group, {}).get("now")
+        if errors.get(group):
+            result["failed"][group] = errors[group]
+        elif now != proxy:
+            result["failed"][group] = f"selection is {now}"
+        else:
+            result["applied"].append(group)
+
+    if result["failed"]:
+        # A timed-out switch may still have landed, so restore by what the
+        # engine reports rather than by which requests succeeded.
+        if current:
+            changed = [
+                g for g in pending if current.get(g, {}).get("now") != previous[g]
+            ]
+        else:
+            changed = [g for g in pending if not errors.get(g)]
+        restore = {g: previous[g] for g in changed}
+        restore_errors = _switch_all(api_base, restore)
+        result["rolled_back"] = [g for g in restore if not restore_errors[g]]
+        result["applied"] = []
+    else:
+        result["success"] = True
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
@@ -0,0 +1,150 @@
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from core.regions import OTHER_REGION, region_of
+
+PROVIDER_DIR = "providers"
+PROVIDER_PREFIX = "nodes-"
+# Group types that keep their member list inline: relay cannot use
+# providers, and member order is the priority of a fallback group and the tie
+# break of a url-test group.
+INLINE_GROUP_TYPES = {"relay", "fallback", "url-test"}
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def provider_name(region: str) -> str:
+    return PROVIDER_PREFIX + _UNSAFE_CHARS.sub("_", region.lower())
+
+
+# The engine splits filter strings on backticks, so those are written as a
+# hex escape instead of being left literal.
+def _exact_filter(names: list[str]) -> str:
+    escaped = (re.escape(n).replace("`", r"\x60") for n in names)
+    return f"^(?:{'|'.join(escaped)})$"
+
+
+@dataclass(slots=True)
+class ProviderSet:
+    providers: dict[str, dict] = field(default_factory=dict)
+    members: dict[str, list[str]] = field(default_factory=dict)
+    owner: dict[str, str] = field(default_factory=dict)
+    changed: list[str] = field(default_factory=list)
+
+
+# Writes proxies into one local file provider per region. Files whose content
+# is unchanged are not touched, so after a subscription refresh the engine
+# only has to reload the providers listed in ProviderSet.changed.
+class ProxyProviderWriter:
+    def __init__(self, config_dir: Path):
+        self._dir = config_dir / PROVIDER_DIR
+        self._lock = threading.Lock()
+
+    def _write_if_changed(self, path: Path, data: bytes) -> bool:
+        try:
+            if path.read_bytes() == data:
+                return False
+        except OSError:
+            pass
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return True
+
+    def write(self, proxies: list) -> ProviderSet:
+        import yaml
+
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        grouped: dict[str, list[dict]] = {}
+        result = ProviderSet()
+        for proxy in proxies:
+            name = proxy.get("name")
+            if not isinstance(name, str) or not name:
+                continue
+            provider = _group_region(name)
+            grouped.setdefault(provider, []).append(proxy)
+            result.members.setdefault(provider, []).append(name)
+            result.owner[name] = provider
+
+        with self._lock:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            for provider in sorted(grouped):
+                file_name = f"{provider}.yaml"
+                data = yaml.dump(
+                    {"proxies": grouped[provider]},
+                    Dumper=dumper,
+                    allow_unicode=True,
+                ).encode("utf-8")
+                if self._write_if_changed(self._dir / file_name, data):
+                    result.changed.append(provider)
+                result.providers[provider] = {
+                    "type": "file",
+                    "path": f"./{PROVIDER_DIR}/{file_name}",
+                }
+            for path in self._dir.glob(f"{PROVIDER_PREFIX}*.yaml"):
+                if path.stem not in grouped:
+                    try:
+                        path.unlink()
+                    except OSError as e:
+                        print(f"Proxy provider cleanup error: {e}")
+        return result
+
+
+def _group_region(name: str) -> str:
+    return provider_name(region_of(name) or OTHER_REGION)
+
+
+# Returns the providers a group can use instead of listing its nodes, or
+# None when the group has to keep them inline. Members that are not provider
+# nodes (other groups, DIRECT, pinned nodes) stay in "proxies", which the
+# engine lists ahead of "use"; provider nodes are matched as a set and come
+# back in provider order, narrowed by a filter when a provider holds more.
+def _provider_uses(group: dict, owner: dict[str, str]) -> Optional[list[str]]:
+    if group.get("use") or group.get("type") in INLINE_GROUP_TYPES:
+        return None
+    nodes = [m for m in group.get("proxies") or [] if m in owner]
+    if not nodes or len(set(nodes)) != len(nodes):
+        return None
+    return list(dict.fromkeys(owner[n] for n in nodes))
+
+
+# Nodes of groups that have to stay inline must stay top-level proxies, since
+# inline members cannot name provider nodes. Taking them out of the providers
+# can in turn break other groups, so this repeats until nothing changes.
+def inline_nodes(proxies: list, groups: list) -> set[str]:
+    names = [p["name"] for p in proxies if isinstance(p.get("name"), str) and p["name"]]
+    pinned: set[str] = set()
+    while True:
+        owner = {n: _group_region(n) for n in names if n not in pinned}
+        newly = set()
+        for group in groups:
+            nodes = [m for m in group.get("proxies") or [] if m in owner]
+            if nodes and _provider_uses(group, owner) is None:
+                newly.update(nodes)
+        if not newly:
+            return pinned
+        pinned |= newly
+
+
+def attach_providers(groups: list, provider_set: ProviderSet) -> list:
+    owner = provider_set.owner
+    attached = []
+    for group in groups:
+        used = _provider_uses(group, owner)
+        if used is None:
+            attached.append(group)
+            continue
+        nodes = [m for m in group["proxies"] if m in owner]
+        others = [m for m in group["proxies"] if m not in owner]
+        group = {k: v for k, v in group.items() if k not in ("proxies", "filter")}
+        if others:
+            group["proxies"] = others
+        group["use"] = used
+        if len(nodes) < sum(len(provider_set.members[p]) for p in used):
+            group["filter"] = _exact_filter(nodes)
+        attached.append(group)
+    return attached
@@ -0,0 +1,91 @@
+import sys
+from dataclasses import dataclass, asdict
+from typing import Any, Generic, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def intern_str(value) -> str:
+    return sys.intern(str(value)) if value else ""
+
+
+@dataclass(frozen=True, slots=True)
+class ProxyRecord:
+    name: str
+    type: str
+    server: str
+    port: int
+    # As the subscription gave them; build_servers checks them, so a bad
+    # value can be reported instead of vanishing here.
+    rdp_host: Any = None
+    rdp_port: Any = None
+
+    @classmethod
+    def from_dict(cls, data: dict, index: int = 0) -> "ProxyRecord":
+        nested = data.get("rdp")
+        if isinstance(nested, dict):
+            rdp_host, rdp_port = nested.get("host"), nested.get("port")
+        else:
+            rdp_host, rdp_port = data.get("rdp-host"), data.get("rdp-port")
+        try:
+            port = int(data.get("port") or 0)
+        except (TypeError, ValueError):
+            port = 0
+        return cls(
+            name=data.get("name", f"Server-{index + 1}"),
+            type=intern_str(data.get("type", "")),
+            server=data.get("server", ""),
+            port=port,
+            rdp_host=rdp_host if rdp_host != "" else None,
+            rdp_port=rdp_port if rdp_port != "" else None,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class GroupRecord:
+    name: str
+    type: str
+    proxies: tuple
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GroupRecord":
+        return cls(
+            name=data.get("name", ""),
+            type=intern_str(data.get("type", "select")),
+            proxies=tuple(data.get("proxies", [])),
+        )
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["proxies"] = list(self.proxies)
+        return data
+
+
+# Built once and never modified, so an index can be shared between threads.
+class RecordIndex(Generic[T]):
+    __slots__ = ("_records", "_by_name", "_by_id")
+
+    def __init__(self, records: Iterable[T] = ()):
+        self._records: tuple = tuple(records)
+        self._by_name: dict[str, T] = {}
+        self._by_id: dict[str, T] = {}
+        for record in self._records:
+            self._by_name.setdefault(record.name, record)
+            record_id = getattr(record, "id", None)
+            if record_id is not None:
+                self._by_id[record_id] = record
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __bool__(self) -> bool:
+        return bool(self._records)
+
+    def get(self, record_id: str) -> Optional[T]:
+        return self._by_id.get(record_id)
+
+    def by_name(self, name: str) -> Optional[T]:
+        return self._by_name.get(name)
@@ -0,0 +1,91 @@
+from typing import Iterable, Optional
+
+from core.regions import region_of
+
+GROUP_PREFIX = "auto-"
+GROUP_TYPES = ("url-test", "fallback")
+MIN_NODES = 2
+# Tuned for long-lived RDP sessions: checks only run while a group is in use
+# and rarely, and url-test only moves to a node that is clearly faster, since
+# every switch drops the sessions riding on the old node.
+DEFAULT_SETTINGS = {
+    "type": "url-test",
+    "url": "http://www.gstatic.com/generate_204",
+    "interval": 600,
+    "tolerance": 150,
+    "timeout": 3000,
+    "lazy": True,
+}
+LIMITS = {"interval": (30, 86400), "tolerance": (0, 5000), "timeout": (500, 30000)}
+
+
+def normalize_settings(data) -> dict:
+    settings = dict(DEFAULT_SETTINGS)
+    if not isinstance(data, dict):
+        return settings
+    if data.get("type") in GROUP_TYPES:
+        settings["type"] = data["type"]
+    if isinstance(data.get("url"), str) and data["url"].startswith("http"):
+        settings["url"] = data["url"]
+    for key, (low, high) in LIMITS.items():
+        try:
+            settings[key] = min(high, max(low, int(data[key])))
+        except (KeyError, TypeError, ValueError):
+            pass
+    if "lazy" in data:
+        settings["lazy"] = bool(data["lazy"])
+    return settings
+
+
+def _group(name: str, nodes: list[str], settings: dict) -> dict:
+    group = {
+        "name": name,
+        "type": settings["type"],
+        "proxies": nodes,
+        "url": settings["url"],
+        "interval": settings["interval"],
+        "timeout": settings["timeout"],
+        "lazy": settings["lazy"],
+    }
+    if settings["type"] == "url-test":
+        group["tolerance"] = settings["tolerance"]
+    return group
+
+
+def build_region_groups(
+    proxy_names: Iterable[str], settings: dict, taken: Optional[set[str]] = None
+) -> list[dict]:
+    clusters: dict[str, list[str]] = {}
+    for name in proxy_names:
+        region = region_of(name)
+        if region is not None:
+            clusters.setdefault(region, []).append(name)
+    taken = taken or set()
+    groups = []
+    for region in sorted(clusters):
+        name = GROUP_PREFIX + region.lower()
+        if len(clusters[region]) >= MIN_NODES and name not in taken:
+            groups.append(_group(name, clusters[region], settings))
+    return groups
+
+
+# Adds the generated groups after the subscription's own groups and offers
+# each one as an extra choice in the select groups that hold its nodes, so
+# switching an RDP group to it hands failover to the engine.
+def with_region_groups(proxies: list, proxy_groups: list, settings: dict) -> list:
+    names = [p["name"] for p in proxies if isinstance(p, dict) and p.get("name")]
+    taken = {g.get("name") for g in proxy_groups if isinstance(g, dict)}
+    generated = build_region_groups(names, settings, taken)
+    if not generated:
+        return proxy_groups
+    owner = {node: g["name"] for g in generated for node in g["proxies"]}
+    groups = []
+    for group in proxy_groups:
+        if isinstance(group, dict) and group.get("type") == "select":
+            members = group.get("proxies") or []
+            offered = [owner[m] for m in members if m in owner]
+            extra = [g for g in dict.fromkeys(offered) if g not in members]
+            if extra:
+                group = {**group, "proxies": [*members, *extra]}
+        groups.append(group)
+    return groups + generated
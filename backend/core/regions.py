@@ -0,0 +1,81 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+OTHER_REGION = "OTHER"
+
+# Keywords are matched case-insensitively anywhere in the node name; bare
+# country codes are matched separately as standalone upper-case tokens.
+REGION_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "HK": ("香港", "hong kong", "hongkong"),
+    "TW": ("台湾", "臺灣", "taiwan", "taipei", "台北"),
+    "JP": ("日本", "japan", "tokyo", "osaka", "东京", "大阪"),
+    "SG": ("新加坡", "狮城", "singapore"),
+    "KR": ("韩国", "韓國", "korea", "seoul", "首尔"),
+    "US": (
+        "美国",
+        "美國",
+        "united states",
+        "america",
+        "los angeles",
+        "san jose",
+        "seattle",
+        "洛杉矶",
+        "硅谷",
+    ),
+    "GB": ("英国", "united kingdom", "london", "伦敦"),
+    "DE": ("德国", "germany", "frankfurt", "法兰克福"),
+    "FR": ("法国", "france", "paris", "巴黎"),
+    "NL": ("荷兰", "netherlands", "amsterdam"),
+    "CA": ("加拿大", "canada", "toronto"),
+    "AU": ("澳大利亚", "澳洲", "australia", "sydney"),
+    "RU": ("俄罗斯", "russia", "moscow"),
+    "IN": ("印度", "india", "mumbai"),
+    "TR": ("土耳其", "turkey", "istanbul"),
+    "MY": ("马来西亚", "malaysia"),
+    "TH": ("泰国", "thailand", "bangkok"),
+    "VN": ("越南", "vietnam"),
+    "PH": ("菲律宾", "philippines"),
+    "ID": ("印尼", "indonesia"),
+    "BR": ("巴西", "brazil"),
+    "AR": ("阿根廷", "argentina"),
+    "CN": ("中国", "回国", "china"),
+}
+CODE_ALIASES = {"UK": "GB"}
+
+_KEYWORD_REGION = {kw: code for code, kws in REGION_KEYWORDS.items() for kw in kws}
+# Longest first so "hong kong" wins over any shorter keyword at the same spot.
+_KEYWORD = re.compile(
+    "|".join(re.escape(kw) for kw in sorted(_KEYWORD_REGION, key=len, reverse=True))
+)
+_CODE_TOKEN = re.compile(r"(?<![A-Za-z])([A-Z]{2})(?![A-Za-z])")
+_FLAG = re.compile("([\U0001f1e6-\U0001f1ff]{2})")
+
+
+# Region values from a query are matched against the codes region_of gives,
+# so "uk" finds the nodes indexed as GB.
+def normalize_region(code: str) -> str:
+    code = code.strip().upper()
+    return CODE_ALIASES.get(code, code)
+
+
+def _flag_code(flag: str) -> str:
+    return "".join(chr(ord(c) - 0x1F1E6 + ord("A")) for c in flag)
+
+
+# Node names are the only location hint available offline, so the region is
+# taken from a flag emoji, then the first place name, then a bare country code.
+@lru_cache(maxsize=65536)
+def region_of(name: str) -> Optional[str]:
+    match = _FLAG.search(name)
+    if match:
+        code = _flag_code(match.group(1))
+        return CODE_ALIASES.get(code, code)
+    match = _KEYWORD.search(name.lower())
+    if match:
+        return _KEYWORD_REGION[match.group(0)]
+    for token in _CODE_TOKEN.findall(name):
+        code = CODE_ALIASES.get(token, token)
+        if code in REGION_KEYWORDS:
+            return code
+    return None
@@ -0,0 +1,241 @@
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+# getaddrinfo does not expose record TTLs, so answers are kept for a fixed
+# time; failures are cached briefly so a dead host does not stall each run.
+DEFAULT_TTL = 300.0
+NEGATIVE_TTL = 30.0
+PREFETCH_WORKERS = 32
+# RFC 8305 "Connection Attempt Delay"
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+# (family, sockaddr without the port)
+Address = tuple[int, tuple]
+
+
+class _Flight:
+    __slots__ = ("event", "addresses", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.addresses: Optional[tuple[Address, ...]] = None
+        self.error: Optional[OSError] = None
+
+
+def _literal(host: str) -> Optional[tuple[Address, ...]]:
+    try:
+        ip = ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return None
+    if ip.version == 6:
+        return ((socket.AF_INET6, (str(ip), 0, 0)),)
+    return ((socket.AF_INET, (str(ip),)),)
+
+
+def _with_port(address: Address, port: int) -> tuple[int, tuple]:
+    family, sockaddr = address
+    return family, (sockaddr[0], port, *sockaddr[1:])
+
+
+# Alternate address families, starting with whichever the resolver preferred.
+def _interleave(addresses: Iterable[Address]) -> list[Address]:
+    by_family: dict[int, list[Address]] = {}
+    for address in addresses:
+        by_family.setdefault(address[0], []).append(address)
+    queues = list(by_family.values())
+    ordered = []
+    while queues:
+        for q in queues:
+            ordered.append(q.pop(0))
+        queues = [q for q in queues if q]
+    return ordered
+
+
+class Resolver:
+    def __init__(self, ttl: float = DEFAULT_TTL, negative_ttl: float = NEGATIVE_TTL):
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries: dict[
+            str, tuple[float, tuple[Address, ...], Optional[OSError]]
+        ] = {}
+        self._flights: dict[str, _Flight] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "failures": 0}
+        self._lookup_ms = 0.0
+
+    def _lookup(self, host: str) -> tuple[Address, ...]:
+        infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        seen = {}
+        for family, _, _, _, sockaddr in infos:
+            if family in (socket.AF_INET, socket.AF_INET6):
+                seen.setdefault((family, (sockaddr[0], *sockaddr[2:])), None)
+        if not seen:
+            raise socket.gaierror(socket.EAI_NONAME, f"no addresses for {host}")
+        return tuple(seen)
+
+    # Returns (addresses, dns_ms); dns_ms is 0 for literals and cache hits.
+    def resolve(self, host: str) -> tuple[tuple[Address, ...], float]:
+        literal = _literal(host)
+        if literal is not None:
+            return literal, 0.0
+        key = host.lower()
+        now = time.monotonic()
+        owner = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._stats["hits"] += 1
+                if entry[2] is not None:
+                    raise entry[2].with_traceback(None)
+                return entry[1], 0.0
+            flight = self._flights.get(key)
+            if flight is None:
+                self._stats["misses"] += 1
+                flight = self._flights[key] = _Flight()
+                owner = True
+            else:
+                self._stats["coalesced"] += 1
+
+        start = time.perf_counter()
+        if owner:
+            try:
+                flight.addresses = self._lookup(host)
+            except OSError as e:
+                flight.error = e
+            with self._lock:
+                self._flights.pop(key, None)
+                elapsed = (time.perf_counter() - start) * 1000
+                self._lookup_ms += elapsed
+                if flight.error is not None:
+                    self._stats["failures"] += 1
+                    expires = time.monotonic() + self._negative_ttl
+                    self._entries[key] = (expires, (), flight.error)
+                else:
+                    expires = time.monotonic() + self._ttl
+                    self._entries[key] = (expires, flight.addresses, None)
+            flight.event.set()
+        else:
+            flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.addresses, (time.perf_counter() - start) * 1000
+
+    def prefetch(self, hosts: Iterable[str]) -> dict:
+        pending = {h for h in hosts if h and _literal(h) is None}
+        start = time.perf_counter()
+        failed = 0
+
+        def warm(host: str) -> bool:
+            try:
+                self.resolve(host)
+                return True
+            except OSError:
+                return False
+
+        if pending:
+            workers = min(PREFETCH_WORKERS, len(pending))
+            with ThreadPoolExecutor(workers, thread_name_prefix="dns") as pool:
+                failed = sum(1 for ok in pool.map(warm, pending) if not ok)
+        return {
+            "hosts": len(pending),
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "avg_lookup_ms": round(self._lookup_ms / lookups, 2) if lookups else 0,
+            }
+
+
+# Races connection attempts across the resolved addresses, starting the next
+# one whenever the previous fails or has not answered within the attempt
+# delay. The first socket to connect wins; late winners are closed.
+def connect_fastest(
+    addresses: Iterable[Address],
+    port: int,
+    timeout: float,
+    delay: float = CONNECTION_ATTEMPT_DELAY,
+) -> socket.socket:
+    ordered = [_with_port(a, port) for a in _interleave(addresses)]
+    if not ordered:
+        raise OSError("no addresses to connect to")
+    if len(ordered) == 1:
+        family, sockaddr = ordered[0]
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(sockaddr)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    cond = threading.Condition()
+    state = {"winner": None, "abandoned": False, "failed": 0}
+    errors: list[OSError] = []
+    deadline = time.monotonic() + timeout
+
+    def attempt(family: int, sockaddr: tuple):
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(max(0.01, deadline - time.monotonic()))
+            sock.connect(sockaddr)
+        except OSError as e:
+            sock.close()
+            with cond:
+                errors.append(e)
+                state["failed"] += 1
+                cond.notify()
+            return
+        with cond:
+            if state["winner"] is None and not state["abandoned"]:
+                state["winner"] = sock
+                cond.notify()
+                return
+        sock.close()
+
+    started = 0
+    last_start = 0.0
+    with cond:
+        while True:
+            if state["winner"] is not None:
+                sock = state["winner"]
+                sock.settimeout(timeout)
+                return sock
+            now = time.monotonic()
+            in_flight = started - state["failed"]
+            if started == len(ordered) and in_flight == 0:
+                break
+            if started < len(ordered) and (in_flight == 0 or now - last_start >= delay):
+                threading.Thread(
+                    target=attempt, args=ordered[started], daemon=True
+                ).start()
+                started += 1
+                last_start = now
+                continue
+            remaining = deadline - now
+            if remaining <= 0:
+                break
+            if started < len(ordered):
+                remaining = min(remaining, last_start + delay - now)
+            cond.wait(remaining)
+        state["abandoned"] = True
+    if errors and len(errors) == len(ordered):
+        raise errors[0]
+    raise socket.timeout("timed out")
+
+
+resolver = Resolver()
@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from core.instrument import http_get
+
+RULESET_DIR = "ruleset"
+INDEX_FILE = "index.json"
+DEFAULT_INTERVAL = 86400
+DOWNLOAD_TIMEOUT = 15
+USER_AGENT = "clash-verge/v1.7.7"
+TEXT_BEHAVIORS = {"domain", "ipcidr", "classical"}
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def _file_name(name: str, fmt: str) -> str:
+    return f"{_UNSAFE_CHARS.sub('_', name)}.{'mrs' if fmt == 'mrs' else 'txt'}"
+
+
+def compile_payload(content: bytes, fmt: str) -> Optional[bytes]:
+    text = content.decode("utf-8", errors="replace")
+    if fmt == "yaml":
+        import yaml
+
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        data = yaml.load(text, Loader=loader)
+        if not isinstance(data, dict) or not isinstance(data.get("payload"), list):
+            return None
+        lines = (str(item) for item in data["payload"])
+    else:
+        lines = text.splitlines()
+    entries = {}
+    for line in lines:
+        line = line.strip().strip("'\"")
+        if line and not line.startswith("#"):
+            entries[line] = None
+    return "\n".join(entries).encode("utf-8") + b"\n"
+
+
+# Subscriptions write intervals as numbers or strings; anything that is not a
+# positive number falls back to the default instead of dropping the provider.
+def _interval(value) -> float:
+    try:
+        interval = float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL
+    return interval if interval > 0 else DEFAULT_INTERVAL
+
+
+class RuleProviderCache:
+    def __init__(self, config_dir: Path):
+        self._config_dir = config_dir
+        self._dir = config_dir / RULESET_DIR
+        self._index_path = self._dir / INDEX_FILE
+        self._lock = threading.Lock()
+
+    def _load_index(self) -> dict:
+        try:
+            return json.loads(self._index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, path: Path, data: bytes):
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def _refresh(self, name: str, spec: dict, entry: dict, now: float) -> dict:
+        fmt = spec.get("format", "yaml")
+        path = self._dir / _file_name(name, fmt)
+        url = spec.get("url", "")
+        interval = _interval(spec.get("interval"))
+        cached = path.exists() and entry.get("url") == url
+        if cached and now - entry.get("fetched_at", 0) < interval:
+            return {**entry, "status": "cached"}
+
+        headers = {"User-Agent": USER_AGENT}
+        if cached and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if cached and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            resp = http_get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT)
+            if resp.status_code == 304 and cached:
+                return {**entry, "fetched_at": now, "status": "not_modified"}
+            resp.raise_for_status()
+            data = resp.content if fmt == "mrs" else compile_payload(resp.content, fmt)
+            if not data:
+                raise ValueError("empty or invalid payload")
+            self._write(path, data)
+        except Exception as e:
+            print(f"Rule provider {name} error: {e}")
+            if cached:
+                return {**entry, "status": "stale"}
+            return {"status": "failed", "error": str(e)}
+        return {
+            "url": url,
+            "file": path.name,
+            "format": "mrs" if fmt == "mrs" else "text",
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "size": len(data),
+            "status": "refreshed",
+        }
+
+    # Returns engine-ready provider definitions for the names that could be
+    # served from the local cache, plus per-provider status for diagnostics.
+    def sync(self, providers: dict, names: set[str]) -> tuple[dict, dict]:
+        compiled: dict[str, dict] = {}
+        report: dict[str, dict] = {}
+        with self._lock:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            index = self._load_index()
+            now = time.time()
+            results: dict[str, dict] = {}
+            threads = []
+            for name in sorted(names):
+                spec = providers.get(name)
+                if not isinstance(spec, dict):
+                    continue
+                behavior = spec.get("behavior", "classical")
+                if spec.get("type") == "inline":
+                    compiled[name] = {"type": "inline", "behavior": behavior}
+                    compiled[name]["payload"] = spec.get("payload", [])
+                    report[name] = {"status": "inline"}
+                    continue
+                if spec.get("type") != "http" or behavior not in TEXT_BEHAVIORS:
+                    report[name] = {"status": "unsupported"}
+                    continue
+                t = threading.Thread(
+                    target=lambda n=name, s=spec: results.__setitem__(
+                        n, self._refresh(n, s, index.get(n, {}), now)
+                    )
+                )
+                threads.append(t)
+                t.start()
+            for t in threads:
+                t.join()
+
+            for name, entry in results.items():
+                report[name] = {"status": entry["status"], "size": entry.get("size")}
+                if entry["status"] == "failed":
+                    continue
+                index[name] = {k: v for k, v in entry.items() if k != "status"}
+                compiled[name] = {
+                    "type": "file",
+                    "behavior": providers[name].get("behavior", "classical"),
+                    "format": entry["format"],
+                    "path": f"./{RULESET_DIR}/{entry['file']}",
+                }
+            try:
+                self._write(self._index_path, json.dumps(index, indent=2).encode())
+            except OSError as e:
+                print(f"Rule provider index error: {e}")
+        return compiled, report
@@ -0,0 +1,191 @@
+import ipaddress
+import re
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+LOGIC_TYPES = {"AND", "OR", "NOT", "SUB-RULE"}
+CIDR_TYPES = {"IP-CIDR", "IP-CIDR6", "SRC-IP-CIDR"}
+DOMAIN_TYPES = {"DOMAIN", "DOMAIN-SUFFIX"}
+REJECT_TARGETS = {"REJECT", "REJECT-DROP"}
+PASSTHROUGH_TARGETS = {"DIRECT"} | REJECT_TARGETS
+
+_RULE_SET_REF = re.compile(r"RULE-SET,\s*([^,()]+)")
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts = []
+    depth = 0
+    start = 0
+    for i, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return parts
+
+
+@dataclass(slots=True)
+class Rule:
+    type: str
+    payload: str
+    target: str
+    options: tuple = ()
+
+    @classmethod
+    def parse(cls, text) -> Optional["Rule"]:
+        if not isinstance(text, str):
+            return None
+        parts = text.split(",")
+        rule_type = parts[0].strip().upper()
+        if rule_type in LOGIC_TYPES:
+            parts = [rule_type, *_split_top_level(text[len(parts[0]) + 1 :])]
+        if rule_type == "MATCH":
+            return cls(rule_type, "", parts[1].strip()) if len(parts) > 1 else None
+        if len(parts) < 3:
+            return None
+        target = parts[2].strip()
+        if not target:
+            return None
+        options = tuple(p.strip() for p in parts[3:]) if len(parts) > 3 else ()
+        return cls(rule_type, parts[1].strip(), target, options)
+
+    def to_string(self) -> str:
+        if self.type == "MATCH":
+            return f"MATCH,{self.target}"
+        return ",".join((self.type, self.payload, self.target, *self.options))
+
+
+def _covered_by_suffix(domain: str, suffixes: set[str]) -> bool:
+    while suffixes:
+        if domain in suffixes:
+            return True
+        dot = domain.find(".")
+        if dot < 0:
+            return False
+        domain = domain[dot + 1 :]
+    return False
+
+
+def _collapse(run: list[Rule]) -> list[Rule]:
+    if len(run) == 1:
+        return run
+    first = run[0]
+    try:
+        networks = [ipaddress.ip_network(r.payload, strict=False) for r in run]
+    except ValueError:
+        return run
+    collapsed = []
+    for version in (4, 6):
+        same = [n for n in networks if n.version == version]
+        if same:
+            collapsed.extend(ipaddress.collapse_addresses(same))
+    return [Rule(first.type, str(n), first.target, first.options) for n in collapsed]
+
+
+def rule_set_names(rules: Iterable[str]) -> set[str]:
+    names = set()
+    for rule in rules:
+        if "RULE-SET," in rule:
+            names.update(n.strip() for n in _RULE_SET_REF.findall(rule))
+    return names
+
+
+def select_rules(
+    rules: list[Rule], targets: set[str], providers: frozenset = frozenset()
+) -> list[Rule]:
+    selected = []
+    final = None
+    for rule in rules:
+        if rule.type == "MATCH":
+            if rule.target in targets or rule.target in PASSTHROUGH_TARGETS:
+                final = rule
+            break
+        # A rule that points at a provider we cannot serve would stop the
+        # engine from loading the config at all.
+        if rule.type == "RULE-SET" and rule.payload not in providers:
+            continue
+        if rule.type in LOGIC_TYPES and not rule_set_names([rule.payload]) <= providers:
+            continue
+        if rule.target in targets or rule.target in PASSTHROUGH_TARGETS:
+            selected.append(rule)
+    if final is None:
+        final = Rule("MATCH", "", "DIRECT")
+    # DIRECT rules right before MATCH,DIRECT only restate the fallback.
+    if final.target == "DIRECT":
+        while selected and selected[-1].target == "DIRECT":
+            selected.pop()
+    selected.append(final)
+    return selected
+
+
+# Rules are evaluated top to bottom, so anything an earlier rule already
+# matches can never fire and is dropped whatever its target.
+def merge_rules(rules: list[Rule], stats: dict) -> list[Rule]:
+    merged = []
+    seen = set()
+    suffixes: set[str] = set()
+    run: list[Rule] = []
+
+    def flush():
+        if run:
+            collapsed = _collapse(run)
+            stats["cidrs_collapsed"] += len(run) - len(collapsed)
+            merged.extend(collapsed)
+            run.clear()
+
+    for rule in rules:
+        key = (rule.type, rule.payload.lower(), rule.options)
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+        if rule.type in DOMAIN_TYPES:
+            domain = rule.payload.lower().rstrip(".")
+            if _covered_by_suffix(domain, suffixes):
+                stats["shadowed"] += 1
+                continue
+            if rule.type == "DOMAIN-SUFFIX":
+                suffixes.add(domain)
+        if rule.type in CIDR_TYPES:
+            if run and (run[0].type, run[0].target, run[0].options) != (
+                rule.type,
+                rule.target,
+                rule.options,
+            ):
+                flush()
+            run.append(rule)
+            continue
+        flush()
+        merged.append(rule)
+    flush()
+    return merged
+
+
+def compile_rules(
+    rules: Iterable, targets: set[str], providers: frozenset = frozenset()
+) -> tuple[list[str], dict]:
+    stats = {"duplicates": 0, "shadowed": 0, "cidrs_collapsed": 0}
+    start = time.perf_counter()
+    parsed = [r for r in map(Rule.parse, rules) if r is not None]
+    parsed_at = time.perf_counter()
+    selected = select_rules(parsed, targets, providers)
+    selected_at = time.perf_counter()
+    merged = merge_rules(selected, stats)
+    merged_at = time.perf_counter()
+    output = [r.to_string() for r in merged]
+    done = time.perf_counter()
+    stats.update(
+        rules_in=len(parsed),
+        rules_selected=len(selected),
+        rules_out=len(output),
+        parse_ms=round((parsed_at - start) * 1000, 2),
+        select_ms=round((selected_at - parsed_at) * 1000, 2),
+        merge_ms=round((merged_at - selected_at) * 1000, 2),
+        total_ms=round((done - start) * 1000, 2),
+    )
+    return output, stats
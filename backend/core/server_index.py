@@ -0,0 +1,248 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional
+
+from core.records import RecordIndex
+from core.regions import OTHER_REGION, normalize_region, region_of
+from core.servers import RdpServer
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+SORT_KEYS = ("default", "latency", "name")
+# Upper bounds in ms; a latency at or above the last edge falls in "500+".
+LATENCY_EDGES = (50, 100, 200, 500)
+LATENCY_BUCKETS = ("0-50", "50-100", "100-200", "200-500", "500+")
+NO_LATENCY = "none"
+# Sorts servers without a measured latency after every measured one.
+_UNMEASURED = float("inf")
+
+
+def latency_bucket(latency: Optional[int]) -> str:
+    if latency is None:
+        return NO_LATENCY
+    return LATENCY_BUCKETS[bisect_right(LATENCY_EDGES, latency)]
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _as_set(value) -> Optional[set[str]]:
+    if value is None or value == "" or value == []:
+        return None
+    if isinstance(value, str):
+        return {value}
+    return {str(v) for v in value}
+
+
+def encode_cursor(sort: str, key: tuple) -> str:
+    raw = json.dumps([sort, *key], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(data, list) or len(data) < 2 or data[0] != sort:
+        raise ValueError("cursor does not match the sort order")
+    key = data[1:]
+    if sort == "latency" and key[0] is None:
+        key[0] = _UNMEASURED
+    return tuple(key)
+
+
+# Everything derived from names, hosts and groups. Probe runs replace servers
+# without touching these, so the text index is carried over to the next
+# ServerIndex instead of being rebuilt.
+class _StaticIndex:
+    def __init__(self, servers: tuple):
+        self.identity = tuple((s.name, s.host, s.groups) for s in servers)
+        self.text: list[str] = []
+        self.trigrams: dict[str, list[int]] = {}
+        self.by_region: dict[str, set[int]] = {}
+        self.by_group: dict[str, set[int]] = {}
+        names, hosts = [], []
+        for pos, server in enumerate(servers):
+            name, host = server.name.lower(), server.host.lower()
+            # NUL never appears in a query, so no match spans both fields.
+            text = f"{name}\0{host}"
+            self.text.append(text)
+            for gram in _trigrams(text):
+                self.trigrams.setdefault(gram, []).append(pos)
+            names.append((name, pos))
+            hosts.append((host, pos))
+            region = region_of(server.name) or OTHER_REGION
+            self.by_region.setdefault(region, set()).add(pos)
+            for group in server.groups:
+                self.by_group.setdefault(group, set()).add(pos)
+        self.names = sorted(names)
+        self.hosts = sorted(hosts)
+
+    def matches(self, servers: tuple) -> bool:
+        return self.identity == tuple((s.name, s.host, s.groups) for s in servers)
+
+    def _prefix(self, entries: list, text: str) -> set[int]:
+        start = bisect_left(entries, (text,))
+        end = bisect_left(entries, (text + "\uffff",), start)
+        return {pos for _, pos in entries[start:end]}
+
+    # Queries of three characters or more are substring matches found through
+    # the trigram postings; shorter ones match the start of a name or host.
+    def search(self, query: str) -> set[int]:
+        query = query.lower()
+        if len(query) < 3:
+            return self._prefix(self.names, query) | self._prefix(self.hosts, query)
+        postings = []
+        for gram in _trigrams(query):
+            posting = self.trigrams.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates: Iterable[int] = postings[0]
+        if len(postings) > 1:
+            candidates = set(postings[1]).intersection(postings[0])
+        text = self.text
+        return {pos for pos in candidates if query in text[pos]}
+
+
+class ServerIndex:
+    def __init__(
+        self, servers: RecordIndex[RdpServer], previous: Optional["ServerIndex"] = None
+    ):
+        self.servers = servers
+        self._records: tuple = tuple(servers)
+        static = previous._static if previous is not None else None
+        if static is None or not static.matches(self._records):
+            static = _StaticIndex(self._records)
+        self._static = static
+        self.by_status: dict[str, set[int]] = {}
+        self.by_latency: dict[str, set[int]] = {}
+        for pos, server in enumerate(self._records):
+            self.by_status.setdefault(server.status, set()).add(pos)
+            self.by_latency.setdefault(latency_bucket(server.latency), set()).add(pos)
+        self._orders: dict[str, tuple[list[tuple], list[int]]] = {}
+        self._dicts: dict[int, dict] = {}
+
+    def _key(self, sort: str, pos: int) -> tuple:
+        if sort == "latency":
+            latency = self._records[pos].latency
+            return (_UNMEASURED if latency is None else latency, pos)
+        if sort == "name":
+            return (self._static.text[pos].split("\0", 1)[0], pos)
+        return (pos,)
+
+    # Sorted keys plus each position's rank in them, built once per sort. A
+    # filtered subset is ordered by sorting its ranks, which are plain ints.
+    def _order(self, sort: str) -> tuple[list[tuple], list[int]]:
+        order = self._orders.get(sort)
+        if order is None:
+            if sort == "name":
+                keys = self._static.names
+            else:
+                keys = sorted(self._key(sort, p) for p in range(len(self._records)))
+            rank = [0] * len(keys)
+            for i, key in enumerate(keys):
+                rank[key[-1]] = i
+            order = (keys, rank)
+            self._orders[sort] = order
+        return order
+
+    def _to_dict(self, pos: int) -> dict:
+        data = self._dicts.get(pos)
+        if data is None:
+            data = self._records[pos].to_dict()
+            self._dicts[pos] = data
+        return data
+
+    def _filter(self, query: str, filters: list[tuple[dict, Optional[set]]]):
+        sets = []
+        for index, wanted in filters:
+            if wanted is None:
+                continue
+            matched = [index[value] for value in wanted if value in index]
+            if not matched:
+                return set()
+            sets.append(
+                matched[0].union(*matched[1:]) if len(matched) > 1 else matched[0]
+            )
+        if query:
+            sets.append(self._static.search(query))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def facets(self) -> dict:
+        return {
+            "status": {k: len(v) for k, v in self.by_status.items()},
+            "region": {k: len(v) for k, v in self._static.by_region.items()},
+            "group": {k: len(v) for k, v in self._static.by_group.items()},
+            "latency": {k: len(v) for k, v in self.by_latency.items()},
+        }
+
+    # Pages are keyset-based: the cursor holds the sort key of the last item
+    # returned, so pages stay consistent when a probe run reorders servers
+    # between requests.
+    def query(
+        self,
+        query: str = "",
+        status=None,
+        region=None,
+        group=None,
+        latency=None,
+        sort: str = "default",
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> dict:
+        if sort not in SORT_KEYS:
+            raise ValueError(f"unknown sort {sort}")
+        limit = max(1, min(MAX_LIMIT, int(limit)))
+        regions = _as_set(region)
+        candidates = self._filter(
+            (query or "").strip(),
+            [
+                (self.by_status, _as_set(status)),
+                (
+                    self._static.by_region,
+                    {normalize_region(r) for r in regions} if regions else None,
+                ),
+                (self._static.by_group, _as_set(group)),
+                (self.by_latency, _as_set(latency)),
+            ],
+        )
+        after = decode_cursor(cursor, sort) if cursor else None
+        total = len(self._records) if candidates is None else len(candidates)
+
+        ordered, rank = self._order(sort)
+        start = bisect_right(ordered, after) if after else 0
+        if candidates is None:
+            keys = ordered[start : start + limit + 1]
+        elif len(candidates) * 8 < len(ordered):
+            ranks = sorted(map(rank.__getitem__, candidates))
+            first = bisect_left(ranks, start)
+            keys = [ordered[r] for r in ranks[first : first + limit + 1]]
+        else:
+            keys = []
+            for key in ordered[start:]:
+                if key[-1] in candidates:
+                    keys.append(key)
+                    if len(keys) > limit:
+                        break
+
+        has_more = len(keys) > limit
+        keys = keys[:limit]
+        next_cursor = None
+        if has_more and keys:
+            last = keys[-1]
+            if sort == "latency" and last[0] == _UNMEASURED:
+                last = (None, last[1])
+            next_cursor = encode_cursor(sort, last)
+        return {
+            "items": [self._to_dict(key[-1]) for key in keys],
+            "total": total,
+            "next_cursor": next_cursor,
+        }
@@ -0,0 +1,149 @@
+import json
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Iterable, Optional
+
+from core.config_gen import RDP_GROUP_KEYWORDS
+from core.records import GroupRecord, ProxyRecord, intern_str
+
+RDP_DEFAULT_PORT = 3389
+OVERRIDES_FILE = "server_overrides.json"
+
+SOURCE_PROXY = "proxy"
+SOURCE_SUBSCRIPTION = "subscription"
+SOURCE_OVERRIDE = "override"
+
+
+@dataclass(frozen=True, slots=True)
+class RdpServer:
+    id: str
+    name: str
+    host: str
+    port: int = RDP_DEFAULT_PORT
+    proxy: str = ""
+    groups: tuple = ()
+    source: str = SOURCE_PROXY
+    status: str = "unknown"
+    latency: Optional[int] = None
+    # Not persisted; resolver timing only matters for the latest probe.
+    dns_ms: Optional[int] = None
+    socks_ms: Optional[int] = None
+    tcp_ms: Optional[int] = None
+    rdp_ms: Optional[int] = None
+
+    # Every field is a scalar apart from groups, so the recursive copy asdict
+    # makes is not needed.
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["groups"] = list(self.groups)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RdpServer":
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in data.items() if k in known}
+        values["groups"] = tuple(intern_str(g) for g in values.get("groups", ()))
+        values["source"] = intern_str(values.get("source", SOURCE_PROXY))
+        values["proxy"] = values.get("proxy") or values.get("name", "")
+        return cls(**values)
+
+
+def load_overrides(config_dir: Path) -> dict:
+    path = config_dir / OVERRIDES_FILE
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _valid_port(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    try:
+        port = int(value)
+    except (TypeError, ValueError):
+        return None
+    return port if 0 < port < 65536 else None
+
+
+# Returns the override's port, or None when the entry is not usable: a bad
+# hand-edited entry should cost one server its override, not the whole list.
+def _override_port(override: dict, default: int) -> Optional[int]:
+    if not all(isinstance(override.get(k, ""), str) for k in ("host", "proxy")):
+        return None
+    return _valid_port(override.get("port", default))
+
+
+# The same goes for a subscription's rdp-host/rdp-port: a bad value leaves
+# the server on the proxy's own address instead of failing the load.
+def _subscription_endpoint(
+    proxy: ProxyRecord, host: str, port: int
+) -> Optional[tuple[str, int]]:
+    if proxy.rdp_host is not None:
+        if not isinstance(proxy.rdp_host, str) or len(proxy.rdp_host.split()) != 1:
+            return None
+        host = proxy.rdp_host.strip()
+    if proxy.rdp_port is not None:
+        port = _valid_port(proxy.rdp_port)
+        if port is None:
+            return None
+    return host, port
+
+
+def _group_membership(proxy_groups: Iterable[GroupRecord]) -> dict[str, tuple]:
+    membership: dict[str, tuple] = {}
+    for group in proxy_groups:
+        if not any(kw in group.name.lower() for kw in RDP_GROUP_KEYWORDS):
+            continue
+        name = intern_str(group.name)
+        for member in group.proxies:
+            membership[member] = membership.get(member, ()) + (name,)
+    return membership
+
+
+def build_servers(
+    proxies: Iterable[ProxyRecord],
+    proxy_groups: Iterable[GroupRecord],
+    overrides: Optional[dict] = None,
+) -> list[RdpServer]:
+    overrides = overrides or {}
+    membership = _group_membership(proxy_groups)
+    servers = []
+    for i, proxy in enumerate(proxies):
+        values = {
+            "host": proxy.server,
+            "port": RDP_DEFAULT_PORT,
+            "proxy": proxy.name,
+            "groups": membership.get(proxy.name, ()),
+            "source": SOURCE_PROXY,
+        }
+
+        if proxy.rdp_host is not None or proxy.rdp_port is not None:
+            endpoint = _subscription_endpoint(proxy, values["host"], values["port"])
+            if endpoint is None:
+                print(
+                    f"Subscription RDP endpoint error: invalid entry for {proxy.name}"
+                )
+            else:
+                values["source"] = SOURCE_SUBSCRIPTION
+                values["host"], values["port"] = endpoint
+
+        override = overrides.get(proxy.name)
+        port = None
+        if isinstance(override, dict):
+            port = _override_port(override, values["port"])
+            if port is None:
+                print(f"Server override error: invalid entry for {proxy.name}")
+        if port is not None:
+            values["source"] = SOURCE_OVERRIDE
+            values["host"] = override.get("host") or values["host"]
+            values["port"] = port
+            values["proxy"] = override.get("proxy", values["proxy"])
+            if isinstance(override.get("groups"), list):
+                values["groups"] = tuple(intern_str(g) for g in override["groups"])
+
+        servers.append(RdpServer(id=str(i + 1), name=proxy.name, **values))
+    return servers
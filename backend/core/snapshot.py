@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+SNAPSHOT_FILE = "ui_snapshot.json"
+SNAPSHOT_VERSION = 1
+WRITE_DELAY = 1.0
+SERVER_FIELDS = ("id", "name", "host", "port", "status", "latency")
+GROUP_FIELDS = ("name", "type", "now", "proxies")
+
+
+# Servers and groups are stored as rows rather than objects to keep the file
+# small; get() expands them back into the shape the bridge methods return.
+class UiSnapshot:
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._data: Optional[dict] = None
+        self._saved_at: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def _load(self) -> dict:
+        if self._data is None:
+            self._data = {}
+            try:
+                raw = json.loads(self._path.read_text(encoding="utf-8"))
+                if raw.get("v") == SNAPSHOT_VERSION:
+                    self._data = raw.get("data") or {}
+                    self._saved_at = raw.get("saved_at")
+            except (OSError, ValueError, AttributeError):
+                pass
+        return self._data
+
+    def get(self) -> dict:
+        with self._lock:
+            data = self._load()
+            return {
+                "stale": True,
+                "saved_at": self._saved_at,
+                "status": data.get("status"),
+                "run_mode": data.get("run_mode"),
+                "servers": [
+                    dict(zip(SERVER_FIELDS, row)) for row in data.get("servers", [])
+                ],
+                "proxy_groups": [
+                    dict(zip(GROUP_FIELDS, row)) for row in data.get("proxy_groups", [])
+                ],
+            }
+
+    def update(self, key: str, value):
+        with self._lock:
+            data = self._load()
+            if data.get(key) == value:
+                return
+            data[key] = value
+            if self._timer is None:
+                # Not a daemon: a pending write still lands when the app exits.
+                self._timer = threading.Timer(WRITE_DELAY, self.flush)
+                self._timer.start()
+
+    def update_servers(self, servers: list[dict]):
+        self.update("servers", [[s.get(f) for f in SERVER_FIELDS] for s in servers])
+
+    def update_groups(self, groups: list[dict]):
+        self.update(
+            "proxy_groups",
+            [
+                [g.get("name"), g.get("type"), g.get("now"), list(g.get("proxies", []))]
+                for g in groups
+            ],
+        )
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            if self._data is None:
+                return
+            self._saved_at = time.time()
+            payload = json.dumps(
+                {"v": SNAPSHOT_VERSION, "saved_at": self._saved_at, "data": self._data},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        with self._write_lock:
+            tmp_path = self._path.with_suffix(".tmp")
+            try:
+                tmp_path.write_text(payload, encoding="utf-8")
+                os.replace(tmp_path, self._path)
+            except OSError as e:
+                print(f"Snapshot save error: {e}")
@@ -0,0 +1,51 @@
+import threading
+import time
+from typing import Optional
+
+# main.py imports this module first, so this is as close to process start as
+# the interpreter lets us get without psutil.
+PROCESS_START = time.perf_counter()
+
+WINDOW_MARK = "window_shown"
+INTERACTIVE_MARKS = ("window_loaded", "backend_ready")
+
+
+class StartupTrace:
+    def __init__(self, origin: float = PROCESS_START):
+        self._origin = origin
+        self._lock = threading.Lock()
+        self._marks: dict[str, float] = {}
+        self._reported = False
+
+    def mark(self, name: str):
+        elapsed = (time.perf_counter() - self._origin) * 1000
+        with self._lock:
+            self._marks.setdefault(name, round(elapsed, 1))
+            report = not self._reported and self.time_to_interactive() is not None
+            if report:
+                self._reported = True
+        if report:
+            print(
+                f"Startup: window {self.time_to_window()} ms, "
+                f"interactive {self.time_to_interactive()} ms"
+            )
+
+    def time_to_window(self) -> Optional[float]:
+        return self._marks.get(WINDOW_MARK)
+
+    def time_to_interactive(self) -> Optional[float]:
+        marks = [self._marks.get(name) for name in INTERACTIVE_MARKS]
+        if any(value is None for value in marks):
+            return None
+        return max(marks)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "marks": dict(sorted(self._marks.items(), key=lambda item: item[1])),
+                "time_to_window_ms": self.time_to_window(),
+                "time_to_interactive_ms": self.time_to_interactive(),
+            }
+
+
+trace = StartupTrace()
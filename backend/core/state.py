@@ -0,0 +1,48 @@
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Callable, Optional
+
+from core.records import GroupRecord, RecordIndex
+from core.servers import RdpServer
+
+
+@dataclass(frozen=True, slots=True)
+class AppState:
+    subscription_url: str = ""
+    servers: RecordIndex[RdpServer] = field(default_factory=RecordIndex)
+    proxy_groups: RecordIndex[GroupRecord] = field(default_factory=RecordIndex)
+    version: int = 0
+
+
+# Readers take `current` once and work from that snapshot without locking;
+# rebinding the attribute is atomic, so they always see a whole state. Writers
+# are serialised so an update never builds on a state another writer replaced.
+# on_change and persist run inside that serialised section, so derived data
+# and the store are updated in the same order the states were published.
+class StateHolder:
+    def __init__(
+        self,
+        initial: AppState = AppState(),
+        on_change: Optional[Callable[[AppState], None]] = None,
+    ):
+        self._current = initial
+        self._on_change = on_change
+        self._write_lock = threading.Lock()
+
+    @property
+    def current(self) -> AppState:
+        return self._current
+
+    def update(
+        self,
+        change: Callable[[AppState], AppState],
+        persist: Optional[Callable[[AppState], None]] = None,
+    ) -> AppState:
+        with self._write_lock:
+            state = change(self._current)
+            self._current = replace(state, version=self._current.version + 1)
+            if self._on_change is not None:
+                self._on_change(self._current)
+            if persist is not None:
+                persist(self._current)
+            return self._current
@@ -0,0 +1,405 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from core.records import GroupRecord
+from core.servers import RdpServer
+
+DB_FILE = "nextdesk.db"
+MEMORY_DB = Path(":memory:")
+SCHEMA_VERSION = 2
+LATENCY_HISTORY_DAYS = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    url TEXT PRIMARY KEY,
+    active INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS servers (
+    id TEXT PRIMARY KEY,
+    position INTEGER,
+    name TEXT,
+    host TEXT,
+    port INTEGER,
+    proxy TEXT,
+    groups TEXT,
+    source TEXT,
+    status TEXT,
+    latency INTEGER,
+    socks_ms INTEGER,
+    tcp_ms INTEGER,
+    rdp_ms INTEGER
+);
+CREATE TABLE IF NOT EXISTS groups (
+    name TEXT PRIMARY KEY,
+    position INTEGER,
+    type TEXT,
+    proxies TEXT
+);
+CREATE TABLE IF NOT EXISTS latency_history (
+    server_key TEXT,
+    ts REAL,
+    status TEXT,
+    latency INTEGER
+);
+CREATE INDEX IF NOT EXISTS latency_history_server ON latency_history (server_key, ts);
+CREATE TABLE IF NOT EXISTS preferences (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    selections TEXT,
+    updated_at REAL
+);
+"""
+
+SERVER_COLUMNS = (
+    "id",
+    "position",
+    "name",
+    "host",
+    "port",
+    "proxy",
+    "groups",
+    "source",
+    "status",
+    "latency",
+    "socks_ms",
+    "tcp_ms",
+    "rdp_ms",
+)
+GROUP_COLUMNS = ("name", "position", "type", "proxies")
+
+
+def _server_row(position: int, server: RdpServer) -> tuple:
+    return (
+        server.id,
+        position,
+        server.name,
+        server.host,
+        server.port,
+        server.proxy,
+        json.dumps(list(server.groups), ensure_ascii=False),
+        server.source,
+        server.status,
+        server.latency,
+        server.socks_ms,
+        server.tcp_ms,
+        server.rdp_ms,
+    )
+
+
+# Server ids are list positions and move when the subscription changes, so
+# history is kept under what identifies the endpoint instead.
+def _history_key(name: str, host: str, port: int) -> str:
+    return json.dumps([name, host, port], ensure_ascii=False)
+
+
+def _row_history_key(row: tuple) -> str:
+    return _history_key(row[2], row[3], row[4])
+
+
+def _group_row(position: int, group: GroupRecord) -> tuple:
+    return (
+        group.name,
+        position,
+        group.type,
+        json.dumps(list(group.proxies), ensure_ascii=False),
+    )
+
+
+class StateStore:
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._server_rows: dict[str, tuple] = {}
+        self._group_rows: dict[str, tuple] = {}
+        with self.transaction() as conn:
+            if int(self._get_meta("schema_version") or SCHEMA_VERSION) < 2:
+                self._rekey_latency_history(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+        self._prime_row_cache()
+
+    # Version 1 keyed history by server id; the servers table still maps the
+    # ids it was written with to their endpoints. Rows for ids that no longer
+    # exist cannot be attributed and are dropped.
+    def _rekey_latency_history(self, conn: sqlite3.Connection):
+        rows = conn.execute(
+            "SELECT s.name, s.host, s.port, h.ts, h.status, h.latency "
+            "FROM latency_history h JOIN servers s ON s.id = h.server_id"
+        ).fetchall()
+        conn.execute("DROP TABLE latency_history")
+        conn.execute(
+            "CREATE TABLE latency_history "
+            "(server_key TEXT, ts REAL, status TEXT, latency INTEGER)"
+        )
+        conn.execute(
+            "CREATE INDEX latency_history_server ON latency_history (server_key, ts)"
+        )
+        conn.executemany(
+            "INSERT INTO latency_history (server_key, ts, status, latency) "
+            "VALUES (?, ?, ?, ?)",
+            [(_history_key(*row[:3]), *row[3:]) for row in rows],
+        )
+
+    def _prime_row_cache(self):
+        self._server_rows = {
+            row[0]: row
+            for row in self._conn.execute(
+                f"SELECT {', '.join(SERVER_COLUMNS)} FROM servers"
+            )
+        }
+        self._group_rows = {
+            row[0]: row
+            for row in self._conn.execute(
+                f"SELECT {', '.join(GROUP_COLUMNS)} FROM groups"
+            )
+        }
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # A failed COMMIT can leave the transaction open; the row
+                # cache already holds the rows that were not written.
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                self._prime_row_cache()
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def migrate_from_json(self, config_file: Path) -> bool:
+        if not config_file.exists():
+            return False
+        with self._lock:
+            if self._get_meta("migrated_config_json"):
+                return False
+            data = json.loads(config_file.read_text(encoding="utf-8"))
+            if not isinstance(data, dict):
+                raise ValueError(f"{config_file.name} is not a JSON object")
+            with self.transaction() as conn:
+                if data.get("subscription_url"):
+                    self._set_subscription_url(conn, data["subscription_url"])
+                self._save_servers(
+                    conn,
+                    [
+                        RdpServer.from_dict(s)
+                        for s in data.get("servers", [])
+                        if isinstance(s, dict)
+                    ],
+                )
+                self._save_groups(
+                    conn,
+                    [
+                        GroupRecord.from_dict(g)
+                        for g in data.get("proxy_groups", [])
+                        if isinstance(g, dict)
+                    ],
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) "
+                    "VALUES ('migrated_config_json', ?)",
+                    (str(time.time()),),
+                )
+        config_file.replace(config_file.with_suffix(".json.migrated"))
+        return True
+
+    def get_subscription_url(self) -> str:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url FROM subscriptions WHERE active = 1"
+            ).fetchone()
+        return row[0] if row else ""
+
+    def _set_subscription_url(self, conn: sqlite3.Connection, url: str):
+        conn.execute("UPDATE subscriptions SET active = 0 WHERE active = 1")
+        conn.execute(
+            "INSERT INTO subscriptions (url, active, updated_at) VALUES (?, 1, ?) "
+            "ON CONFLICT(url) DO UPDATE SET active = 1, updated_at = excluded.updated_at",
+            (url, time.time()),
+        )
+
+    def load_servers(self) -> list[RdpServer]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SERVER_COLUMNS)} FROM servers ORDER BY position"
+            ).fetchall()
+            self._server_rows = {row[0]: row for row in rows}
+        servers = []
+        for row in rows:
+            data = dict(zip(SERVER_COLUMNS, row))
+            del data["position"]
+            data["groups"] = json.loads(data["groups"] or "[]")
+            servers.append(RdpServer.from_dict(data))
+        return servers
+
+    def _save_servers(self, conn: sqlite3.Connection, servers: Iterable[RdpServer]):
+        rows = {}
+        for position, server in enumerate(servers):
+            row = _server_row(position, server)
+            rows[row[0]] = row
+        changed = [
+            row for key, row in rows.items() if self._server_rows.get(key) != row
+        ]
+        removed = [(key,) for key in self._server_rows if key not in rows]
+        if removed:
+            conn.executemany("DELETE FROM servers WHERE id = ?", removed)
+        kept = {_row_history_key(row) for row in rows.values()}
+        gone = {_row_history_key(row) for row in self._server_rows.values()} - kept
+        if gone:
+            conn.executemany(
+                "DELETE FROM latency_history WHERE server_key = ?",
+                [(key,) for key in gone],
+            )
+        if changed:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO servers ({', '.join(SERVER_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(SERVER_COLUMNS))})",
+                changed,
+            )
+        self._server_rows = rows
+
+    def load_groups(self) -> list[GroupRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(GROUP_COLUMNS)} FROM groups ORDER BY position"
+            ).fetchall()
+            self._group_rows = {row[0]: row for row in rows}
+        return [
+            GroupRecord.from_dict(
+                {"name": row[0], "type": row[2], "proxies": json.loads(row[3] or "[]")}
+            )
+            for row in rows
+        ]
+
+    def _save_groups(self, conn: sqlite3.Connection, groups: Iterable[GroupRecord]):
+        rows = {}
+        for position, group in enumerate(groups):
+            row = _group_row(position, group)
+            rows[row[0]] = row
+        changed = [row for key, row in rows.items() if self._group_rows.get(key) != row]
+        removed = [(key,) for key in self._group_rows if key not in rows]
+        if removed:
+            conn.executemany("DELETE FROM groups WHERE name = ?", removed)
+        if changed:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO groups ({', '.join(GROUP_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(GROUP_COLUMNS))})",
+                changed,
+            )
+        self._group_rows = rows
+
+    def save_subscription(
+        self, url: str, servers: Iterable[RdpServer], groups: Iterable[GroupRecord]
+    ):
+        with self.transaction() as conn:
+            self._set_subscription_url(conn, url)
+            self._save_servers(conn, servers)
+            self._save_groups(conn, groups)
+
+    def record_probe_results(self, servers: Iterable[RdpServer], probed: set):
+        now = time.time()
+        with self.transaction() as conn:
+            self._save_servers(conn, servers)
+            conn.executemany(
+                "INSERT INTO latency_history (server_key, ts, status, latency) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (_row_history_key(row), now, row[8], row[9])
+                    for key, row in self._server_rows.items()
+                    if key in probed
+                ],
+            )
+            conn.execute(
+                "DELETE FROM latency_history WHERE ts < ?",
+                (now - LATENCY_HISTORY_DAYS * 86400,),
+            )
+
+    def latency_history(self, server: RdpServer, limit: int = 100) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, status, latency FROM latency_history "
+                "WHERE server_key = ? ORDER BY ts DESC LIMIT ?",
+                (_history_key(server.name, server.host, server.port), limit),
+            ).fetchall()
+        return [
+            {"ts": ts, "status": status, "latency": lat} for ts, status, lat in rows
+        ]
+
+    def get_preference(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM preferences WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_preference(self, key: str, value: Any):
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO preferences (key, value) VALUES (?, ?)",
+                (key, json.dumps(value, ensure_ascii=False)),
+            )
+
+    def list_profiles(self) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, selections, updated_at FROM profiles ORDER BY name"
+            ).fetchall()
+        return [
+            {"name": name, "selections": json.loads(selections), "updated_at": ts}
+            for name, selections, ts in rows
+        ]
+
+    def get_profile(self, name: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT selections FROM profiles WHERE name = ?", (name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_profile(self, name: str, selections: dict):
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (name, selections, updated_at) "
+                "VALUES (?, ?, ?)",
+                (name, json.dumps(selections, ensure_ascii=False), time.time()),
+            )
+
+    def delete_profile(self, name: str) -> bool:
+        with self.transaction() as conn:
+            return (
+                conn.execute("DELETE FROM profiles WHERE name = ?", (name,)).rowcount
+                > 0
+            )
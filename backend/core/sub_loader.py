@@ -5,7 +5,8 @@ from dataclasses import dataclass, field
 from typing import Optional
 from urllib.parse import urlparse, parse_qs, unquote
 
-import requests
+from core.instrument import http_get
+from core.parse_pool import MAX_BODY, ParseError, get_pool
 
 
 @dataclass
@@ -20,16 +21,22 @@ class SubscriptionResult:
 
 class SubscriptionLoader:
     def load(self, url: str) -> SubscriptionResult:
+        import requests
+
         if not url or not url.strip():
             return SubscriptionResult(success=False, proxies=[], error="URL is empty")
 
         try:
-            response = requests.get(
+            response = http_get(
                 url.strip(),
                 timeout=15,
                 headers={"User-Agent": "clash-verge/v1.7.7"},
+                stream=True,
             )
             response.raise_for_status()
+            body = self._read_limited(response)
+        except ParseError as e:
+            return SubscriptionResult(success=False, proxies=[], error=str(e))
         except requests.exceptions.Timeout:
             return SubscriptionResult(
                 success=False, proxies=[], error="Request timeout"
@@ -45,8 +52,13 @@ class SubscriptionLoader:
         except Exception as e:
             return SubscriptionResult(success=False, proxies=[], error=str(e))
 
-        result = self._parse(response.text)
+        text = body.decode(response.encoding or "utf-8", errors="replace")
+        try:
+            result = SubscriptionResult(success=True, **get_pool().parse(text))
+        except ParseError as e:
+            return SubscriptionResult(success=False, proxies=[], error=str(e))
         if result.error:
+            result.success = False
             return result
 
         if not result.proxies:
@@ -56,6 +68,21 @@ class SubscriptionLoader:
 
         return result
 
+    def _read_limited(self, response) -> bytes:
+        with response:
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > MAX_BODY:
+                raise ParseError("Subscription is too large")
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > MAX_BODY:
+                    raise ParseError("Subscription is too large")
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    # Runs in a parse_pool worker; load() never calls it in-process.
     def _parse(self, content: str) -> SubscriptionResult:
         content = content.strip()
 
@@ -95,7 +122,8 @@ class SubscriptionLoader:
         import yaml
 
         try:
-            data = yaml.safe_load(content)
+            loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+            data = yaml.load(content, Loader=loader)
             if not isinstance(data, dict):
                 return SubscriptionResult(
                     success=False, proxies=[], error="Invalid YAML format"
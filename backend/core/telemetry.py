@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Optional
+
+from core.instrument import http_get
+
+if TYPE_CHECKING:
+    import requests
+
+# (seconds per point, points kept): 1 s for 5 min, 10 s for 1 h, 1 min for 24 h
+RESOLUTIONS = {"1s": (1, 300), "10s": (10, 360), "1m": (60, 1440)}
+STREAMS = {"traffic": ("up", "down"), "memory": ("inuse",)}
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 10.0
+STREAM_READ_TIMEOUT = 10
+
+
+class _Tier:
+    __slots__ = ("step", "points", "bucket", "sums", "count")
+
+    def __init__(self, step: int, size: int, width: int):
+        self.step = step
+        self.points: deque = deque(maxlen=size)
+        self.bucket: Optional[int] = None
+        self.sums = [0] * width
+        self.count = 0
+
+    def add(self, ts: float, values: tuple):
+        bucket = int(ts) // self.step * self.step
+        if bucket != self.bucket:
+            self._flush()
+            self.bucket = bucket
+        for i, value in enumerate(values):
+            self.sums[i] += value
+        self.count += 1
+
+    def _flush(self):
+        if self.bucket is not None and self.count:
+            self.points.append(
+                (self.bucket, *(round(v / self.count) for v in self.sums))
+            )
+        self.sums = [0] * len(self.sums)
+        self.count = 0
+
+    def snapshot(self, since: Optional[float]) -> list:
+        points = list(self.points)
+        if self.bucket is not None and self.count:
+            points.append((self.bucket, *(round(v / self.count) for v in self.sums)))
+        if since is not None:
+            points = [p for p in points if p[0] > since]
+        return points
+
+
+class MultiResolutionSeries:
+    def __init__(self, width: int):
+        self._lock = threading.Lock()
+        self._tiers = {
+            name: _Tier(step, size, width) for name, (step, size) in RESOLUTIONS.items()
+        }
+
+    def add(self, ts: float, values: tuple):
+        with self._lock:
+            for tier in self._tiers.values():
+                tier.add(ts, values)
+
+    def points(self, resolution: str, since: Optional[float] = None) -> list:
+        tier = self._tiers.get(resolution) or self._tiers["1s"]
+        with self._lock:
+            return tier.snapshot(since)
+
+
+class TelemetryCollector:
+    def __init__(self, api_base: Callable[[], str]):
+        self._api_base = api_base
+        self._series = {
+            name: MultiResolutionSeries(len(fields)) for name, fields in STREAMS.items()
+        }
+        self._latest: dict[str, dict] = {}
+        self._connected: dict[str, bool] = {name: False for name in STREAMS}
+        self._responses: dict[str, "requests.Response"] = {}
+        self._wake = {name: threading.Event() for name in STREAMS}
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for name in STREAMS:
+                thread = threading.Thread(target=self._run, args=(name,), daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def reconnect(self):
+        for event in self._wake.values():
+            event.set()
+        for response in list(self._responses.values()):
+            try:
+                response.close()
+            except Exception:
+                pass
+
+    def _run(self, name: str):
+        fields = STREAMS[name]
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                resp = http_get(
+                    f"{self._api_base()}/{name}",
+                    stream=True,
+                    timeout=(2, STREAM_READ_TIMEOUT),
+                )
+                resp.raise_for_status()
+                self._responses[name] = resp
+                self._connected[name] = True
+                delay = RECONNECT_MIN_DELAY
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    self._latest[name] = data
+                    self._series[name].add(
+                        time.time(), tuple(data.get(f, 0) for f in fields)
+                    )
+            except Exception:
+                pass
+            self._connected[name] = False
+            self._responses.pop(name, None)
+            if self._wake[name].wait(delay):
+                self._wake[name].clear()
+                delay = RECONNECT_MIN_DELAY
+            else:
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def get(self, resolution: str = "1s", since: Optional[float] = None) -> dict:
+        self.start()
+        return {
+            "resolution": resolution if resolution in RESOLUTIONS else "1s",
+            "connected": dict(self._connected),
+            "latest": dict(self._latest),
+            "traffic": self._series["traffic"].points(resolution, since),
+            "memory": self._series["memory"].points(resolution, since),
+        }
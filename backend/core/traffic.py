@@ -0,0 +1,191 @@
+import heapq
+import threading
+import time
+from typing import Callable, Optional
+
+SAMPLE_INTERVAL = 2.0
+IDLE_TIMEOUT = 30.0
+MAX_TRACKED_CONNECTIONS = 4096
+DEFAULT_TOP_N = 10
+
+
+class _ConnState:
+    __slots__ = (
+        "upload",
+        "download",
+        "up_rate",
+        "down_rate",
+        "host",
+        "network",
+        "chain",
+        "rule",
+        "start",
+    )
+
+    def __init__(self, conn: dict):
+        metadata = conn.get("metadata", {})
+        host = metadata.get("host") or metadata.get("destinationIP", "")
+        self.upload = conn.get("upload", 0)
+        self.download = conn.get("download", 0)
+        self.up_rate = 0.0
+        self.down_rate = 0.0
+        self.host = f"{host}:{metadata.get('destinationPort', '')}"
+        self.network = metadata.get("network", "")
+        self.chain = " → ".join(conn.get("chains", []))
+        rule = conn.get("rule", "")
+        payload = conn.get("rulePayload", "")
+        self.rule = f"{rule},{payload}" if payload else rule
+        self.start = conn.get("start", "")
+
+
+def _rollup(states: dict, key: str) -> dict[str, list]:
+    totals: dict[str, list] = {}
+    for state in states.values():
+        name = getattr(state, key)
+        entry = totals.get(name)
+        if entry is None:
+            totals[name] = [
+                1,
+                state.up_rate,
+                state.down_rate,
+                state.upload,
+                state.download,
+            ]
+        else:
+            entry[0] += 1
+            entry[1] += state.up_rate
+            entry[2] += state.down_rate
+            entry[3] += state.upload
+            entry[4] += state.download
+    return totals
+
+
+def _top_rollup(totals: dict[str, list], key: str, top_n: int) -> list[dict]:
+    top = heapq.nlargest(
+        top_n,
+        totals.items(),
+        key=lambda item: (item[1][1] + item[1][2], item[1][3] + item[1][4]),
+    )
+    return [
+        {
+            key: name,
+            "connections": count,
+            "upload_rate": round(up_rate),
+            "download_rate": round(down_rate),
+            "upload": upload,
+            "download": download,
+        }
+        for name, (count, up_rate, down_rate, upload, download) in top
+    ]
+
+
+class ConnectionAggregator:
+    def __init__(
+        self, fetch: Callable[[], Optional[dict]], interval: float = SAMPLE_INTERVAL
+    ):
+        self._fetch = fetch
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._states: dict[str, _ConnState] = {}
+        self._sampled_at: Optional[float] = None
+        self._totals = (0, 0)
+        self._total_rates = (0.0, 0.0)
+        self._last_access = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def ensure_running(self):
+        self._last_access = time.monotonic()
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while time.monotonic() - self._last_access < IDLE_TIMEOUT:
+            payload = self._fetch()
+            if payload is not None:
+                self.ingest(payload, time.monotonic())
+            time.sleep(self._interval)
+        with self._lock:
+            self._thread = None
+            self._states.clear()
+            self._sampled_at = None
+
+    def ingest(self, payload: dict, now: float):
+        connections = payload.get("connections") or []
+        upload_total = payload.get("uploadTotal", 0)
+        download_total = payload.get("downloadTotal", 0)
+        with self._lock:
+            dt = now - self._sampled_at if self._sampled_at is not None else 0.0
+            previous = self._states
+            states: dict[str, _ConnState] = {}
+            for conn in connections:
+                conn_id = conn.get("id")
+                if conn_id is None:
+                    continue
+                state = previous.get(conn_id)
+                if state is None:
+                    if len(states) >= MAX_TRACKED_CONNECTIONS:
+                        continue
+                    state = _ConnState(conn)
+                else:
+                    upload = conn.get("upload", 0)
+                    download = conn.get("download", 0)
+                    if dt > 0:
+                        state.up_rate = max(0, upload - state.upload) / dt
+                        state.down_rate = max(0, download - state.download) / dt
+                    state.upload = upload
+                    state.download = download
+                states[conn_id] = state
+
+            if dt > 0:
+                self._total_rates = (
+                    max(0, upload_total - self._totals[0]) / dt,
+                    max(0, download_total - self._totals[1]) / dt,
+                )
+            self._totals = (upload_total, download_total)
+            self._states = states
+            self._sampled_at = now
+
+    def stats(self, top_n: int = DEFAULT_TOP_N) -> dict:
+        with self._lock:
+            states = dict(self._states)
+            totals = self._totals
+            total_rates = self._total_rates
+            sampled = self._sampled_at is not None
+
+        top = heapq.nlargest(
+            top_n,
+            states.items(),
+            key=lambda item: (
+                item[1].up_rate + item[1].down_rate,
+                item[1].upload + item[1].download,
+            ),
+        )
+        return {
+            "sampled": sampled,
+            "connection_count": len(states),
+            "upload_total": totals[0],
+            "download_total": totals[1],
+            "upload_rate": round(total_rates[0]),
+            "download_rate": round(total_rates[1]),
+            "connections": [
+                {
+                    "id": conn_id,
+                    "host": state.host,
+                    "network": state.network,
+                    "chain": state.chain,
+                    "rule": state.rule,
+                    "start": state.start,
+                    "upload": state.upload,
+                    "download": state.download,
+                    "upload_rate": round(state.up_rate),
+                    "download_rate": round(state.down_rate),
+                }
+                for conn_id, state in top
+            ],
+            "hosts": _top_rollup(_rollup(states, "host"), "host", top_n),
+            "chains": _top_rollup(_rollup(states, "chain"), "chain", top_n),
+            "rules": _top_rollup(_rollup(states, "rule"), "rule", top_n),
+        }
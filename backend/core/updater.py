@@ -5,11 +5,55 @@ import tempfile
 import threading
 from pathlib import Path
 from typing import Optional, Callable
-import requests
+
+from core.config_gen import get_user_config_dir
+from core.delta_update import (
+    MANIFEST_NAME,
+    DeltaPlan,
+    DeltaUpdater,
+    Manifest,
+    fetch_manifest,
+    get_install_dir,
+    plan_update,
+)
+from core.instrument import http_get
 
 CURRENT_VERSION = "1.0.69"
 GITHUB_REPO = "z0fans/NextDesk"
 GITHUB_API_URL = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
+# Points the updater at another release channel (for example a local file
+# server); it must serve a manifest at <url>/manifest.json.
+UPDATE_URL_ENV = "NEXTDESK_UPDATE_URL"
+UPDATE_WORK_DIR = "update"
+
+
+# The elevated update helper only trusts this: the repository is fixed in the
+# code, so nothing a local user can write decides where the manifest is read.
+def release_manifest_url() -> Optional[str]:
+    resp = http_get(GITHUB_API_URL, timeout=10)
+    resp.raise_for_status()
+    assets = resp.json().get("assets", [])
+    asset = next((a for a in assets if a["name"] == MANIFEST_NAME), None)
+    return asset["browser_download_url"] if asset else None
+
+
+# Starts this app again with administrator rights (one UAC prompt) to run
+# the update helper in core.delta_update.
+def _launch_elevated(args: list[str]) -> bool:
+    if sys.platform != "win32":
+        return False
+    import ctypes
+
+    if not getattr(sys, "frozen", False):
+        args = [os.path.abspath(sys.argv[0]), *args]
+    try:
+        handle = ctypes.windll.shell32.ShellExecuteW(
+            None, "runas", sys.executable, subprocess.list2cmdline(args), None, 0
+        )
+        return handle > 32
+    except Exception as e:
+        print(f"Update helper error: {e}")
+        return False
 
 
 class Updater:
@@ -19,13 +63,76 @@ class Updater:
         self._latest_version: Optional[str] = None
         self._download_url: Optional[str] = None
         self._download_thread: Optional[threading.Thread] = None
+        self._update_url = os.environ.get(UPDATE_URL_ENV, "").rstrip("/")
+        self._manifest_url: Optional[str] = None
+        self._manifest: Optional[Manifest] = None
+        self._delta_plan: Optional[DeltaPlan] = None
+        self._install_dir = get_install_dir()
+        self._work_dir = get_user_config_dir() / UPDATE_WORK_DIR
+        self._delta: Optional[DeltaUpdater] = None
+        self._delta_failed = False
+        self._recovery: Optional[threading.Thread] = None
+        self._recovery_lock = threading.Lock()
+        if self._install_dir:
+            self._delta = DeltaUpdater(self._install_dir, self._work_dir)
+
+    # Recovery reads the install folder and may raise a UAC prompt, so it is
+    # not done while the app starts: the app calls this once its window is
+    # up, and every delta path waits for it first.
+    def start_recovery(self):
+        with self._recovery_lock:
+            if self._delta is None or self._recovery is not None:
+                return
+            self._recovery = threading.Thread(target=self._recover_delta, daemon=True)
+            self._recovery.start()
+
+    def _wait_for_recovery(self):
+        self.start_recovery()
+        if self._recovery is not None:
+            self._recovery.join()
+
+    # Undoes an apply that never finished, through the helper when the
+    # install folder is not writable from here. A failed helper run leaves a
+    # result behind, and the full installer is used from then on.
+    def _recover_delta(self):
+        try:
+            result = self._delta.pop_result()
+            if result is not None:
+                self._delta.clear_staging()
+            if result and result.get("error"):
+                print(f"Delta update error: {result['error']}")
+                self._delta_failed = True
+            if self._delta.can_apply():
+                self._delta.recover()
+            elif self._delta.needs_recovery():
+                _launch_elevated(
+                    [
+                        "--recover-update",
+                        str(self._work_dir),
+                        "--install-dir",
+                        str(self._install_dir),
+                    ]
+                )
+        except Exception as e:
+            print(f"Delta recovery error: {e}")
+            self._delta_failed = True
+
+    def _delta_available(self) -> bool:
+        self._wait_for_recovery()
+        return (
+            self._delta is not None
+            and self._manifest_url is not None
+            and not self._delta_failed
+        )
 
     def get_current_version(self) -> str:
         return CURRENT_VERSION
 
     def check_for_update(self) -> dict:
+        if self._update_url:
+            return self._check_channel()
         try:
-            resp = requests.get(GITHUB_API_URL, timeout=10)
+            resp = http_get(GITHUB_API_URL, timeout=10)
             resp.raise_for_status()
             data = resp.json()
 
@@ -37,6 +144,13 @@ class Updater:
             exe_asset = next((a for a in assets if a["name"].endswith(".exe")), None)
             if exe_asset:
                 self._download_url = exe_asset["browser_download_url"]
+            manifest_asset = next(
+                (a for a in assets if a["name"] == MANIFEST_NAME), None
+            )
+            self._manifest_url = (
+                manifest_asset["browser_download_url"] if manifest_asset else None
+            )
+            self._manifest = None
 
             has_update = self._compare_versions(latest, CURRENT_VERSION) > 0
 
@@ -45,6 +159,31 @@ class Updater:
                 "current_version": CURRENT_VERSION,
                 "latest_version": latest,
                 "download_url": self._download_url,
+                "delta": self._delta_available(),
+            }
+        except Exception as e:
+            return {
+                "has_update": False,
+                "current_version": CURRENT_VERSION,
+                "latest_version": None,
+                "error": str(e),
+            }
+
+    def _check_channel(self) -> dict:
+        try:
+            self._manifest_url = f"{self._update_url}/{MANIFEST_NAME}"
+            self._manifest = fetch_manifest(self._manifest_url)
+            self._latest_version = self._manifest.version
+            self._download_url = self._manifest.installer
+            has_update = (
+                self._compare_versions(self._manifest.version, CURRENT_VERSION) > 0
+            )
+            return {
+                "has_update": has_update,
+                "current_version": CURRENT_VERSION,
+                "latest_version": self._manifest.version,
+                "download_url": self._download_url,
+                "delta": self._delta_available(),
             }
         except Exception as e:
             return {
@@ -55,28 +194,68 @@ class Updater:
             }
 
     def get_download_status(self) -> dict:
-        return {
+        status = {
             "status": self._download_status,
             "progress": self._download_progress,
         }
+        if self._delta_plan is not None:
+            status["delta"] = {
+                "files": len(self._delta_plan.changed),
+                "removed": len(self._delta_plan.removed),
+                "download_bytes": self._delta_plan.download_bytes,
+                "total_bytes": self._delta_plan.total_bytes,
+            }
+        return status
 
     def start_download(self) -> bool:
-        if not self._download_url:
+        use_delta = self._delta_available()
+        if not self._download_url and not use_delta:
             return False
         if self._download_status == "downloading":
             return False
 
         self._download_status = "downloading"
         self._download_progress = 0
+        self._delta_plan = None
         self._download_thread = threading.Thread(
-            target=self._download_update, daemon=True
+            target=self._download_delta if use_delta else self._download_update,
+            daemon=True,
         )
         self._download_thread.start()
         return True
 
+    # Any failure on the delta path (bad manifest, unreachable blob, hash
+    # mismatch) drops back to downloading the full installer.
+    def _download_delta(self):
+        try:
+            if self._manifest is None:
+                self._manifest = fetch_manifest(self._manifest_url)
+            plan = plan_update(self._install_dir, self._manifest)
+            total = max(plan.download_bytes, 1)
+
+            def progress(done: int):
+                self._download_progress = min(done / total, 1.0) * 100
+
+            self._delta.download(plan, progress)
+            self._delta_plan = plan
+            self._download_status = "ready"
+            self._download_progress = 100
+        except Exception as e:
+            print(f"Delta update error: {e}")
+            self._delta_plan = None
+            self._download_url = self._download_url or (
+                self._manifest.installer if self._manifest else None
+            )
+            if not self._download_url:
+                self._download_status = f"error: {str(e)}"
+                self._download_progress = 0
+                return
+            self._download_progress = 0
+            self._download_update()
+
     def _download_update(self):
         try:
-            resp = requests.get(self._download_url, stream=True, timeout=300)
+            resp = http_get(self._download_url, stream=True, timeout=300)
             resp.raise_for_status()
 
             total_size = int(resp.headers.get("content-length", 0))
@@ -103,6 +282,8 @@ class Updater:
     def install_update(self) -> bool:
         if self._download_status != "ready":
             return False
+        if self._delta_plan is not None:
+            return self._install_delta()
 
         temp_dir = tempfile.gettempdir()
         installer_path = Path(temp_dir) / "NextDesk_Update.exe"
@@ -125,6 +306,77 @@ class Updater:
         except Exception:
             return False
 
+    def _install_delta(self) -> bool:
+        plan, self._delta_plan = self._delta_plan, None
+        if not self._delta.can_apply():
+            return self._install_delta_elevated(plan)
+        try:
+            self._delta.apply(plan)
+        except Exception as e:
+            print(f"Delta apply error: {e}")
+            return self._fall_back_to_installer(e)
+        self._delta.clear_staging()
+        if getattr(sys, "frozen", False):
+            subprocess.Popen(
+                [sys.executable],
+                cwd=str(self._install_dir),
+                creationflags=getattr(subprocess, "DETACHED_PROCESS", 0),
+            )
+            import time
+
+            time.sleep(0.5)
+            os._exit(0)
+        return True
+
+    # The helper waits for this process to exit, fetches the release
+    # manifest itself and applies it, then starts the app again unelevated.
+    # It only reads the GitHub release, so a custom channel cannot go
+    # through it.
+    def _install_delta_elevated(self, plan: DeltaPlan) -> bool:
+        if self._update_url:
+            return self._fall_back_to_installer(
+                PermissionError("install folder is not writable")
+            )
+        launched = _launch_elevated(
+            [
+                "--apply-update",
+                str(self._work_dir),
+                "--install-dir",
+                str(self._install_dir),
+                "--version",
+                plan.manifest.version,
+                "--wait-pid",
+                str(os.getpid()),
+            ]
+        )
+        if not launched:
+            return self._fall_back_to_installer(
+                PermissionError("install folder is not writable")
+            )
+        import time
+
+        time.sleep(0.5)
+        os._exit(0)
+
+    def _fall_back_to_installer(self, error: Exception) -> bool:
+        self._delta_failed = True
+        if self._download_url:
+            self.start_download_installer()
+        else:
+            self._download_status = f"error: {str(error)}"
+        return False
+
+    def start_download_installer(self) -> bool:
+        if not self._download_url or self._download_status == "downloading":
+            return False
+        self._download_status = "downloading"
+        self._download_progress = 0
+        self._download_thread = threading.Thread(
+            target=self._download_update, daemon=True
+        )
+        self._download_thread.start()
+        return True
+
     def _compare_versions(self, v1: str, v2: str) -> int:
         def parse(v):
             return [int(x) for x in v.split(".") if x.isdigit()]
@@ -0,0 +1,390 @@
+import argparse
+import hmac
+import inspect
+import json
+import os
+import queue
+import secrets
+import signal
+import threading
+import time
+import typing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from api import Api, PROBE_MODE_TCP
+from core.config_gen import get_user_config_dir
+
+DEFAULT_PORT = 17895
+DAEMON_FILE = "daemon.json"
+TOKEN_ENV = "NEXTDESK_DAEMON_TOKEN"
+SUPERVISE_INTERVAL = 5.0
+STATUS_STREAM_INTERVAL = 2.0
+MAX_BODY = 64 * 1024
+
+# Bridge methods reachable over HTTP. GET is allowed for the read-only ones.
+READ_METHODS = {
+    "get_status",
+    "get_servers",
+    "query_servers",
+    "get_proxy_groups",
+    "get_subscription_url",
+    "get_run_mode",
+    "get_latency_history",
+    "get_connections",
+    "get_connection_stats",
+    "get_telemetry",
+    "get_diagnostics",
+    "get_cache_stats",
+    "get_geodata_status",
+    "get_prewarm_status",
+    "get_profiles",
+    "get_provider_mode",
+    "get_region_groups",
+    "get_startup_trace",
+    "get_snapshot",
+    "get_current_version",
+    "get_clash_log",
+}
+WRITE_METHODS = {
+    "start_engine",
+    "stop_engine",
+    "load_subscription",
+    "save_config",
+    "switch_proxy",
+    "test_servers_connectivity",
+    "test_group_delays",
+    "update_geodata",
+    "set_geodata_max_age",
+    "set_prewarm_enabled",
+    "set_provider_mode",
+    "set_region_groups",
+    "save_profile",
+    "delete_profile",
+    "apply_profile",
+    "set_diagnostics_enabled",
+    "check_for_update",
+}
+
+
+def daemon_file_path():
+    return get_user_config_dir() / DAEMON_FILE
+
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+
+def _plain_type(annotation):
+    # Optional[X] -> X; anything else that is not a plain class -> None.
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+    return annotation if isinstance(annotation, type) else None
+
+
+def _from_query(name: str, kind, values: list[str]):
+    if len(values) > 1 and kind is not None:
+        raise ValueError(f"{name} given more than once")
+    value = values[-1]
+    if kind is None:
+        # Unannotated filters take a string or a list: ?region=HK&region=JP,
+        # or an explicit JSON array.
+        if value.startswith("["):
+            return json.loads(value)
+        return values if len(values) > 1 else value
+    if kind is str:
+        return value
+    if kind is bool:
+        if value.lower() in _TRUE:
+            return True
+        if value.lower() in _FALSE:
+            return False
+        raise ValueError(f"{name} must be a boolean")
+    if kind in (int, float):
+        try:
+            return kind(value)
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+    decoded = json.loads(value)
+    if not isinstance(decoded, kind):
+        raise ValueError(f"{name} must be a JSON {kind.__name__}")
+    return decoded
+
+
+# Query strings are converted per parameter from the bridge method's
+# annotations; JSON body values are already typed and only checked. Bad
+# input raises ValueError or TypeError, which the handler answers with 400.
+def _bind_args(func, query: dict[str, list[str]], body: dict) -> dict:
+    params = inspect.signature(func).parameters
+    hints = typing.get_type_hints(func)
+    kwargs = {}
+    for name, values in query.items():
+        if name not in params:
+            raise TypeError(f"unexpected parameter {name}")
+        kwargs[name] = _from_query(name, _plain_type(hints.get(name)), values)
+    for name, value in body.items():
+        if name not in params:
+            raise TypeError(f"unexpected parameter {name}")
+        kind = _plain_type(hints.get(name))
+        if value is None or kind is None or isinstance(value, kind):
+            kwargs[name] = value
+        elif kind is float and isinstance(value, int) and not isinstance(value, bool):
+            kwargs[name] = float(value)
+        else:
+            raise TypeError(f"{name} must be {kind.__name__}")
+    return kwargs
+
+
+class Daemon:
+    def __init__(self, api: Api, port: int, token: str, supervise: bool = True):
+        self.api = api
+        self.port = port
+        self.token = token
+        self._supervise = supervise
+        self._engine_wanted = False
+        self._stopping = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # The daemon runs without a desktop session, so it never launches the
+    # MultiDesk window, whatever the caller asks for.
+    def call(self, method: str, kwargs: dict):
+        if method == "start_engine":
+            kwargs = {**kwargs, "multidesk": False}
+        result = getattr(self.api, method)(**kwargs)
+        if method == "start_engine":
+            self._engine_wanted = bool(result)
+        elif method == "stop_engine":
+            self._engine_wanted = False
+        return result
+
+    def _supervise_loop(self):
+        delay = SUPERVISE_INTERVAL
+        while not self._stopping.wait(delay):
+            if not self._engine_wanted or self.api.get_run_mode()["reuse_mode"]:
+                delay = SUPERVISE_INTERVAL
+                continue
+            # Only the engine is supervised: a headless host never has the
+            # MultiDesk window running.
+            status = self.api.get_status()
+            if status["clash"]:
+                delay = SUPERVISE_INTERVAL
+                continue
+            print(f"Engine down ({status}), restarting")
+            self.api.stop_engine()
+            self.api.start_engine(multidesk=False)
+            delay = min(delay * 2, 60.0)
+
+    def stream_status(self, write, interval: float):
+        while not self._stopping.is_set():
+            write(
+                {
+                    "ts": time.time(),
+                    "status": self.api.get_status(),
+                    "run_mode": self.api.get_run_mode(),
+                }
+            )
+            self._stopping.wait(interval)
+
+    def stream_probe(self, write, mode: str):
+        self.api._wait_ready()
+        results: queue.Queue = queue.Queue()
+        names = {s["id"]: s["name"] for s in self.api.get_servers()}
+        total = len(names)
+        write({"event": "start", "mode": mode, "total": total})
+
+        def probe():
+            probed = None
+            try:
+                probed = self.api._probe_servers(mode, lambda r: results.put(("r", r)))
+            except Exception as e:
+                print(f"Probe stream error: {e}")
+                results.put(("error", str(e) or type(e).__name__))
+            finally:
+                results.put(("done", probed or []))
+
+        threading.Thread(target=probe, daemon=True).start()
+        completed = 0
+        error = None
+        while True:
+            kind, value = results.get()
+            if kind == "done":
+                break
+            if kind == "error":
+                error = value
+                continue
+            completed += 1
+            name = names.get(value["id"])
+            write(
+                {
+                    "event": "result",
+                    "done": completed,
+                    "total": total,
+                    "name": name,
+                    **value,
+                }
+            )
+        online = sum(1 for r in value if r["status"] == "online")
+        end = {"event": "end", "done": completed, "total": total, "online": online}
+        if error is not None:
+            end["error"] = error
+        write(end)
+
+    def _handler(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, status: int, body):
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _authorized(self) -> bool:
+                header = self.headers.get("Authorization", "")
+                supplied = header[7:] if header.startswith("Bearer ") else ""
+                return hmac.compare_digest(supplied, daemon.token)
+
+            def _read_body(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > MAX_BODY:
+                    raise ValueError("request body too large")
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("request body must be a JSON object")
+                return body
+
+            def _stream(self, producer):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(obj):
+                    line = json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.flush()
+
+                try:
+                    producer(write)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                self.close_connection = True
+
+            def _route(self, method: str):
+                if not self._authorized():
+                    return self._send_json(401, {"error": "unauthorized"})
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                path = parts.path.rstrip("/")
+
+                if path == "/health":
+                    return self._send_json(200, {"ok": True, "pid": os.getpid()})
+                if path == "/stream/status":
+                    try:
+                        interval = float(query["interval"][-1])
+                    except KeyError:
+                        interval = STATUS_STREAM_INTERVAL
+                    except ValueError:
+                        return self._send_json(400, {"error": "bad interval"})
+                    return self._stream(
+                        lambda w: daemon.stream_status(w, max(0.5, interval))
+                    )
+                if path == "/stream/probe" and method == "POST":
+                    mode = query.get("mode", [PROBE_MODE_TCP])[-1]
+                    return self._stream(lambda w: daemon.stream_probe(w, mode))
+                if not path.startswith("/api/"):
+                    return self._send_json(404, {"error": "not found"})
+
+                name = path[5:]
+                allowed = (
+                    READ_METHODS if method == "GET" else READ_METHODS | WRITE_METHODS
+                )
+                if name not in allowed:
+                    return self._send_json(404, {"error": f"unknown method {name}"})
+                try:
+                    body = {} if method == "GET" else self._read_body()
+                    kwargs = _bind_args(getattr(daemon.api, name), query, body)
+                    result = daemon.call(name, kwargs)
+                except (TypeError, ValueError) as e:
+                    return self._send_json(400, {"error": str(e)})
+                except Exception as e:
+                    return self._send_json(500, {"error": str(e)})
+                self._send_json(200, {"result": result})
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        write_daemon_file(self.port, self.token)
+        if self._supervise:
+            threading.Thread(target=self._supervise_loop, daemon=True).start()
+        print(f"NextDesk daemon listening on 127.0.0.1:{self.port}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def shutdown(self):
+        self._stopping.set()
+        if self._server is not None:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+
+def write_daemon_file(port: int, token: str):
+    path = daemon_file_path()
+    tmp_path = path.with_suffix(".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"port": port, "token": token, "pid": os.getpid()}, f)
+    os.replace(tmp_path, path)
+
+
+def run(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="NextDesk --headless")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--start", action="store_true", help="start the engine")
+    parser.add_argument("--no-supervise", action="store_true")
+    args = parser.parse_args(argv)
+
+    api = Api()
+    api.initialize()
+    token = os.environ.get(TOKEN_ENV) or secrets.token_urlsafe(24)
+    daemon = Daemon(api, args.port, token, supervise=not args.no_supervise)
+
+    def stop(*_):
+        daemon.shutdown()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    if args.start:
+        threading.Thread(
+            target=daemon.call, args=("start_engine", {}), daemon=True
+        ).start()
+    try:
+        daemon.serve()
+    finally:
+        api.stop_engine()
+        try:
+            daemon_file_path().unlink()
+        except OSError:
+            pass
+    return 0
@@ -1,10 +1,9 @@
+import multiprocessing
 import os
 import sys
 from pathlib import Path
 
-import webview
-
-from api import Api
+from core.startup import trace
 
 DEV_MODE = os.environ.get("NEXTDESK_DEV", "0") == "1"
 
@@ -23,6 +22,20 @@ def get_url() -> str:
 
 
 def main():
+    if {"--apply-update", "--recover-update"} & set(sys.argv[1:]):
+        from core.delta_update import run_helper
+
+        sys.exit(run_helper(sys.argv[1:]))
+
+    if "--headless" in sys.argv[1:]:
+        from daemon import run
+
+        sys.exit(run(sys.argv[1:]))
+
+    import webview
+
+    from api import Api
+
     api = Api()
     window = webview.create_window(
         title="NextDesk",
@@ -32,8 +45,14 @@ def main():
         height=800,
         min_size=(800, 600),
     )
+    window.events.shown += lambda: trace.mark("window_shown")
+    window.events.shown += api.window_shown
+    window.events.loaded += lambda: trace.mark("window_loaded")
+    trace.mark("window_created")
+    api.initialize()
     webview.start(debug=DEV_MODE)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from core.parse_pool import ParsePool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ParsePool(size=1)
+    yield pool
+    pool.close()
+
+
+def test_outbounds_json_keeps_proxies(pool):
+    outbounds = [
+        {"type": "shadowsocks", "tag": "hk-1", "server": "1.2.3.4", "port": 443},
+        {"type": "vmess", "tag": "jp-1", "server": "5.6.7.8", "port": 8443},
+    ]
+    data = pool.parse(json.dumps({"outbounds": outbounds}))
+
+    assert data["error"] is None
+    assert data["proxies"] == outbounds
+    assert data["raw_config"] == {"outbounds": outbounds}
+
+
+def test_clash_yaml_lists_come_from_raw_config(pool):
+    content = "\n".join(
+        [
+            "proxies:",
+            "  - {name: hk-1, type: ss, server: 1.2.3.4, port: 443}",
+            "proxy-groups:",
+            "  - {name: PROXY, type: select, proxies: [hk-1]}",
+            "rules:",
+            "  - MATCH,PROXY",
+        ]
+    )
+    data = pool.parse(content)
+
+    assert [p["name"] for p in data["proxies"]] == ["hk-1"]
+    assert data["proxies"] is data["raw_config"]["proxies"]
+    assert data["proxy_groups"][0]["name"] == "PROXY"
+    assert data["rules"] == ["MATCH,PROXY"]
@@ -0,0 +1,82 @@
+from core.proxy_providers import (
+    ProxyProviderWriter,
+    attach_providers,
+    inline_nodes,
+    provider_name,
+)
+
+HK = provider_name("HK")
+JP = provider_name("JP")
+
+
+def _node(name: str) -> dict:
+    return {"name": name, "type": "ss", "server": "1.2.3.4", "port": 443}
+
+
+def _attach(tmp_path, proxies: list, groups: list) -> tuple[set, list]:
+    pinned = inline_nodes(proxies, groups)
+    provider_set = ProxyProviderWriter(tmp_path).write(
+        [p for p in proxies if p["name"] not in pinned]
+    )
+    return pinned, attach_providers(groups, provider_set)
+
+
+# URI subscriptions get a generated PROXY group that offers the region
+# groups ahead of the nodes.
+def test_group_names_stay_next_to_use(tmp_path):
+    proxies = [_node(n) for n in ("HK 01", "HK 02", "JP 01")]
+    groups = [
+        {
+            "name": "PROXY",
+            "type": "select",
+            "proxies": ["auto-hk", "DIRECT", "HK 01", "HK 02", "JP 01"],
+        },
+        {"name": "auto-hk", "type": "select", "proxies": ["HK 01", "HK 02"]},
+    ]
+    pinned, attached = _attach(tmp_path, proxies, groups)
+
+    assert pinned == set()
+    assert attached[0] == {
+        "name": "PROXY",
+        "type": "select",
+        "proxies": ["auto-hk", "DIRECT"],
+        "use": [HK, JP],
+    }
+    assert attached[1] == {"name": "auto-hk", "type": "select", "use": [HK]}
+
+
+def test_interleaved_regions_match_by_membership(tmp_path):
+    proxies = [_node(n) for n in ("HK 01", "JP 01", "HK 02", "JP 02", "HK 03")]
+    groups = [
+        {
+            "name": "RDP",
+            "type": "select",
+            "proxies": ["JP 01", "HK 01", "JP 02", "HK 02"],
+        },
+    ]
+    pinned, attached = _attach(tmp_path, proxies, groups)
+
+    assert pinned == set()
+    assert attached[0]["use"] == [JP, HK]
+    assert "proxies" not in attached[0]
+    # HK 03 is in the HK provider but not in the group.
+    assert attached[0]["filter"] == "^(?:JP\\ 01|HK\\ 01|JP\\ 02|HK\\ 02)$"
+
+
+def test_inline_groups_pin_their_nodes(tmp_path):
+    proxies = [_node(n) for n in ("HK 01", "HK 02", "JP 01")]
+    groups = [
+        {"name": "RDP", "type": "select", "proxies": ["HK 01", "JP 01"]},
+        {"name": "backup", "type": "fallback", "proxies": ["JP 01"]},
+    ]
+    pinned, attached = _attach(tmp_path, proxies, groups)
+
+    assert pinned == {"JP 01"}
+    assert attached[0] == {
+        "name": "RDP",
+        "type": "select",
+        "proxies": ["JP 01"],
+        "use": [HK],
+        "filter": "^(?:HK\\ 01)$",
+    }
+    assert attached[1] == groups[1]
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { 
   LayoutDashboard, 
   Server as ServerIcon, 
@@ -17,7 +17,7 @@ import {
   PanelLeftClose,
   PanelLeft
 } from 'lucide-react';
-import { api, type EngineStatus, type Server, type UpdateInfo, type DownloadStatus, type ProxyGroup, type Connection, type RunMode } from './api';
+import { api, type EngineStatus, type Server, type UpdateInfo, type DownloadStatus, type ProxyGroup, type ConnectionStats, type ConnectionRate, type RunMode, type Telemetry } from './api';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from '@/components/ui/card';
 import { Logo } from '@/components/Logo';
@@ -28,6 +28,8 @@ import { ThemeToggle } from '@/components/ThemeToggle';
 import { LanguageProvider } from '@/i18n/LanguageProvider';
 import { useTranslation } from '@/i18n/useTranslation';
 import { LanguageToggle } from '@/components/LanguageToggle';
+import { Sparkline } from '@/components/Sparkline';
+import { ServerList } from '@/components/ServerList';
 
 const formatBytes = (bytes: number): string => {
   if (bytes === 0) return '0 B';
@@ -37,11 +39,20 @@ const formatBytes = (bytes: number): string => {
   return parseFloat((bytes / Math.pow(k, i)).toFixed(1)) + ' ' + sizes[i];
 };
 
+// One row of the top-N tables; hosts and chains share it so both tables
+// render from a single array type.
+const rateRow = (label: string, rate: ConnectionRate) => ({
+  label,
+  download_rate: rate.download_rate,
+  upload_rate: rate.upload_rate,
+});
+
 function AppContent() {
   const { t } = useTranslation();
   const [activeTab, setActiveTab] = useState<'dashboard' | 'servers' | 'proxy' | 'logs' | 'settings'>('dashboard');
   const [status, setStatus] = useState<EngineStatus>({ clash: false, multidesk: false });
   const [, setServers] = useState<Server[]>([]);
+  const [dataVersion, setDataVersion] = useState(0);
   const [loading, setLoading] = useState(false);
   const [subUrl, setSubUrl] = useState('');
   const [updatingSub, setUpdatingSub] = useState(false);
@@ -56,9 +67,12 @@ function AppContent() {
   const [selectedProxies, setSelectedProxies] = useState<Record<string, string>>({});
   const [testingConnectivity, setTestingConnectivity] = useState(false);
   const [nodeDelays, setNodeDelays] = useState<Record<string, number>>({});
-  const [connections, setConnections] = useState<Connection[]>([]);
+  const [connectionStats, setConnectionStats] = useState<ConnectionStats | null>(null);
+  const [telemetry, setTelemetry] = useState<Telemetry | null>(null);
   const [runMode, setRunMode] = useState<RunMode>({ reuse_mode: false, clash_api: '', proxy_port: 17897 });
   const [sidebarCollapsed, setSidebarCollapsed] = useState(false);
+  const [stale, setStale] = useState(false);
+  const liveLoaded = useRef(false);
 
   useEffect(() => {
     if (proxyGroups.length > 0) {
@@ -127,15 +141,32 @@ function AppContent() {
         api.getProxyGroups(),
         api.getRunMode()
       ]);
+      liveLoaded.current = true;
       setStatus(newStatus);
       setServers(newServers);
       setProxyGroups(newProxyGroups);
       setRunMode(newRunMode);
+      setDataVersion(v => v + 1);
+      setStale(false);
     } catch (error) {
       console.error('Failed to fetch data', error);
     }
   };
 
+  const loadSnapshot = async () => {
+    try {
+      const snapshot = await api.getSnapshot();
+      if (!snapshot || liveLoaded.current) return;
+      if (snapshot.status) setStatus(snapshot.status);
+      if (snapshot.run_mode) setRunMode(snapshot.run_mode);
+      setServers(snapshot.servers as Server[]);
+      setProxyGroups(snapshot.proxy_groups);
+      setStale(snapshot.saved_at !== null);
+    } catch (error) {
+      console.error('Failed to load snapshot', error);
+    }
+  };
+
   const checkForUpdate = async () => {
     try {
       const [version, info] = await Promise.all([
@@ -179,6 +210,7 @@ function AppContent() {
   };
 
   useEffect(() => {
+    loadSnapshot();
     fetchData();
     checkForUpdate();
     const interval = setInterval(fetchData, 5000);
@@ -188,8 +220,7 @@ function AppContent() {
   useEffect(() => {
     if (activeTab === 'logs') {
       const fetchConnections = async () => {
-        const data = await api.getConnections();
-        setConnections(data.connections || []);
+        setConnectionStats(await api.getConnectionStats());
       };
       fetchConnections();
       const interval = setInterval(fetchConnections, 2000);
@@ -197,6 +228,17 @@ function AppContent() {
     }
   }, [activeTab]);
 
+  useEffect(() => {
+    if (activeTab === 'dashboard') {
+      const fetchTelemetry = async () => {
+        setTelemetry(await api.getTelemetry('1s'));
+      };
+      fetchTelemetry();
+      const interval = setInterval(fetchTelemetry, 2000);
+      return () => clearInterval(interval);
+    }
+  }, [activeTab]);
+
   const handleToggleEngine = async () => {
     setLoading(true);
     try {
@@ -384,6 +426,11 @@ function AppContent() {
                 {activeTab === 'settings' && t('settings')}
               </h1>
               <p className="text-muted-foreground">
+                {stale && (
+                  <Badge variant="secondary" className="mr-2 rounded-sm px-2 py-0.5 text-xs font-normal border bg-yellow-500/10 text-yellow-400 border-yellow-500/20">
+                    {t('staleSnapshot')}
+                  </Badge>
+                )}
                 {activeTab === 'dashboard' && t('dashboardDesc')}
                 {activeTab === 'servers' && t('serversDesc')}
                 {activeTab === 'proxy' && t('proxyDesc')}
@@ -469,6 +516,33 @@ function AppContent() {
                 </div>
               </div>
 
+              {/* Telemetry Cards */}
+              {telemetry && (telemetry.connected.traffic || telemetry.traffic.length > 0) && (
+                <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
+                  <div className="bg-card border border-border rounded-xl p-6 shadow-sm">
+                    <div className="flex items-center justify-between mb-2">
+                      <h3 className="text-base font-medium text-foreground">{t('throughput')}</h3>
+                      <Activity className="h-4 w-4 text-emerald-500" />
+                    </div>
+                    <div className="flex gap-4 text-sm mb-2">
+                      <span className="text-emerald-400">↓ {formatBytes(telemetry.latest.traffic?.down ?? 0)}/s</span>
+                      <span className="text-blue-400">↑ {formatBytes(telemetry.latest.traffic?.up ?? 0)}/s</span>
+                    </div>
+                    <Sparkline values={telemetry.traffic.map(p => p[2])} className="text-emerald-500" />
+                  </div>
+                  <div className="bg-card border border-border rounded-xl p-6 shadow-sm">
+                    <div className="flex items-center justify-between mb-2">
+                      <h3 className="text-base font-medium text-foreground">{t('engineMemory')}</h3>
+                      <Zap className="h-4 w-4 text-violet-500" />
+                    </div>
+                    <div className="text-sm text-foreground mb-2">
+                      {formatBytes(telemetry.latest.memory?.inuse ?? 0)}
+                    </div>
+                    <Sparkline values={telemetry.memory.map(p => p[1])} className="text-violet-500" />
+                  </div>
+                </div>
+              )}
+
               {/* Power Button - Centered */}
               <div className="flex justify-center py-4">
                  <button
@@ -595,6 +669,7 @@ function AppContent() {
                   );
                 })
               )}
+              <ServerList refreshKey={dataVersion} />
             </div>
           )}
 
@@ -668,15 +743,18 @@ function AppContent() {
           {activeTab === 'logs' && (
             <div className="space-y-4">
               <div className="flex items-center justify-between mb-4">
-                <div className="text-sm text-muted-foreground">
-                  {t('activeConnections')}: <span className="text-foreground font-medium">{connections.length}</span>
+                <div className="text-sm text-muted-foreground flex items-center gap-4">
+                  <span>
+                    {t('activeConnections')}: <span className="text-foreground font-medium">{connectionStats?.connection_count ?? 0}</span>
+                  </span>
+                  <span className="text-emerald-400">↓ {formatBytes(connectionStats?.download_rate ?? 0)}/s</span>
+                  <span className="text-blue-400">↑ {formatBytes(connectionStats?.upload_rate ?? 0)}/s</span>
                 </div>
                 <Button
                   variant="outline"
                   size="sm"
                   onClick={async () => {
-                    const data = await api.getConnections();
-                    setConnections(data.connections || []);
+                    setConnectionStats(await api.getConnectionStats());
                   }}
                   className="border-input bg-card text-muted-foreground hover:text-foreground hover:bg-zinc-800"
                 >
@@ -685,58 +763,79 @@ function AppContent() {
                 </Button>
               </div>
 
-              {connections.length === 0 ? (
+              {!connectionStats || connectionStats.connection_count === 0 ? (
                 <Card className="bg-card border-border">
                   <CardContent className="p-6 text-center text-muted-foreground">
                     {t('noActiveConnections')}
                   </CardContent>
                 </Card>
               ) : (
-                <div className="space-y-2">
-                  {connections.map((conn) => (
-                    <div 
-                      key={conn.id} 
-                      className="bg-card border border-border rounded-lg p-4"
-                    >
-                      <div className="flex items-start justify-between gap-4">
-                        <div className="flex-1 min-w-0">
-                          <div className="flex items-center gap-2 mb-2">
-                            <Badge variant="outline" className="bg-blue-500/10 text-blue-400 border-blue-500/20 text-xs">
-                              {conn.metadata.network.toUpperCase()}
-                            </Badge>
-                            <Badge variant="outline" className="bg-violet-500/10 text-violet-400 border-violet-500/20 text-xs">
-                              {conn.metadata.type}
-                            </Badge>
-                            {conn.rule && (
-                              <Badge variant="outline" className="bg-muted text-muted-foreground border-border text-xs">
-                                {conn.rule}
+                <>
+                  <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+                    {([
+                      ['topHosts', connectionStats.hosts.map(h => rateRow(h.host, h))],
+                      ['topChains', connectionStats.chains.map(c => rateRow(c.chain || '-', c))],
+                    ] as const).map(([title, rows]) => (
+                      <Card key={title} className="bg-card border-border">
+                        <CardHeader className="pb-2">
+                          <CardTitle className="text-sm text-foreground">{t(title)}</CardTitle>
+                        </CardHeader>
+                        <CardContent className="space-y-1">
+                          {rows.map(row => (
+                            <div key={row.label} className="flex items-center justify-between gap-4 text-xs">
+                              <span className="font-mono truncate text-foreground">{row.label}</span>
+                              <span className="shrink-0 text-muted-foreground">
+                                <span className="text-emerald-400">↓ {formatBytes(row.download_rate)}/s</span>
+                                {' '}
+                                <span className="text-blue-400">↑ {formatBytes(row.upload_rate)}/s</span>
+                              </span>
+                            </div>
+                          ))}
+                        </CardContent>
+                      </Card>
+                    ))}
+                  </div>
+
+                  <div className="space-y-2">
+                    {connectionStats.connections.map((conn) => (
+                      <div 
+                        key={conn.id} 
+                        className="bg-card border border-border rounded-lg p-4"
+                      >
+                        <div className="flex items-start justify-between gap-4">
+                          <div className="flex-1 min-w-0">
+                            <div className="flex items-center gap-2 mb-2">
+                              <Badge variant="outline" className="bg-blue-500/10 text-blue-400 border-blue-500/20 text-xs">
+                                {conn.network.toUpperCase()}
                               </Badge>
+                              {conn.rule && (
+                                <Badge variant="outline" className="bg-muted text-muted-foreground border-border text-xs">
+                                  {conn.rule}
+                                </Badge>
+                              )}
+                            </div>
+                            <div className="text-sm text-foreground font-mono truncate">
+                              {conn.host}
+                            </div>
+                            {conn.chain && (
+                              <div className="text-xs text-amber-400/80 mt-2">
+                                {t('chain')}: {conn.chain}
+                              </div>
                             )}
                           </div>
-                          <div className="text-sm text-foreground font-mono truncate">
-                            {conn.metadata.host || conn.metadata.destinationIP}:{conn.metadata.destinationPort}
-                          </div>
-                          <div className="text-xs text-muted-foreground mt-1">
-                            {conn.metadata.sourceIP}:{conn.metadata.sourcePort} → {conn.metadata.destinationIP}:{conn.metadata.destinationPort}
-                          </div>
-                          {conn.chains.length > 0 && (
-                            <div className="text-xs text-amber-400/80 mt-2">
-                              {t('chain')}: {conn.chains.join(' → ')}
+                          <div className="text-right shrink-0">
+                            <div className="text-xs text-emerald-400">
+                              ↓ {formatBytes(conn.download_rate)}/s · {formatBytes(conn.download)}
+                            </div>
+                            <div className="text-xs text-blue-400">
+                              ↑ {formatBytes(conn.upload_rate)}/s · {formatBytes(conn.upload)}
                             </div>
-                          )}
-                        </div>
-                        <div className="text-right shrink-0">
-                          <div className="text-xs text-emerald-400">
-                            ↓ {formatBytes(conn.download)}
-                          </div>
-                          <div className="text-xs text-blue-400">
-                            ↑ {formatBytes(conn.upload)}
                           </div>
                         </div>
                       </div>
-                    </div>
-                  ))}
-                </div>
+                    ))}
+                  </div>
+                </>
               )}
             </div>
           )}
@@ -8,9 +8,21 @@ declare global {
         save_config: (config: Record<string, unknown>) => Promise<boolean>;
         load_subscription: (url: string) => Promise<SubscriptionResult>;
         get_servers: () => Promise<Server[]>;
+        query_servers: (
+          query?: string,
+          status?: Server['status'][] | null,
+          region?: string[] | null,
+          group?: string[] | null,
+          latency?: LatencyBucket[] | null,
+          sort?: ServerSort,
+          cursor?: string | null,
+          limit?: number,
+          facets?: boolean,
+        ) => Promise<ServerQueryResult>;
         get_proxy_groups: () => Promise<ProxyGroup[]>;
         get_subscription_url: () => Promise<string>;
-        test_servers_connectivity: () => Promise<Server[]>;
+        get_latency_history: (serverId: string, limit?: number) => Promise<LatencySample[]>;
+        test_servers_connectivity: (mode?: ProbeMode) => Promise<Server[]>;
         test_group_delays: (groupName: string) => Promise<Record<string, number>>;
         check_for_update: () => Promise<UpdateInfo>;
         get_download_status: () => Promise<DownloadStatus>;
@@ -18,9 +30,35 @@ declare global {
         install_update: () => Promise<boolean>;
         get_current_version: () => Promise<string>;
         get_connections: () => Promise<ConnectionsData>;
+        get_connection_stats: (topN?: number) => Promise<ConnectionStats>;
+        get_telemetry: (resolution?: TelemetryResolution, since?: number | null) => Promise<Telemetry>;
         switch_proxy: (groupName: string, proxyName: string) => Promise<boolean>;
         get_run_mode: () => Promise<RunMode>;
         get_system_language: () => Promise<string>;
+        get_diagnostics: () => Promise<Diagnostics>;
+        set_diagnostics_enabled: (enabled: boolean) => Promise<boolean>;
+        get_startup_trace: () => Promise<StartupTrace>;
+        get_snapshot: () => Promise<UiSnapshot>;
+        get_cache_stats: () => Promise<CacheStats>;
+        get_geodata_status: () => Promise<GeodataStatus>;
+        update_geodata: (force?: boolean) => Promise<GeodataUpdateResult>;
+        set_geodata_max_age: (days: number) => Promise<boolean>;
+        get_prewarm_status: () => Promise<PrewarmStatus>;
+        set_prewarm_enabled: (enabled: boolean) => Promise<boolean>;
+        get_provider_mode: () => Promise<ProviderModeStatus>;
+        set_provider_mode: (enabled: boolean) => Promise<boolean>;
+        get_region_groups: () => Promise<RegionGroupStatus>;
+        set_region_groups: (
+          enabled: boolean,
+          settings?: Partial<RegionGroupSettings> | null,
+        ) => Promise<RegionGroupUpdateResult>;
+        get_profiles: () => Promise<ProfileList>;
+        save_profile: (
+          name: string,
+          selections?: Record<string, string> | null,
+        ) => Promise<ProfileSaveResult>;
+        delete_profile: (name: string) => Promise<boolean>;
+        apply_profile: (name: string) => Promise<ProfileApplyResult>;
       };
     };
   }
@@ -37,15 +75,58 @@ export interface EngineStatus {
   multidesk: boolean;
 }
 
+export type ProbeMode = 'tcp' | 'rdp';
+
 export interface Server {
   id: string;
   name: string;
   host: string;
   port: number;
+  proxy: string;
+  groups: string[];
+  source: 'proxy' | 'subscription' | 'override';
   latency?: number;
+  dns_ms?: number | null;
+  socks_ms?: number | null;
+  tcp_ms?: number | null;
+  rdp_ms?: number | null;
   status: 'online' | 'offline' | 'unknown';
 }
 
+export type ServerSort = 'default' | 'latency' | 'name';
+export type LatencyBucket = '0-50' | '50-100' | '100-200' | '200-500' | '500+' | 'none';
+
+// Queries of fewer than three characters match the start of a name or host;
+// longer ones match anywhere in either.
+export interface ServerQuery {
+  query?: string;
+  status?: Server['status'][];
+  // region codes such as 'HK'; 'OTHER' for unmatched names
+  region?: string[];
+  group?: string[];
+  latency?: LatencyBucket[];
+  sort?: ServerSort;
+  cursor?: string | null;
+  limit?: number;
+  facets?: boolean;
+}
+
+export interface ServerQueryResult {
+  items: Server[];
+  total: number;
+  next_cursor: string | null;
+  elapsed_ms?: number;
+  // value -> server count over the whole list
+  facets?: Record<'status' | 'region' | 'group' | 'latency', Record<string, number>>;
+  error?: string;
+}
+
+export interface LatencySample {
+  ts: number;
+  status: Server['status'];
+  latency: number | null;
+}
+
 export interface ProxyGroup {
   name: string;
   type: string;
@@ -65,12 +146,19 @@ export interface UpdateInfo {
   current_version: string;
   latest_version: string | null;
   download_url?: string;
+  delta?: boolean;
   error?: string;
 }
 
 export interface DownloadStatus {
   status: 'idle' | 'downloading' | 'ready' | string;
   progress: number;
+  delta?: {
+    files: number;
+    removed: number;
+    download_bytes: number;
+    total_bytes: number;
+  };
 }
 
 export interface Connection {
@@ -100,6 +188,230 @@ export interface ConnectionsData {
   uploadTotal: number;
 }
 
+export interface ConnectionRate {
+  connections?: number;
+  upload: number;
+  download: number;
+  upload_rate: number;
+  download_rate: number;
+}
+
+export interface ConnectionSummary extends ConnectionRate {
+  id: string;
+  host: string;
+  network: string;
+  chain: string;
+  rule: string;
+  start: string;
+}
+
+export interface ConnectionStats {
+  sampled: boolean;
+  connection_count: number;
+  upload_total: number;
+  download_total: number;
+  upload_rate: number;
+  download_rate: number;
+  connections: ConnectionSummary[];
+  hosts: (ConnectionRate & { host: string })[];
+  chains: (ConnectionRate & { chain: string })[];
+  rules: (ConnectionRate & { rule: string })[];
+}
+
+export type TelemetryResolution = '1s' | '10s' | '1m';
+
+export interface Telemetry {
+  resolution: TelemetryResolution;
+  connected: { traffic: boolean; memory: boolean };
+  latest: { traffic?: { up: number; down: number }; memory?: { inuse: number; oslimit?: number } };
+  // [timestamp, up, down]
+  traffic: [number, number, number][];
+  // [timestamp, inuse]
+  memory: [number, number][];
+}
+
+export interface CallStats {
+  count: number;
+  errors: Record<string, number>;
+  avg_ms: number;
+  max_ms: number;
+  bytes: number;
+  histogram: Record<string, number>;
+}
+
+export interface RuleStats {
+  rules_in: number;
+  rules_selected: number;
+  rules_out: number;
+  duplicates: number;
+  shadowed: number;
+  cidrs_collapsed: number;
+  parse_ms: number;
+  select_ms: number;
+  merge_ms: number;
+  total_ms: number;
+  dump_ms?: number;
+  providers_ms?: number;
+  providers?: Record<string, { status: string; size?: number | null }>;
+}
+
+export interface Diagnostics {
+  enabled: boolean;
+  api: Record<string, CallStats>;
+  http: Record<string, CallStats>;
+  rules?: Partial<RuleStats>;
+  dns?: DnsStats;
+}
+
+export interface DnsStats {
+  hits: number;
+  misses: number;
+  coalesced: number;
+  failures: number;
+  entries: number;
+  avg_lookup_ms: number;
+}
+
+export interface CacheCounters {
+  hits: number;
+  misses: number;
+  coalesced: number;
+}
+
+export interface CacheStats extends CacheCounters {
+  hit_rate: number;
+  invalidations: number;
+  entries: number;
+  endpoints: Record<string, CacheCounters>;
+}
+
+export interface GeodataFile {
+  sha256?: string;
+  size?: number;
+  updated_at?: number;
+  checked_at?: number;
+  source?: string;
+  present: boolean;
+  stale: boolean;
+}
+
+export interface GeodataStatus {
+  running: boolean;
+  max_age_days: number;
+  files: Record<string, GeodataFile>;
+}
+
+export interface GeodataUpdateResult {
+  started: boolean;
+  files: Record<string, unknown>;
+}
+
+export interface PrewarmGroup {
+  proxy: string;
+  // SOCKS connect time of the first tunnel through the selected node
+  cold_ms: number | null;
+  // SOCKS connect time of the latest tunnel once the path is warm
+  warm_ms: number | null;
+  // cold_ms - warm_ms
+  saving_ms: number | null;
+  age_s: number;
+  // no longer re-warmed: unused for a while
+  idle: boolean;
+  error: string | null;
+}
+
+export interface PrewarmStatus {
+  enabled: boolean;
+  groups: Record<string, PrewarmGroup>;
+}
+
+export interface ProviderModeStatus {
+  enabled: boolean;
+  // whether the last generation rewrote runtime_clash.yaml
+  config_changed: boolean;
+  // provider name -> node count
+  providers: Record<string, number>;
+  providers_changed: string[];
+}
+
+export interface RegionGroupSettings {
+  type: 'url-test' | 'fallback';
+  url: string;
+  // seconds
+  interval: number;
+  // milliseconds; url-test only
+  tolerance: number;
+  timeout: number;
+  lazy: boolean;
+}
+
+export interface RegionGroupStatus {
+  enabled: boolean;
+  settings: RegionGroupSettings;
+}
+
+export interface RegionGroupUpdateResult extends Partial<RegionGroupStatus> {
+  success: boolean;
+  error?: string;
+}
+
+export interface SelectionProfile {
+  name: string;
+  // group name -> proxy name
+  selections: Record<string, string>;
+  updated_at: number;
+}
+
+export interface ProfileList {
+  active: string | null;
+  profiles: SelectionProfile[];
+}
+
+export interface ProfileSaveResult {
+  success: boolean;
+  name?: string;
+  selections?: Record<string, string>;
+  error?: string;
+}
+
+export interface ProfileApplyResult {
+  success: boolean;
+  applied: string[];
+  failed: Record<string, string>;
+  rolled_back: string[];
+  elapsed_ms?: number;
+  error?: string;
+}
+
+export interface StartupTrace {
+  // milliseconds since process start, keyed by milestone
+  marks: Record<string, number>;
+  time_to_window_ms: number | null;
+  time_to_interactive_ms: number | null;
+}
+
+export interface UiSnapshot {
+  stale: boolean;
+  saved_at: number | null;
+  status: EngineStatus | null;
+  run_mode: RunMode | null;
+  servers: Pick<Server, 'id' | 'name' | 'host' | 'port' | 'status' | 'latency'>[];
+  proxy_groups: ProxyGroup[];
+}
+
+const EMPTY_CONNECTION_STATS: ConnectionStats = {
+  sampled: false,
+  connection_count: 0,
+  upload_total: 0,
+  download_total: 0,
+  upload_rate: 0,
+  download_rate: 0,
+  connections: [],
+  hosts: [],
+  chains: [],
+  rules: [],
+};
+
 // Check if pywebview API is available (may be injected after page load)
 const hasPywebview = (): boolean => {
   return !!(window.pywebview?.api);
@@ -184,6 +496,23 @@ export const api = {
     return window.pywebview.api.get_servers();
   },
 
+  queryServers: async (params: ServerQuery = {}): Promise<ServerQueryResult> => {
+    if (!(await ensurePywebview())) {
+      return { items: [], total: 0, next_cursor: null, error: 'API not available' };
+    }
+    return window.pywebview.api.query_servers(
+      params.query ?? '',
+      params.status ?? null,
+      params.region ?? null,
+      params.group ?? null,
+      params.latency ?? null,
+      params.sort ?? 'default',
+      params.cursor ?? null,
+      params.limit ?? 100,
+      params.facets ?? false,
+    );
+  },
+
   getProxyGroups: async (): Promise<ProxyGroup[]> => {
     if (!(await ensurePywebview())) {
       return [];
@@ -198,11 +527,18 @@ export const api = {
     return window.pywebview.api.get_subscription_url();
   },
 
-  testServersConnectivity: async (): Promise<Server[]> => {
+  getLatencyHistory: async (serverId: string, limit = 100): Promise<LatencySample[]> => {
+    if (!(await ensurePywebview())) {
+      return [];
+    }
+    return window.pywebview.api.get_latency_history(serverId, limit);
+  },
+
+  testServersConnectivity: async (mode: ProbeMode = 'tcp'): Promise<Server[]> => {
     if (!(await ensurePywebview())) {
       return [];
     }
-    return window.pywebview.api.test_servers_connectivity();
+    return window.pywebview.api.test_servers_connectivity(mode);
   },
 
   testGroupDelays: async (groupName: string): Promise<Record<string, number>> => {
@@ -254,6 +590,20 @@ export const api = {
     return window.pywebview.api.get_connections();
   },
 
+  getConnectionStats: async (topN = 10): Promise<ConnectionStats> => {
+    if (!(await ensurePywebview())) {
+      return EMPTY_CONNECTION_STATS;
+    }
+    return window.pywebview.api.get_connection_stats(topN);
+  },
+
+  getTelemetry: async (resolution: TelemetryResolution = '1s', since: number | null = null): Promise<Telemetry> => {
+    if (!(await ensurePywebview())) {
+      return { resolution, connected: { traffic: false, memory: false }, latest: {}, traffic: [], memory: [] };
+    }
+    return window.pywebview.api.get_telemetry(resolution, since);
+  },
+
   switchProxy: async (groupName: string, proxyName: string): Promise<boolean> => {
     if (!(await ensurePywebview())) {
       return false;
@@ -274,4 +624,136 @@ export const api = {
     }
     return window.pywebview.api.get_system_language();
   },
+
+  getDiagnostics: async (): Promise<Diagnostics> => {
+    if (!(await ensurePywebview())) {
+      return { enabled: false, api: {}, http: {} };
+    }
+    return window.pywebview.api.get_diagnostics();
+  },
+
+  setDiagnosticsEnabled: async (enabled: boolean): Promise<boolean> => {
+    if (!(await ensurePywebview())) {
+      return false;
+    }
+    return window.pywebview.api.set_diagnostics_enabled(enabled);
+  },
+
+  getStartupTrace: async (): Promise<StartupTrace> => {
+    if (!(await ensurePywebview())) {
+      return { marks: {}, time_to_window_ms: null, time_to_interactive_ms: null };
+    }
+    return window.pywebview.api.get_startup_trace();
+  },
+
+  getSnapshot: async (): Promise<UiSnapshot | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.get_snapshot();
+  },
+
+  getCacheStats: async (): Promise<CacheStats | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.get_cache_stats();
+  },
+
+  getGeodataStatus: async (): Promise<GeodataStatus | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.get_geodata_status();
+  },
+
+  updateGeodata: async (force = true): Promise<GeodataUpdateResult | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.update_geodata(force);
+  },
+
+  setGeodataMaxAge: async (days: number): Promise<boolean> => {
+    if (!(await ensurePywebview())) {
+      return false;
+    }
+    return window.pywebview.api.set_geodata_max_age(days);
+  },
+
+  getPrewarmStatus: async (): Promise<PrewarmStatus | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.get_prewarm_status();
+  },
+
+  setPrewarmEnabled: async (enabled: boolean): Promise<boolean> => {
+    if (!(await ensurePywebview())) {
+      return false;
+    }
+    return window.pywebview.api.set_prewarm_enabled(enabled);
+  },
+
+  getProviderMode: async (): Promise<ProviderModeStatus | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.get_provider_mode();
+  },
+
+  setProviderMode: async (enabled: boolean): Promise<boolean> => {
+    if (!(await ensurePywebview())) {
+      return false;
+    }
+    return window.pywebview.api.set_provider_mode(enabled);
+  },
+
+  getRegionGroups: async (): Promise<RegionGroupStatus | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.get_region_groups();
+  },
+
+  setRegionGroups: async (
+    enabled: boolean,
+    settings?: Partial<RegionGroupSettings>,
+  ): Promise<RegionGroupUpdateResult> => {
+    if (!(await ensurePywebview())) {
+      return { success: false, error: 'API not available' };
+    }
+    return window.pywebview.api.set_region_groups(enabled, settings ?? null);
+  },
+
+  getProfiles: async (): Promise<ProfileList> => {
+    if (!(await ensurePywebview())) {
+      return { active: null, profiles: [] };
+    }
+    return window.pywebview.api.get_profiles();
+  },
+
+  saveProfile: async (
+    name: string,
+    selections?: Record<string, string>,
+  ): Promise<ProfileSaveResult> => {
+    if (!(await ensurePywebview())) {
+      return { success: false, error: 'API not available' };
+    }
+    return window.pywebview.api.save_profile(name, selections ?? null);
+  },
+
+  deleteProfile: async (name: string): Promise<boolean> => {
+    if (!(await ensurePywebview())) {
+      return false;
+    }
+    return window.pywebview.api.delete_profile(name);
+  },
+
+  applyProfile: async (name: string): Promise<ProfileApplyResult | null> => {
+    if (!(await ensurePywebview())) {
+      return null;
+    }
+    return window.pywebview.api.apply_profile(name);
+  },
 };
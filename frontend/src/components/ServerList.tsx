@@ -0,0 +1,122 @@
+import { useEffect, useRef, useState } from 'react';
+import { api, type Server, type ServerSort } from '@/api';
+import { Button } from '@/components/ui/button';
+import { Input } from '@/components/ui/input';
+import { Badge } from '@/components/ui/badge';
+import { cn } from '@/lib/utils';
+import { useTranslation } from '@/i18n/useTranslation';
+
+const PAGE_SIZE = 50;
+const SORTS: ServerSort[] = ['default', 'latency', 'name'];
+
+const statusColor: Record<Server['status'], string> = {
+  online: 'bg-emerald-500/10 text-emerald-400 border-emerald-500/20',
+  offline: 'bg-red-500/10 text-red-400 border-red-500/20',
+  unknown: 'bg-muted text-muted-foreground border-border',
+};
+
+interface ServerListProps {
+  // changes whenever the caller has reloaded data, to requery the first page
+  refreshKey: number;
+}
+
+// Filtering, sorting and paging run in the backend index, so only the shown
+// page crosses the bridge.
+export function ServerList({ refreshKey }: ServerListProps) {
+  const { t } = useTranslation();
+  const [query, setQuery] = useState('');
+  const [sort, setSort] = useState<ServerSort>('default');
+  const [items, setItems] = useState<Server[]>([]);
+  const [total, setTotal] = useState(0);
+  const [cursor, setCursor] = useState<string | null>(null);
+  // how many rows a background refresh requeries, so loaded pages stay visible
+  const shown = useRef(PAGE_SIZE);
+
+  useEffect(() => {
+    shown.current = PAGE_SIZE;
+  }, [query, sort]);
+
+  useEffect(() => {
+    let cancelled = false;
+    api.queryServers({ query, sort, limit: shown.current }).then(result => {
+      if (cancelled) return;
+      setItems(result.items);
+      setTotal(result.total);
+      setCursor(result.next_cursor);
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [query, sort, refreshKey]);
+
+  const loadMore = async () => {
+    if (!cursor) return;
+    const result = await api.queryServers({ query, sort, cursor, limit: PAGE_SIZE });
+    shown.current = items.length + result.items.length;
+    setItems(prev => [...prev, ...result.items]);
+    setTotal(result.total);
+    setCursor(result.next_cursor);
+  };
+
+  return (
+    <div className="bg-card border border-border rounded-xl overflow-hidden">
+      <div className="p-4 flex flex-wrap items-center gap-3 border-b border-border">
+        <span className="font-bold text-foreground text-lg">{t('rdpServers')}</span>
+        <span className="text-sm text-muted-foreground">{total}</span>
+        <div className="flex-1" />
+        <Input
+          placeholder={t('searchServers')}
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          className="w-56 bg-background border-input text-foreground"
+        />
+        <div className="flex gap-1">
+          {SORTS.map(key => (
+            <Button
+              key={key}
+              variant="ghost"
+              size="sm"
+              onClick={() => setSort(key)}
+              className={cn(sort === key ? "bg-accent text-foreground" : "text-muted-foreground")}
+            >
+              {t(`sort_${key}`)}
+            </Button>
+          ))}
+        </div>
+      </div>
+
+      {items.length === 0 ? (
+        <div className="p-6 text-center text-muted-foreground">{t('noServers')}</div>
+      ) : (
+        <div className="divide-y divide-border">
+          {items.map(server => (
+            <div key={server.id} className="px-4 py-2 flex items-center justify-between gap-4 text-sm">
+              <div className="min-w-0">
+                <div className="text-foreground font-medium truncate">{server.name}</div>
+                <div className="text-xs text-muted-foreground font-mono truncate">
+                  {server.host}:{server.port}
+                </div>
+              </div>
+              <div className="flex items-center gap-3 shrink-0">
+                {server.latency != null && (
+                  <span className="text-xs font-mono text-muted-foreground">{server.latency}ms</span>
+                )}
+                <Badge variant="outline" className={cn("text-[10px] uppercase tracking-wider border", statusColor[server.status])}>
+                  {server.status}
+                </Badge>
+              </div>
+            </div>
+          ))}
+        </div>
+      )}
+
+      {cursor && (
+        <div className="p-3 border-t border-border text-center">
+          <Button variant="ghost" size="sm" onClick={loadMore} className="text-muted-foreground">
+            {t('loadMore')}
+          </Button>
+        </div>
+      )}
+    </div>
+  );
+}
@@ -0,0 +1,23 @@
+import { cn } from "@/lib/utils";
+
+interface SparklineProps {
+  values: number[];
+  className?: string;
+}
+
+export function Sparkline({ values, className }: SparklineProps) {
+  if (values.length < 2) {
+    return <svg viewBox="0 0 100 24" className={cn("h-6 w-full", className)} />;
+  }
+  const max = Math.max(...values, 1);
+  const step = 100 / (values.length - 1);
+  const points = values
+    .map((v, i) => `${(i * step).toFixed(1)},${(24 - (v / max) * 22).toFixed(1)}`)
+    .join(' ');
+
+  return (
+    <svg viewBox="0 0 100 24" preserveAspectRatio="none" className={cn("h-6 w-full", className)}>
+      <polyline points={points} fill="none" stroke="currentColor" strokeWidth="1.5" vectorEffect="non-scaling-stroke" />
+    </svg>
+  );
+}
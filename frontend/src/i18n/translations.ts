@@ -43,6 +43,11 @@ export const translations = {
     refresh: 'Refresh',
     noActiveConnections: 'No active connections. Start the engine and connect to RDP.',
     chain: 'Chain',
+    topHosts: 'Top destinations',
+    topChains: 'Top proxy chains',
+    throughput: 'Throughput',
+    engineMemory: 'Engine memory',
+    staleSnapshot: 'Last known state',
     about: 'About',
     currentVersion: 'Current Version',
     latestVersion: 'Latest Version',
@@ -63,6 +68,13 @@ export const translations = {
     unknown: 'Unknown',
     activeLabel: 'Active',
     reuseModeDesc: 'Subscription is managed by Clash Verge',
+    rdpServers: 'RDP servers',
+    searchServers: 'Search name or host...',
+    sort_default: 'Default',
+    sort_latency: 'Latency',
+    sort_name: 'Name',
+    noServers: 'No servers',
+    loadMore: 'Load more',
   },
   'zh-CN': {
     dashboard: '仪表盘',
@@ -108,6 +120,11 @@ export const translations = {
     refresh: '刷新',
     noActiveConnections: '暂无活动连接。请启动引擎并连接RDP。',
     chain: '链路',
+    topHosts: '流量最高的目标',
+    topChains: '流量最高的代理链路',
+    throughput: '吞吐量',
+    engineMemory: '引擎内存',
+    staleSnapshot: '上次状态',
     about: '关于',
     currentVersion: '当前版本',
     latestVersion: '最新版本',
@@ -128,6 +145,13 @@ export const translations = {
     unknown: '未知',
     activeLabel: '当前使用',
     reuseModeDesc: '订阅由 Clash Verge 管理',
+    rdpServers: 'RDP 服务器',
+    searchServers: '搜索名称或地址...',
+    sort_default: '默认',
+    sort_latency: '延迟',
+    sort_name: '名称',
+    noServers: '暂无服务器',
+    loadMore: '加载更多',
   },
 };
 
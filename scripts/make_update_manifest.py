@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+NextDesk Delta Update Manifest Generator
+Hashes a built dist/NextDesk folder into manifest.json plus one
+content-addressed blob-<sha256> file per distinct file, for the delta update
+channel. The output is flat so it can be uploaded as GitHub release assets.
+
+Usage:
+    python scripts/make_update_manifest.py 1.0.70
+    python scripts/make_update_manifest.py 1.0.70 --dist dist/NextDesk --out dist/update \\
+        --installer https://github.com/z0fans/NextDesk/releases/download/v1.0.70/NextDesk_Setup.exe
+
+Upload the output folder as-is; the app reads <url>/manifest.json and fetches
+<url>/blob-<sha256> for every file that differs from the installed copy.
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+from pathlib import Path
+
+SKIP_NAMES = {".update", "update_manifest.json"}
+BLOB_PREFIX = "blob-"
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def main():
+    project_root = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser()
+    parser.add_argument("version")
+    parser.add_argument("--dist", type=Path, default=project_root / "dist" / "NextDesk")
+    parser.add_argument("--out", type=Path, default=project_root / "dist" / "update")
+    parser.add_argument("--installer", help="full installer URL used as fallback")
+    args = parser.parse_args()
+
+    if not args.dist.is_dir():
+        print(f"Error: build output not found at {args.dist}")
+        sys.exit(1)
+
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    files = {}
+    for path in sorted(args.dist.rglob("*")):
+        relative = path.relative_to(args.dist)
+        if not path.is_file() or relative.parts[0] in SKIP_NAMES:
+            continue
+        sha256 = file_sha256(path)
+        files[relative.as_posix()] = {"sha256": sha256, "size": path.stat().st_size}
+        blob = args.out / f"{BLOB_PREFIX}{sha256}"
+        if not blob.exists():
+            shutil.copyfile(path, blob)
+
+    manifest = {"version": args.version, "blob_base": BLOB_PREFIX, "files": files}
+    if args.installer:
+        manifest["installer"] = args.installer
+    (args.out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    total = sum(entry["size"] for entry in files.values())
+    print(f"Manifest: {args.out / 'manifest.json'}")
+    print(f"  {len(files)} files, {total / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()